@@ -13,8 +13,11 @@ from matplotlib.colors import LightSource
 import seaborn as sns
 from accum import accum
 from thermoelectricProperties import thermoelectricProperties
+from screeningLength import screeningLength
+from diskCache import diskCache
 
 Si = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numBands=8, numQpoints=201, numEnergySampling=1000)
+selfConsistentFermiLevel = diskCache('cache').memoize(Si.selfConsistentFermiLevel)    # reruns with unchanged inputs load the Fermi levels from ./cache
 vfrac = 0.05
 ml = 0.98*thermoelectricProperties.me # longitudinal effective mass
 mt = 0.19*thermoelectricProperties.me # transverse effective mass
@@ -51,15 +54,15 @@ enrg_sorted_idx = np.argsort(energy_vel, axis=0)
 gVel = Si.electronGroupVelocity(kp=kp_vel[enrg_sorted_idx], energy_kp=energy_vel[enrg_sorted_idx], energyRange=e)
 DoS = (1+vfrac)*Si.electronDoS(path2DoS='DOSCAR', headerLines=6, unitcell_volume=2*19.70272e-30, numDoSpoints=2000, valleyPoint=1118, energyRange=e)
 JD_f_500K, JD_n_500K = Si.fermiLevel(carrierConcentration=cc, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=T_500K)
-fermi_500K, cc_sc_500K = Si.fermiLevelSelfConsistent(carrierConcentration=cc, Temp=T_500K, energyRange=e, DoS=DoS, fermilevel=JD_f_500K)
+fermi_500K, cc_sc_500K = selfConsistentFermiLevel(carrierConcentration=cc, Temp=T_500K, energyRange=e, DoS=DoS, fermilevel=JD_f_500K)
 dis_500K, dfdE_500K = Si.fermiDistribution(energyRange=e, Temp=T_500K, fermiLevel=fermi_500K)
 
 JD_f_300K, JD_n_300K = Si.fermiLevel(carrierConcentration=cc, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=T_300K)
-fermi_300K, cc_sc_300K = Si.fermiLevelSelfConsistent(carrierConcentration=cc, Temp=T_300K, energyRange=e, DoS=DoS, fermilevel=JD_f_300K)
+fermi_300K, cc_sc_300K = selfConsistentFermiLevel(carrierConcentration=cc, Temp=T_300K, energyRange=e, DoS=DoS, fermilevel=JD_f_300K)
 dis_300K, dfdE_300K = Si.fermiDistribution(energyRange=e, Temp=T_300K, fermiLevel=fermi_300K)
 
 JD_f_1300K, JD_n_1300K = Si.fermiLevel(carrierConcentration=cc, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=T_1300K)
-fermi_1300K, cc_sc_1300K = Si.fermiLevelSelfConsistent(carrierConcentration=cc, Temp=T_1300K, energyRange=e, DoS=DoS, fermilevel=JD_f_1300K)
+fermi_1300K, cc_sc_1300K = selfConsistentFermiLevel(carrierConcentration=cc, Temp=T_1300K, energyRange=e, DoS=DoS, fermilevel=JD_f_1300K)
 dis_1300K, dfdE_1300K = Si.fermiDistribution(energyRange=e, Temp=T_1300K, fermiLevel=fermi_1300K)
 
 
@@ -67,29 +70,10 @@ dis_1300K, dfdE_1300K = Si.fermiDistribution(energyRange=e, Temp=T_1300K, fermiL
 # np.savetxt("Ef_300K",fermi_300K/T_300K/thermoelectricProperties.kB)
 # np.savetxt("Ef_1300K",fermi_300K/T_1300K/thermoelectricProperties.kB)
 # exit()
-LD_nondegenerate_300K = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*T_300K/cc_sc_300K) # screening length
-
-LD_nondegenerate_1300K = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*T_1300K/cc_sc_1300K) # screening length
-
-LD_nondegenerate_500K = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*T_500K/cc_sc_500K) # screening length
-
-m_CB_300K = 0.23*thermoelectricProperties.me*(1+5*alpha_300K*thermoelectricProperties.kB*T_300K)     # conduction band effective mass
-m_CB_500K = 0.23*thermoelectricProperties.me*(1+5*alpha_500K*thermoelectricProperties.kB*T_500K)     # conduction band effective mass
-m_CB_1300K = 0.23*thermoelectricProperties.me*(1+5*alpha_1300K*thermoelectricProperties.kB*T_1300K)     # conduction band effective mass
-
-Nc_300K = 2*(m_CB_300K*thermoelectricProperties.kB*T_300K/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-Nc_500K = 2*(m_CB_300K*thermoelectricProperties.kB*T_500K/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-Nc_1300K = 2*(m_CB_300K*thermoelectricProperties.kB*T_1300K/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-
-fermi_int_300K = np.loadtxt("f_300K", delimiter=',')
-fermi_int_500K = np.loadtxt("f_500K", delimiter=',')
-fermi_int_1300K = np.loadtxt("f_1300K", delimiter=',')
-
-LD_300K = np.sqrt(1/(Nc_300K/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/T_300K*thermoelectricProperties.e2C*(fermi_int_300K[1]+15*alpha_300K*thermoelectricProperties.kB*T_300K/4*fermi_int_300K[0])))
-
-LD_500K = np.sqrt(1/(Nc_500K/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/T_500K*thermoelectricProperties.e2C*(fermi_int_500K[1]+15*alpha_500K*thermoelectricProperties.kB*T_500K/4*fermi_int_500K[0])))
-
-LD_1300K = np.sqrt(1/(Nc_1300K/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/T_1300K*thermoelectricProperties.e2C*(fermi_int_300K[1]+15*alpha_1300K*thermoelectricProperties.kB*T_1300K/4*fermi_int_1300K[0])))
+T_stack = np.vstack([T_300K, T_500K, T_1300K])
+LD_nondegenerate_stack, LD_stack = screeningLength(carrierConcentration=np.vstack([cc_sc_300K, cc_sc_500K, cc_sc_1300K]), fermiLevel=np.vstack([fermi_300K, fermi_500K, fermi_1300K]), Temp=T_stack, alpha=np.vstack([alpha_300K, alpha_500K, alpha_1300K]), bandMass=0.23*thermoelectricProperties.me, dielectric=Si.dielectric) # screening length
+LD_nondegenerate_300K, LD_nondegenerate_500K, LD_nondegenerate_1300K = LD_nondegenerate_stack[:, None]
+LD_300K, LD_500K, LD_1300K = LD_stack[:, None]
 
 
 tau_p_pb_300K, tau_p_npb_300K = Si.tau_p(energyRange=e, alpha=alpha_300K, Dv=2.94, DA=9.5, T=T_300K, vs=sp, D=DoS, rho=rho)
@@ -99,13 +83,11 @@ tau_p_pb_500K, tau_p_npb_500K = Si.tau_p(energyRange=e, alpha=alpha_500K, Dv=2.9
 tau_p_pb_1300K, tau_p_npb_1300K = Si.tau_p(energyRange=e, alpha=alpha_1300K, Dv=2.94, DA=9.5, T=T_1300K, vs=sp, D=DoS, rho=rho)
 
 
-tau_ion_300K = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_300K, N=cc_sc_300K)
-tau_ion_500K = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_500K, N=cc_sc_500K)
-tau_ion_1300K = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_1300K, N=cc_sc_1300K)
+tau_ion_300K, tau_ion_500K, tau_ion_1300K = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_stack, N=np.vstack([cc_sc_300K, cc_sc_500K, cc_sc_1300K]))
 
-tau_300K = Si.matthiessen(e, 6*tau_p_npb_300K, 6*tau_ion_300K)
-tau_500K = Si.matthiessen(e, 6*tau_p_npb_500K, 6*tau_ion_500K)
-tau_1300K = Si.matthiessen(e, 6*tau_p_npb_1300K, 6*tau_ion_1300K)
+tau_300K = Si.matthiessen(6*tau_p_npb_300K, 6*tau_ion_300K)
+tau_500K = Si.matthiessen(6*tau_p_npb_500K, 6*tau_ion_500K)
+tau_1300K = Si.matthiessen(6*tau_p_npb_1300K, 6*tau_ion_1300K)
 
 uo = np.arange(0,0.5,0.02)
 xv, yv = np.meshgrid(n,uo)
@@ -13,8 +13,12 @@ from matplotlib.colors import LightSource
 import seaborn as sns
 from accum import accum
 from thermoelectricProperties import thermoelectricProperties
+from screeningLength import screeningLength
+from diskCache import diskCache
+from powerFactorOptimizer import maximize, filteringObjective
 
 Si = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numBands=8, numQpoints=201, numEnergySampling=1000)
+selfConsistentFermiLevel = diskCache('cache').memoize(Si.selfConsistentFermiLevel)    # reruns with unchanged inputs load the Fermi levels from ./cache
 vfrac = 0.05
 ml = 0.98*thermoelectricProperties.me # longitudinal effective mass
 mt = 0.19*thermoelectricProperties.me # transverse effective mass
@@ -44,26 +48,18 @@ enrg_sorted_idx = np.argsort(energy_vel, axis=0)
 gVel = Si.electronGroupVelocity(kp=kp_vel[enrg_sorted_idx], energy_kp=energy_vel[enrg_sorted_idx], energyRange=e)
 DoS = (1+vfrac)*Si.electronDoS(path2DoS='DOSCAR', headerLines=6, unitcell_volume=2*19.70272e-30, numDoSpoints=2000, valleyPoint=1118, energyRange=e)
 JD_f, JD_n = Si.fermiLevel(carrierConcentration=cc, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=T)
-fermi, cc_sc = Si.fermiLevelSelfConsistent(carrierConcentration=cc, Temp=T, energyRange=e, DoS=DoS, fermilevel=JD_f)
+fermi, cc_sc = selfConsistentFermiLevel(carrierConcentration=cc, Temp=T, energyRange=e, DoS=DoS, fermilevel=JD_f)
 dis, dfdE = Si.fermiDistribution(energyRange=e, Temp=T, fermiLevel=fermi)
 
 # np.savetxt("Ef",fermi/T/thermoelectricProperties.kB)
 # exit()
-LD_nondegenerate = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*T/cc_sc) # screening length
-
-m_CB = 0.23*thermoelectricProperties.me*(1+5*alpha*thermoelectricProperties.kB*T)     # conduction band effective mass
-
-Nc = 2*(m_CB*thermoelectricProperties.kB*T/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-
-fermi_int = np.loadtxt("f", delimiter=',')
-
-LD = np.sqrt(1/(Nc/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/T*thermoelectricProperties.e2C*(fermi_int[1]+15*alpha*thermoelectricProperties.kB*T/4*fermi_int[0])))
+LD_nondegenerate, LD = screeningLength(carrierConcentration=cc_sc, fermiLevel=fermi, Temp=T, alpha=alpha, bandMass=0.23*thermoelectricProperties.me, dielectric=Si.dielectric) # screening length
 
 tau_p_pb, tau_p_npb= Si.tau_p(energyRange=e, alpha=alpha, Dv=2.94, DA=9.5, T=T, vs=sp, D=DoS, rho=rho)
 
 tau_ion = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD, N=cc_sc)
 
-tau = Si.matthiessen(e, 6*tau_p_npb, 6*tau_ion)
+tau = Si.matthiessen(6*tau_p_npb, 6*tau_ion)
 
 
 uo = np.arange(0.01,0.3,0.01)
@@ -72,6 +68,9 @@ print(uo.shape,tau0.shape)
 xv, yv = np.meshgrid(uo,np.log10(tau0)+16)
 Coeff_f = Si.phenomenological(U= uo, tauo = tau0, E = e, DoS=DoS, vg=gVel, Ef=fermi, dfdE=dfdE, Temp=T, tau_b=tau)
 PF_f = Coeff_f[0]*Coeff_f[1]**2
+PF_objective = filteringObjective(Si, E=e, DoS=DoS, vg=gVel, Ef=fermi, dfdE=dfdE, Temp=T, tau_b=tau)
+optimum, PF_optimum, trace, evaluations = maximize(PF_objective, bounds=[[uo[0], uo[-1]], [np.log10(tau0[0]), np.log10(tau0[-1])]])
+print("optimal U0 (eV), log10 tau0 (s):", optimum, "PF:", PF_optimum, "evaluations:", evaluations)
 print("done")
 sns.set()
 sns.set_context("paper", font_scale=2, rc={"lines.linewidth": 4})
@@ -88,7 +87,7 @@ ax.xaxis.pane.fill = False
 ax.yaxis.pane.fill = False
 ax.zaxis.pane.fill = False
 
-surf_s0 = ax.plot_surface(xv, yv, -1*Coeff_f[1]*1e6, color='orange', edgecolor='black', linewidth=0.15, alpha=0.9, rstride=1, cstride=1, shade=True, antialiased=False)  # , cmap=cm.rainbow , cmap=cm.rainbow
+surf_s0 = ax.plot_surface(xv, yv, -1*Coeff_f[1][:, :, 0].T*1e6, color='orange', edgecolor='black', linewidth=0.15, alpha=0.9, rstride=1, cstride=1, shade=True, antialiased=False)  # , cmap=cm.rainbow , cmap=cm.rainbow
 
 ax.set_xlabel('U$_o$ (eV)', fontsize=20, labelpad=15)
 ax.set_ylabel('tau$_o$ [log$_{10}$(fs)]', fontsize=20, labelpad=25)
@@ -1,5 +1,4 @@
 import numpy as np
-from numpy.linalg import norm
 from scipy.interpolate import PchipInterpolator
 import matplotlib as mpl
 from matplotlib import cm
@@ -13,6 +12,9 @@ from matplotlib.colors import LightSource
 import seaborn as sns
 from accum import accum
 from thermoelectricProperties import thermoelectricProperties
+from studyRunner import study
+from taskGraph import taskGraph
+from diskCache import diskCache
 
 ExpData_SiCfra_0pct_direction_up = np.loadtxt('ExpData_SiCfrac-0pct_direction-up.txt', delimiter=None, skiprows=1)
 ExpData_SiCfrac_1pct_direction_up = np.loadtxt('ExpData_SiCfrac-1pct_direction-up.txt', delimiter=None, skiprows=1)
@@ -37,98 +39,46 @@ mt = 0.19*thermoelectricProperties.me # transverse effective mass
 bulk_module = 98 # Bulk module (GPA)
 rho = 2329  # mass density (Kg/m3)
 sp = np.sqrt(bulk_module/rho) # speed of sound
-Lv = np.array([[1,1,0],[0,1,1],[1,0,1]])*Si.latticeParameter/2
-a_rp = np.cross(Lv[1],Lv[2])/np.dot(Lv[0],np.cross(Lv[1],Lv[2]))
-b_rp = np.cross(Lv[2],Lv[0])/np.dot(Lv[1],np.cross(Lv[2],Lv[0]))
-a_rp = np.cross(Lv[0],Lv[1])/np.dot(Lv[2],np.cross(Lv[0],Lv[1]))
-RLv = np.array([a_rp, b_rp, a_rp])
 e = Si.energyRange()
-g = Si.temp(TempMin=300, TempMax=1201, dT=50)
-h = Si.bandGap(Eg_o=1.17, Ao=4.73e-4, Bo=636, Temp=g)
-alpha = np.array(0.5*np.tile([1],(1,len(h[0]))))
-cc_no_inc = Si.carrierConcentration(Nc=None, Nv=None, path2extrinsicCarrierConcentration='experimental-carrier-concentration-no-inc.txt', bandGap=h, Ao=5.3e21, Bo=3.5e21, Temp=g)
-cc = Si.carrierConcentration(Nc=None, Nv=None, path2extrinsicCarrierConcentration='experimental-carrier-concentration-5pct-direction-up.txt', bandGap=h, Ao=5.3e21, Bo=3.5e21, Temp=g)
-cc_direction_down = Si.carrierConcentration(Nc=None, Nv=None, path2extrinsicCarrierConcentration='experimental-carrier-concentration-5pct-direction-down.txt', bandGap=h, Ao=5.3e21, Bo=3.5e21, Temp=g)
-cc_1pct = Si.carrierConcentration(Nc=None, Nv=None, path2extrinsicCarrierConcentration='experimental-carrier-concentration-1pct.txt', bandGap=h, Ao=5.3e21, Bo=3.5e21, Temp=g)
-kp, band = Si.electronBandStructure(path2eigenval='EIGENVAL', skipLines=6)
-kp_rl = 2*np.pi*np.matmul(kp,RLv)
-kp_mag = norm(kp_rl, axis=1)
-min_band = np.argmin(band[400:600, 4], axis=0)
-max_band = np.argmax(band[400:600, 4], axis=0)
-kp_vel = kp_mag[401 + max_band:401 + min_band]
-energy_vel = band[401 + max_band:401 + min_band, 4] - band[401 + min_band, 4]
-enrg_sorted_idx = np.argsort(energy_vel, axis=0)
-gVel = Si.electronGroupVelocity(kp=kp_vel[enrg_sorted_idx], energy_kp=energy_vel[enrg_sorted_idx], energyRange=e)
-
-DoS = (1+vfrac)*Si.electronDoS(path2DoS='DOSCAR', headerLines=6, unitcell_volume=2*19.70272e-30, numDoSpoints=2000, valleyPoint=1118, energyRange=e)
-
-JD_f_no_inc, JD_n_no_inc = Si.fermiLevel(carrierConcentration=cc_no_inc, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=g)
-JD_f, JD_n = Si.fermiLevel(carrierConcentration=cc, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=g)
-JD_f_direction_down, JD_n_direction_down = Si.fermiLevel(carrierConcentration=cc_direction_down, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=g)
-JD_f_1pct, JD_n_1pct = Si.fermiLevel(carrierConcentration=cc_1pct, energyRange=e, DoS= DoS, Nc=None, Ao=5.3e21, Temp=g)
-fermi_no_inc, cc_sc_no_inc = Si.fermiLevelSelfConsistent(carrierConcentration=cc_no_inc, Temp=g, energyRange=e, DoS=DoS, fermilevel=JD_f_no_inc)
-fermi, cc_sc = Si.fermiLevelSelfConsistent(carrierConcentration=cc, Temp=g, energyRange=e, DoS=DoS, fermilevel=JD_f)
-fermi_direction_down, cc_sc_direction_down = Si.fermiLevelSelfConsistent(carrierConcentration=cc_direction_down, Temp=g, energyRange=e, DoS=DoS, fermilevel=JD_f_direction_down)
-fermi_1pct, cc_sc_1pct = Si.fermiLevelSelfConsistent(carrierConcentration=cc_1pct, Temp=g, energyRange=e, DoS=DoS, fermilevel=JD_f_1pct)
-dis_no_inc, dfdE_no_inc = Si.fermiDistribution(energyRange=e, Temp=g, fermiLevel=fermi_no_inc)
-dis, dfdE = Si.fermiDistribution(energyRange=e, Temp=g, fermiLevel=fermi)
-dis_direction_down, dfdE_direction_down = Si.fermiDistribution(energyRange=e, Temp=g, fermiLevel=fermi_direction_down)
-dis_1pct, dfdE_1pct = Si.fermiDistribution(energyRange=e, Temp=g, fermiLevel=fermi_1pct)
-# np.savetxt("Ef-no-inc",fermi_no_inc/g/thermoelectricProperties.kB)
-# np.savetxt("Ef-inc",fermi/g/thermoelectricProperties.kB)
-# np.savetxt("Ef-inc_direction_down",fermi_direction_down/g/thermoelectricProperties.kB)
-# np.savetxt("Ef-inc_1pct",fermi_1pct/g/thermoelectricProperties.kB)
-# exit()
-LD_nondegenerate_no_inc = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*g/cc_sc_no_inc) # screening length
-LD_nondegenerate = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*g/cc_sc) # screening length
-LD_nondegenerate_direction_down = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*g/cc_sc_direction_down) # screening length
-LD_nondegenerate_1pct = np.sqrt(4*np.pi*Si.dielectric*thermoelectricProperties.e0*thermoelectricProperties.kB/thermoelectricProperties.e2C*g/cc_sc_1pct) # screening length
-m_CB_no_inc = 0.23*thermoelectricProperties.me*(1+5*alpha*thermoelectricProperties.kB*g)     # conduction band effective mass
-m_CB_inc = 0.23*thermoelectricProperties.me*(1+5*alpha*thermoelectricProperties.kB*g)     # conduction band effective mass
-m_CB_inc_direction_down = 0.23*thermoelectricProperties.me*(1+5*alpha*thermoelectricProperties.kB*g)     # conduction band effective mass
-m_CB_inc_1pct = 0.23*thermoelectricProperties.me*(1+5*alpha*thermoelectricProperties.kB*g)     # conduction band effective mass
-Nc_no_inc = 2*(m_CB_no_inc*thermoelectricProperties.kB*g/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-Nc_inc = 2*(m_CB_inc*thermoelectricProperties.kB*g/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-Nc_inc_direction_down = 2*(m_CB_inc_direction_down*thermoelectricProperties.kB*g/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-Nc_inc_1pct = 2*(m_CB_inc_1pct*thermoelectricProperties.kB*g/thermoelectricProperties.hBar**2/2/np.pi/thermoelectricProperties.e2C)**(3/2)
-fermi_int = np.loadtxt("f_inc", delimiter=',')
-fermi_no_inc_int = np.loadtxt("f_no_inc", delimiter=',')
-fermi_int_direction_down = np.loadtxt("f_inc_direction_down", delimiter=',')
-fermi_int_1pct = np.loadtxt("f_inc_1pct", delimiter=',')
-LD = np.sqrt(1/(Nc_inc/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/g*thermoelectricProperties.e2C*(fermi_int[1]+15*alpha*thermoelectricProperties.kB*g/4*fermi_int[0])))
-LD_no_inc = np.sqrt(1/(Nc_no_inc/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/g*thermoelectricProperties.e2C*(fermi_no_inc_int[1]+15*alpha*thermoelectricProperties.kB*g/4*fermi_no_inc_int[0])))
-LD_direction_down  = np.sqrt(1/(Nc_inc_direction_down /Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/g*thermoelectricProperties.e2C*(fermi_int_direction_down[1]+15*alpha*thermoelectricProperties.kB*g/4*fermi_int_direction_down[0])))
-LD_int_1pct = np.sqrt(1/(Nc_inc_1pct/Si.dielectric/thermoelectricProperties.e0/thermoelectricProperties.kB/g*thermoelectricProperties.e2C*(fermi_int_1pct[1]+15*alpha*thermoelectricProperties.kB*g/4*fermi_int_1pct[0])))
-
-tau_p_pb, tau_p_npb = Si.tau_p(energyRange=e, alpha=alpha, Dv=2.94, DA=9.5, T=g, vs=sp, D=DoS, rho=rho)
-
-tau_ion_no_inc = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_no_inc, N=cc_sc_no_inc)
-tau_ion = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD, N=cc_sc)
-tau_ion_direction_down = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_direction_down, N=cc_sc_direction_down)
-tau_ion_1pct = Si.tau_Strongly_Screened_Coulomb(D=DoS, LD=LD_int_1pct, N=cc_sc_1pct)
 lifetime_nanoparticle = np.loadtxt('lifetime_np', delimiter=None, skiprows=0)
 energy_nanoparticle = np.loadtxt('energy_np', delimiter=None, skiprows=0)
 E_energy_nanoparticle, indices_energy_nanoparticle, return_indices_energy_nanoparticle = np.unique(energy_nanoparticle, return_index=True, return_inverse=True)
 lf_nanoparticle = accum(return_indices_energy_nanoparticle, lifetime_nanoparticle[1], func=np.mean, dtype=float)
 nanoparticle_Spline = PchipInterpolator(E_energy_nanoparticle[1::], lf_nanoparticle[1::])
 tau_np= nanoparticle_Spline(e)
-tau_no_inc = Si.matthiessen(e, 6*tau_p_pb, 6*tau_ion_no_inc)
-tau_no_np = Si.matthiessen(e, 6*tau_p_npb, 6*tau_ion)
-tau = Si.matthiessen(e, 6*tau_p_npb,6*tau_ion, tau_np)
-tau_direction_down = Si.matthiessen(e, 6*tau_p_npb, 6*tau_ion_direction_down, tau_np)
-tau_no_np_direction_down = Si.matthiessen(e, 6*tau_p_npb, 6*tau_ion_direction_down)
-tau_no_np_1pct = Si.matthiessen(e, 6*tau_p_npb, 6*tau_ion_1pct)
-tau_1pct = Si.matthiessen(e, 6*tau_p_pb, 6*tau_ion_1pct, 5*tau_np)  # 5 counts for 1% porosity instead of 5%
+
+Si_study = study({
+    'temperature': {'TempMin': 300, 'TempMax': 1201, 'dT': 50},
+    'bandGap': {'Eg_o': 1.17, 'Ao': 4.73e-4, 'Bo': 636},
+    'nonparabolicity': 0.5,
+    'bandMass': 0.23,
+    'carrierConcentration': {'Ao': 5.3e21, 'Bo': 3.5e21},
+    'DoS': {'path2DoS': 'DOSCAR', 'headerLines': 6, 'unitcell_volume': 2*19.70272e-30, 'numDoSpoints': 2000, 'valleyPoint': 1118, 'scale': 1+vfrac},
+    'groupVelocity': {'path2eigenval': 'EIGENVAL', 'skipLines': 6},
+    'phonon': {'Dv': 2.94, 'DA': 9.5, 'vs': sp, 'rho': rho},
+    'samples': [
+        {'label': 'no_inc', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-no-inc.txt', 'lifetime': '6*tau_p_pb + 6*tau_ion'},
+        {'label': 'no_np', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-5pct-direction-up.txt', 'lifetime': '6*tau_p_npb + 6*tau_ion'},
+        {'label': 'inc', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-5pct-direction-up.txt', 'lifetime': '6*tau_p_npb + 6*tau_ion + tau_np'},
+        {'label': 'direction_down', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-5pct-direction-down.txt', 'lifetime': '6*tau_p_npb + 6*tau_ion + tau_np'},
+        {'label': 'direction_down_no_np', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-5pct-direction-down.txt', 'lifetime': '6*tau_p_npb + 6*tau_ion'},
+        {'label': 'no_np_1pct', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-1pct.txt', 'lifetime': '6*tau_p_npb + 6*tau_ion'},
+        {'label': '1pct', 'path2extrinsicCarrierConcentration': 'experimental-carrier-concentration-1pct.txt', 'lifetime': '6*tau_p_pb + 6*tau_ion + 5*tau_np'},  # 5 counts for 1% porosity instead of 5%
+    ]}, material=Si, mechanisms={'tau_np': tau_np}, graph=taskGraph(store=diskCache('cache')))
+Si_result = Si_study.run()
+g, h, alpha, DoS, gVel = Si_result['temperature'], Si_result['bandGap'], Si_result['nonparabolicity'], Si_result['DoS'], Si_result['groupVelocity']
+kp, band = Si_result['bandStructure']
+# np.savetxt("Ef-no-inc",Si_result.sample('no_inc')['fermiLevel']/g/thermoelectricProperties.kB)
+# exit()
+m_CB_no_inc = m_CB_inc = m_CB_inc_direction_down = m_CB_inc_1pct = Si_result['conductionBandMass']     # conduction band effective mass
+cc_no_inc, cc, cc_direction_down, cc_1pct = [Si_result.sample(_)['carrierConcentration'] for _ in ['no_inc', 'inc', 'direction_down', '1pct']]
+cc_sc_no_inc, cc_sc, cc_sc_direction_down, cc_sc_1pct = [Si_result.sample(_)['selfConsistentCarrierConcentration'] for _ in ['no_inc', 'inc', 'direction_down', '1pct']]
+fermi_no_inc, fermi, fermi_direction_down, fermi_1pct = [Si_result.sample(_)['fermiLevel'] for _ in ['no_inc', 'inc', 'direction_down', '1pct']]
+tau_no_inc, tau_no_np, tau, tau_direction_down, tau_no_np_direction_down, tau_no_np_1pct, tau_1pct = Si_result['lifetime']
 
 # vg_analetical = Si.analyticalGroupVelocity(energyRange = e, nk = [40,38,38], m = [ml, mt, mt], valley = [0.85,0,0], dk_len = 0.15, alpha = alpha, temperature =g)
 
-Coeff_no_inc = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi_no_inc, dfdE=dfdE_no_inc, Temp=g, tau=tau_no_inc)
-Coeff_no_np = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi, dfdE=dfdE, Temp=g, tau=tau_no_np)
-Coeff = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi, dfdE=dfdE, Temp=g, tau=tau)
-Coeff_direction_down = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi_direction_down, dfdE=dfdE_direction_down, Temp=g, tau=tau_direction_down)
-Coeff_direction_down_no_np = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi_direction_down, dfdE=dfdE_direction_down, Temp=g, tau=tau_no_np_direction_down)
-Coeff_no_np_1pct  = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi_1pct, dfdE=dfdE_1pct, Temp=g, tau=tau_no_np_1pct)
-Coeff_1pct  = Si.electricalProperties(E=e, DoS=DoS, vg=gVel, Ef=fermi_1pct, dfdE=dfdE_1pct, Temp=g, tau=tau_1pct)
+Coeff_no_inc, Coeff_no_np, Coeff, Coeff_direction_down, Coeff_direction_down_no_np, Coeff_no_np_1pct, Coeff_1pct = [Si_result.coefficients(_) for _ in Si_study.labels]
 
 print("done")
 
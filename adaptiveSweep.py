@@ -0,0 +1,114 @@
+import numpy as np
+from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator, interp1d
+from inputHash import inputHash
+from checkpointStore import checkpointStore
+
+
+def adaptiveSweep(function, bounds, initialGrid=9, maxLevel=4, tolerance=0.01, maxEvaluations=None, checkpoint=None):
+    """
+    Parameter sweep that refines a coarse grid only where the output
+    changes rapidly.
+
+    `function` maps an (nPoints, nDim) array to nPoints values (e.g. the PF
+    objectives of powerFactorOptimizer), and `bounds` holds [lower, upper]
+    per dimension. The sweep starts from a grid of `initialGrid` points per
+    dimension. At each level every active cell is evaluated on its 3^d
+    stencil of corners, edge midpoints and centre. The cell is split in two
+    along every dimension when any stencil value differs from the
+    multilinear interpolation of the corners by more than `tolerance` times
+    the range of values seen so far. The stencil points of a split cell
+    are its children's corners, so they are not evaluated twice. All new
+    points of a level are evaluated in one batch. Refinement stops after
+    `maxLevel` splits. `maxEvaluations` is a hard budget beyond the initial
+    grid: a level whose stencils do not all fit only refines the cells
+    that do, those whose parents had the largest error first.
+
+    With a `checkpoint` directory, every evaluated batch is saved to a
+    checkpointStore keyed by the function and the sweep settings. A rerun
+    reloads the saved values and takes the same refinement path, but only
+    evaluates the points the interrupted run had not reached. The store
+    is removed when the sweep completes.
+
+    Returns [points, values, interpolant], where the interpolant is
+    Clough-Tocher in 2-D and piecewise linear otherwise. In 1-D it is an
+    interp1d taking the parameter values themselves.
+    """
+    bounds = np.atleast_2d(np.asarray(bounds, dtype=float))
+    numDims = len(bounds)
+    initialGrid = np.broadcast_to(initialGrid, (numDims,))
+    scale = 2**maxLevel
+    # Points live on an integer lattice, fine enough for the deepest cells
+    spacing = (bounds[:, 1] - bounds[:, 0]) / ((initialGrid - 1) * scale)
+    corners = np.array(list(np.ndindex(*(2,) * numDims)))
+    stencil = np.array(list(np.ndindex(*(3,) * numDims)))
+    # Multilinear interpolation weights of the 2^d corners at the 3^d stencil points (corners, edge and face midpoints, centre)
+    weights = np.prod(np.where(corners[None, :, :] == 1, stencil[:, None, :] / 2, 1 - stencil[:, None, :] / 2), axis=2)
+    cache = {}
+    store = None
+    if checkpoint is not None:
+        store = checkpointStore(checkpoint, inputHash('adaptiveSweep', function, bounds, initialGrid, maxLevel, tolerance, maxEvaluations), name='adaptiveSweep')
+        for piece in store.pieces():
+            # Rows of a saved batch are lattice indices followed by the value
+            batch = store.load(piece)
+            cache.update(zip(map(tuple, batch[:, :-1].astype(int)), batch[:, -1]))
+
+    visited = {}
+
+    def evaluate(lattice):
+        keys = list(map(tuple, lattice))
+        new = list(dict.fromkeys(key for key in keys if key not in cache))
+        if new:
+            values = np.asarray(function(bounds[:, 0] + np.array(new) * spacing), dtype=float).ravel()
+            cache.update(zip(new, values))
+            if store is not None:
+                store.save(np.column_stack((np.array(new), values)), size=len(new))
+        visited.update(dict.fromkeys(keys))
+        return np.array([cache[key] for key in keys])
+
+    def affordable(cells, priority, size):
+        # Cells whose new stencil points still fit in maxEvaluations, largest parent error first. Points count once
+        # this sweep has asked for them, so a resumed sweep with more points loaded makes the same choice
+        remaining = maxEvaluations - len(visited)
+        keep, planned = [], set()
+        for index in np.argsort(-priority, kind='stable'):
+            new = {key for key in map(tuple, cells[index] + stencil * (size // 2)) if key not in visited and key not in planned}
+            if len(new) <= remaining:
+                keep.append(index)
+                planned |= new
+                remaining -= len(new)
+        return np.sort(np.array(keep, dtype=int))
+
+    cells = np.array(list(np.ndindex(*(initialGrid - 1)))) * scale
+    priority = np.zeros(len(cells))
+    size = scale
+    # The initial grid is always evaluated; a split cell's corners are its parent's stencil points
+    evaluate((cells[:, None, :] + corners * size).reshape(-1, numDims))
+    for level in range(maxLevel):
+        if maxEvaluations is not None:
+            keep = affordable(cells, priority, size)
+            cells, priority = cells[keep], priority[keep]
+            if len(cells) == 0:
+                break
+        values = evaluate((cells[:, None, :] + stencil * (size // 2)).reshape(-1, numDims)).reshape(len(cells), -1)
+        cornerValues = values[:, np.all(stencil % 2 == 0, axis=1)]
+        # Only points this sweep has reached: a resumed sweep also holds points of later levels from the checkpoint
+        allValues = np.array([cache[key] for key in visited])
+        valueRange = np.ptp(allValues[np.isfinite(allValues)]) if np.any(np.isfinite(allValues)) else 0
+        error = np.max(np.abs(values - cornerValues @ weights.T), axis=1)
+        refine = ~(error <= tolerance * valueRange)
+        if not np.any(refine):
+            break
+        size //= 2
+        priority = np.repeat(error[refine], len(corners))
+        cells = (cells[refine][:, None, :] + corners * size).reshape(-1, numDims)
+    if store is not None:
+        store.remove()
+    points = bounds[:, 0] + np.array(list(cache.keys())) * spacing
+    values = np.fromiter(cache.values(), dtype=float)
+    if numDims == 1:
+        interpolant = interp1d(points[:, 0], values)
+    elif numDims == 2:
+        interpolant = CloughTocher2DInterpolator(points, values)
+    else:
+        interpolant = LinearNDInterpolator(points, values)
+    return [points, values, interpolant]
@@ -0,0 +1,41 @@
+import numpy as np
+from thermoelectricProperties import thermoelectricProperties
+
+
+class alloyMaterial:
+    """
+    Composition-dependent parameters of Si(1-x)Ge(x) for a vector of Ge
+    fractions `x`.
+
+    Every parameter is an array with one entry per composition, in the
+    units used by SiGe.py. `tau_alloy` returns the alloy scattering
+    lifetime with shape (nx, nT, nE), so a composition sweep over x, T and E
+    takes one call. `material(idx)` builds the `thermoelectricProperties`
+    instance for one composition.
+    """
+
+    def __init__(self, x):
+        self.x = np.atleast_1d(np.asarray(x, dtype=float))
+        x = self.x
+        self.latticeParameter = (0.027 * x**2 + 0.2 * x + 5.431) * 1e-10
+        self.electronEffectiveMass = (1.08 * (1 - x) + 1.41 * x - 0.183 * x * (1 - x)) * thermoelectricProperties.me
+        self.dielectric = 11.7 + 4.5 * x
+        self.bulkModulus = 98 - 23 * x                              # Bulk module (GPA)
+        self.density = 2329 + 3493 * x - 499 * x**2                 # mass density (Kg/m3)
+        self.speedOfSound = np.sqrt(self.bulkModulus / self.density)
+
+    def conductionBandMass(self, alpha, Temp):
+        # Nonparabolic conduction band effective mass, shape (1, nT); independent of x
+        return 0.26 * thermoelectricProperties.me * (1 + 5 * alpha * thermoelectricProperties.kB * Temp)
+
+    def tau_alloy(self, energyRange, Temp, alpha, U_alloy=0.7):
+        x = self.x[:, None, None]
+        a = self.latticeParameter[:, None, None]
+        m_CB = self.conductionBandMass(alpha, Temp).T[None]
+        hBar = thermoelectricProperties.hBar
+        with np.errstate(divide='ignore'):
+            tau = 1 / (x * (1 - x) * (3 * a**3 * np.pi**3 * U_alloy**2 / 8 / hBar) * m_CB**(3 / 2) * np.sqrt(energyRange)[None] / np.sqrt(2) / np.pi**2 / hBar**3 / 0.75) * thermoelectricProperties.e2C**(3 / 2)
+        return tau
+
+    def material(self, idx=0, **kwargs):
+        return thermoelectricProperties(latticeParameter=self.latticeParameter[idx], electronEffectiveMass=self.electronEffectiveMass[idx], dielectric=self.dielectric[idx], **kwargs)
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import tempfile
+from os.path import expanduser, join, isdir
+import numpy as np
+
+
+class checkpointStore:
+    """
+    Checkpoints of the finished pieces of one long computation, so an
+    interrupted run (crash, preemption, Ctrl-C) resumes where it stopped.
+
+    A store is the directory `directory/<key>`, where the key is a hash of
+    everything that determines the result. A checkpoint can therefore only
+    be resumed by the same computation. It holds one .npy file per piece
+    (a block of k-points, a slab of parameters) and manifest.json, the
+    list of pieces with their metadata (e.g. the [start, stop) range of a
+    block). A piece and then the manifest are written to temporary files
+    and renamed into place, so a crash at any moment leaves a consistent
+    store. A piece written without its manifest entry is simply computed
+    again. Pieces are kept bit for bit, so the result of a resumed run is
+    identical to an uninterrupted one.
+    """
+
+    def __init__(self, directory, key, name=None):
+        self.path = join(expanduser(directory), key)
+        self.name = name
+        self.key = key
+
+    def pieces(self):
+        try:
+            with open(join(self.path, 'manifest.json')) as manifestFile:
+                return json.load(manifestFile)['pieces']
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def load(self, piece):
+        return np.load(join(self.path, piece['file']))
+
+    def save(self, array, **info):
+        os.makedirs(self.path, exist_ok=True)
+        pieces = self.pieces()
+        piece = dict(info, file='piece-%d.npy' % len(pieces))
+        _atomicWrite(join(self.path, piece['file']), lambda pieceFile: np.save(pieceFile, array), binary=True)
+        manifest = {'name': self.name, 'key': self.key, 'pieces': pieces + [piece]}
+        _atomicWrite(join(self.path, 'manifest.json'), lambda manifestFile: json.dump(manifest, manifestFile))
+        return piece
+
+    def remove(self):
+        if isdir(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _atomicWrite(path, write, binary=False):
+    handle, temporary = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'wb' if binary else 'w') as temporaryFile:
+            write(temporaryFile)
+            temporaryFile.flush()
+            os.fsync(temporaryFile.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
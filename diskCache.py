@@ -0,0 +1,216 @@
+import functools
+import json
+import os
+import shutil
+import tempfile
+import time
+from os.path import expanduser, join, isdir
+import numpy as np
+from inputHash import inputHash
+
+
+class diskCache:
+    """
+    Content-addressed on-disk cache for expensive intermediates
+    (self-consistent Fermi levels, tau2D/tau3D lifetimes, group
+    velocities).
+
+    An entry is keyed by `inputHash` of the method name and its inputs,
+    and stored as the directory `directory/<key[:2]>/<key>`. It holds one
+    .npy file per array of the result and a meta.json with the result
+    structure (nested lists, tuples and dicts of arrays and scalars), the
+    method name, a summary of the inputs, the size and the creation time.
+    Dict keys may be strings, numbers, None and tuples of those. Arrays are
+    loaded memory-mapped copy-on-write unless `mmap` is False: they are
+    plain writable ndarrays, as on the call that computed them, and writes
+    stay in memory.
+
+    Writes are staged in a temporary directory next to the entry and
+    renamed into place. The rename is atomic, so concurrent processes
+    either see a complete entry or none, and when two processes store the
+    same key the first one wins. Each hit touches meta.json. When the
+    cache grows beyond `maxBytes`, the least recently used entries are
+    renamed away and then deleted, so readers never see a half-deleted
+    entry.
+
+    `memoize` wraps a function or bound method, e.g.
+    `fermiLevelSelfConsistent = cache.memoize(Si.fermiLevelSelfConsistent)`.
+    A bound method's material parameters are part of the key. Arguments
+    listed in `ignore` (workers, chunkSize, ...) are left out of it.
+    """
+
+    def __init__(self, directory='~/.cache/thermoelectric', maxBytes=2**32, mmap=True):
+        self.directory = expanduser(directory)
+        self.maxBytes = maxBytes
+        self.mmap = mmap
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key):
+        return join(self.directory, key[:2], key)
+
+    def __contains__(self, key):
+        return isdir(self.path(key))
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(join(path, 'meta.json')) as metaFile:
+                meta = json.load(metaFile)
+            arrays = [np.load(join(path, '%d.npy' % index), mmap_mode='c' if self.mmap else None).view(np.ndarray) for index in range(meta['numArrays'])]
+            os.utime(join(path, 'meta.json'))
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            # Missing, evicted meanwhile or unreadable: a miss
+            raise KeyError(key)
+        return _unpack(meta['structure'], arrays)
+
+    def save(self, key, value, name=None, inputs=None):
+        # Returns False if the value is not made of arrays and scalars, or the key is already stored
+        arrays = []
+        try:
+            structure = _pack(value, arrays)
+        except TypeError:
+            return False
+        final = self.path(key)
+        if isdir(final):
+            return False
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=os.path.dirname(final))
+        try:
+            for index, array in enumerate(arrays):
+                np.save(join(staging, '%d.npy' % index), array)
+            size = sum(os.path.getsize(join(staging, _)) for _ in os.listdir(staging))
+            meta = {'name': name, 'key': key, 'structure': structure, 'numArrays': len(arrays), 'bytes': size, 'created': time.time(), 'inputs': inputs}
+            with open(join(staging, 'meta.json'), 'w') as metaFile:
+                json.dump(meta, metaFile, default=str)
+            os.rename(staging, final)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not isdir(final):
+                raise
+            return False
+        self.evict(keep=key)
+        return True
+
+    def entries(self):
+        # (last use, bytes, key, name) of every stored entry, least recently used first
+        entries = []
+        for prefix in os.listdir(self.directory):
+            if not isdir(join(self.directory, prefix)):
+                continue
+            for key in os.listdir(join(self.directory, prefix)):
+                if key.startswith('.'):
+                    continue
+                try:
+                    metaPath = join(self.directory, prefix, key, 'meta.json')
+                    with open(metaPath) as metaFile:
+                        meta = json.load(metaFile)
+                    entries.append((os.path.getmtime(metaPath), meta['bytes'], key, meta['name']))
+                except (OSError, ValueError):
+                    continue
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        entries = self.entries()
+        total = sum(_[1] for _ in entries)
+        for _, size, key, _ in entries:
+            if total <= self.maxBytes:
+                break
+            if key != keep:
+                self.remove(key)
+                total -= size
+
+    def remove(self, key):
+        path = self.path(key)
+        trash = join(os.path.dirname(path), '.trash-%s-%d' % (key, os.getpid()))
+        try:
+            os.rename(path, trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def clear(self):
+        for _, _, key, _ in self.entries():
+            self.remove(key)
+
+    def size(self):
+        return sum(_[1] for _ in self.entries())
+
+    def memoize(self, function=None, name=None, ignore=()):
+        def decorate(function):
+            tag = name or '%s.%s' % (function.__module__, function.__qualname__)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                keyInputs = {_: __ for _, __ in kwargs.items() if _ not in ignore}
+                key = inputHash(tag, function, args, keyInputs)
+                try:
+                    return self.load(key)
+                except KeyError:
+                    pass
+                value = function(*args, **kwargs)
+                self.save(key, value, name=tag, inputs=_describe([args, keyInputs]))
+                return value
+            wrapper.cache = self
+            return wrapper
+        return decorate if function is None else decorate(function)
+
+
+def _pack(value, arrays):
+    # JSON structure of a result; its arrays are appended to `arrays` and referenced by index
+    if isinstance(value, (list, tuple)):
+        return {type(value).__name__: [_pack(_, arrays) for _ in value]}
+    if isinstance(value, dict):
+        return {'dict': [[_packKey(key), _pack(item, arrays)] for key, item in value.items()]}
+    if value is None:
+        return {'none': None}
+    if isinstance(value, (np.ndarray, np.generic, bool, int, float, complex)):
+        if np.asarray(value).dtype == object:
+            raise TypeError('object arrays are not cached')
+        arrays.append(np.asarray(value))
+        return {'array': len(arrays) - 1, 'scalar': not isinstance(value, np.ndarray)}
+    raise TypeError('cannot cache %s' % type(value).__name__)
+
+
+def _unpack(structure, arrays):
+    kind, content = next(iter(structure.items()))
+    if kind == 'list':
+        return [_unpack(_, arrays) for _ in content]
+    if kind == 'tuple':
+        return tuple(_unpack(_, arrays) for _ in content)
+    if kind == 'dict':
+        return {_unpackKey(key): _unpack(item, arrays) for key, item in content}
+    if kind == 'none':
+        return None
+    return arrays[content][()] if structure['scalar'] else arrays[content]
+
+
+def _packKey(key):
+    # JSON form of a dict key that loads back as an equal, hashable key
+    if isinstance(key, tuple):
+        return {'tuple': [_packKey(_) for _ in key]}
+    if isinstance(key, np.generic):
+        key = key.item()
+    if key is None or isinstance(key, (str, bool, int, float)):
+        return {type(key).__name__: key}
+    raise TypeError('cannot cache a dict with %s keys' % type(key).__name__)
+
+
+def _unpackKey(key):
+    if not isinstance(key, dict):
+        # Entries written before keys were encoded hold plain string keys
+        return key
+    kind, content = next(iter(key.items()))
+    if kind == 'tuple':
+        return tuple(_unpackKey(_) for _ in content)
+    return content
+
+
+def _describe(value):
+    # Short summary of inputs for meta.json: arrays by dtype and shape
+    if isinstance(value, np.ndarray):
+        return '%s%s' % (value.dtype, value.shape)
+    if isinstance(value, (list, tuple)):
+        return [_describe(_) for _ in value]
+    if isinstance(value, dict):
+        return {str(key): _describe(item) for key, item in value.items()}
+    return value if isinstance(value, (bool, int, float, str, type(None))) else type(value).__name__
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import sys
+import types
+import weakref
+import numpy as np
+
+_packageDirectory = os.path.dirname(os.path.abspath(__file__))
+_codeDigests = weakref.WeakKeyDictionary()
+
+
+def inputHash(*args, **kwargs):
+    """
+    Stable hex digest of arbitrary call inputs.
+
+    Arrays are hashed by dtype, shape and raw bytes (object arrays element
+    by element), containers element by element, and objects by class name
+    plus their public attributes. Functions are identified by module and
+    qualified name plus their bytecode, constants, global names and default
+    arguments. The code of the functions and classes of this package that a
+    function refers to by global name is hashed too, recursively, and so is
+    the code of every method of a package class whose instance is hashed.
+    Editing a kernel, a helper it calls or a method of the material
+    therefore changes the keys that depend on it. Bound methods are also
+    keyed by their instance (a material's parameters, say) and closures by
+    the values they captured.
+
+    Equal keys are meant to give equal results, but this is not exact:
+    code outside the package (numpy, scipy), globals reached through
+    attributes of an imported module, and state hidden in private
+    attributes are not part of the key. Clear persistent caches after
+    upgrading those. Code is hashed once per process.
+    """
+    digest = hashlib.sha1()
+    _update(digest, args)
+    _update(digest, kwargs)
+    return digest.hexdigest()
+
+
+def fileHash(path, blockSize=2**20):
+    # Digest of a file's content, for keys of stages that read input files
+    digest = hashlib.sha1()
+    with open(path, 'rb') as inputFile:
+        for block in iter(lambda: inputFile.read(blockSize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _update(digest, value):
+    if isinstance(value, np.ndarray) and value.dtype == object:
+        # The raw bytes of an object array are pointers, so hash what they point to
+        digest.update(b'objects' + str(value.shape).encode())
+        for item in value.ravel():
+            _update(digest, item)
+    elif isinstance(value, np.ndarray) or isinstance(value, np.generic):
+        value = np.ascontiguousarray(value)
+        digest.update(b'array' + value.dtype.str.encode() + str(value.shape).encode())
+        digest.update(value.tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'dict%d' % len(value))
+        for key in sorted(value, key=str):
+            _update(digest, key)
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'seq%d' % len(value))
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, frozenset):
+        digest.update(b'set%d' % len(value))
+        for item in sorted(value, key=repr):
+            _update(digest, item)
+    elif value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(type(value).__name__.encode() + repr(value).encode())
+    elif isinstance(value, types.CodeType):
+        digest.update(b'code' + value.co_code)
+        _update(digest, value.co_consts)
+        _update(digest, value.co_names)
+    elif isinstance(value, type):
+        digest.update(b'class' + str(value.__module__).encode() + value.__qualname__.encode())
+        if _isLocal(value):
+            digest.update(_codeDigest(value).encode())
+    elif callable(value) and hasattr(value, '__qualname__'):
+        digest.update(b'func' + str(getattr(value, '__module__', '')).encode() + value.__qualname__.encode())
+        function = getattr(value, '__func__', value)
+        if isinstance(function, types.FunctionType):
+            digest.update(_codeDigest(function).encode())
+        instance = getattr(value, '__self__', None)
+        if instance is not None and not isinstance(instance, (types.ModuleType, type)):
+            _update(digest, instance)
+        for cell in getattr(value, '__closure__', None) or ():
+            # Closures (e.g. the objectives of powerFactorOptimizer) also by the values they captured
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                contents = None
+            if contents is not value:
+                _update(digest, contents)
+    elif hasattr(value, '__dict__'):
+        digest.update(b'obj' + type(value).__name__.encode())
+        if _isLocal(type(value)):
+            digest.update(_codeDigest(type(value)).encode())
+        _update(digest, {key: item for key, item in vars(value).items() if not key.startswith('_')})
+    else:
+        digest.update(repr(value).encode())
+
+
+def _isLocal(value):
+    # Functions and classes defined in the modules (and scripts) of this package
+    module = sys.modules.get(getattr(value, '__module__', None))
+    path = getattr(module, '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == _packageDirectory
+
+
+def _codeDigest(value):
+    # Digest of a function's or class's code and of the package code it uses, computed once per object
+    try:
+        return _codeDigests[value]
+    except KeyError:
+        pass
+    digest = hashlib.sha1()
+    _updateCode(digest, value, set())
+    _codeDigests[value] = digest.hexdigest()
+    return _codeDigests[value]
+
+
+def _updateCode(digest, value, seen):
+    if id(value) in seen:
+        # A cycle (a method naming its own class): already in this digest
+        digest.update(b'seen' + value.__qualname__.encode())
+        return
+    seen.add(id(value))
+    if isinstance(value, type):
+        digest.update(b'class' + str(value.__module__).encode() + value.__qualname__.encode())
+        for base in value.__bases__:
+            if _isLocal(base):
+                _updateCode(digest, base, seen)
+        for name, member in sorted(vars(value).items()):
+            if isinstance(member, property):
+                functions = [member.fget, member.fset, member.fdel]
+            else:
+                functions = [getattr(member, '__func__', member)]
+            for function in functions:
+                if isinstance(function, types.FunctionType):
+                    digest.update(b'member' + name.encode())
+                    _updateCode(digest, function, seen)
+        return
+    digest.update(b'func' + str(value.__module__).encode() + value.__qualname__.encode())
+    _update(digest, value.__code__)
+    _update(digest, value.__defaults__)
+    _update(digest, value.__kwdefaults__)
+    for name in sorted(_globalNames(value.__code__)):
+        dependency = value.__globals__.get(name)
+        if isinstance(dependency, (types.FunctionType, type)) and _isLocal(dependency):
+            digest.update(b'uses' + name.encode())
+            _updateCode(digest, dependency, seen)
+
+
+def _globalNames(code):
+    # Names a code object and the functions, lambdas and comprehensions nested in it look up
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= _globalNames(constant)
+    return names
@@ -0,0 +1,43 @@
+from collections import OrderedDict
+import threading
+
+
+class lruCache:
+    """
+    Thread-safe mapping that keeps the `maxEntries` most recently used
+    values. `get` returns `default` on a miss; a hit or a `put` marks the
+    key as most recently used and a `put` past `maxEntries` evicts the
+    least recently used entry. Values are computed by the caller outside
+    the lock, so two threads missing the same key may both compute it.
+    """
+
+    def __init__(self, maxEntries):
+        self.maxEntries = maxEntries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class matthiessenAccumulator:
+    """
+    Streaming Matthiessen rule: scattering rates are added in place to one
+    buffer and inverted once at the end.
+
+    Lifetimes may have any shapes that broadcast against each other, e.g.
+    (1, nE), (nT, 1) and (nT, nE). Each one is inverted in its own shape and
+    added to the buffer without being tiled. The buffer is allocated with
+    the broadcast shape and only regrows if a later lifetime widens it. Pass
+    `shape` to preallocate it. Each rate is written into one scratch
+    buffer that is reused while the lifetimes keep the same shape. A zero
+    lifetime gives an infinite rate, an infinite lifetime gives no rate,
+    and NaN lifetimes are skipped (treated as no scattering), as are
+    lifetimes with an infinite weight. As in the rest of
+    thermoelectricProperties, points with zero total rate get a lifetime
+    of 0.
+
+    With `keepFractions`, the per-mechanism rates from `add` are kept, so
+    `fractions()` can report each mechanism's share of the total rate
+    without another pass over the lifetimes.
+    """
+
+    def __init__(self, shape=None, keepFractions=False):
+        self.rate = None if shape is None else np.zeros(shape)
+        self.keepFractions = keepFractions
+        self.rates = {}
+        self._scratch = None
+
+    def add(self, tau, weight=1., name=None):
+        # `weight` scales the lifetime (the recurring 6*tau terms), i.e. divides its rate
+        tau = np.atleast_1d(np.asarray(tau, dtype=float))
+        # Per-sample weights (e.g. (nSamples, 1, 1)) may widen the rate beyond the lifetime's own shape
+        shape = np.broadcast_shapes(tau.shape, np.shape(weight))
+        if self.rate is None:
+            rate = self.rate = np.zeros(shape)
+        else:
+            if self._scratch is None or self._scratch.shape != shape:
+                self._scratch = np.empty(shape)
+            rate = self._scratch
+            rate.fill(0)
+        scale = 1. / np.asarray(weight, dtype=float)
+        # NaN lifetimes, and mechanisms a sample leaves out (infinite weight), add no rate
+        with np.errstate(divide='ignore'):
+            np.divide(scale, tau, out=rate, where=~np.isnan(tau) & (scale != 0))
+        if self.keepFractions:
+            self.rates[len(self.rates) if name is None else name] = rate.copy()
+        if rate is self.rate:
+            return self
+        if np.broadcast_shapes(self.rate.shape, rate.shape) != self.rate.shape:
+            self.rate = self.rate + rate
+        else:
+            np.add(self.rate, rate, out=self.rate)
+        return self
+
+    def lifetime(self, out=None):
+        with np.errstate(divide='ignore'):
+            tau = np.divide(1., self.rate, out=out)
+        tau[np.isinf(tau)] = 0
+        return tau
+
+    def fractions(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {name: rate / self.rate for name, rate in self.rates.items()}
@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import threading
+import numpy as np
+from inputHash import inputHash
+from checkpointStore import checkpointStore
+
+
+def shareArray(array):
+    """
+    Copy an array into a new shared memory block.
+
+    Returns the `SharedMemory` handle (the caller owns it and must close and
+    unlink it) and a picklable (name, shape, dtype) spec that worker
+    processes pass to `attachArray`.
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attachArray(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _runSharedChunk(kernel, specs, outSpec, params, start, stop):
+    handles = []
+    arrays = {}
+    for key, spec in specs.items():
+        shm, arrays[key] = attachArray(spec)
+        handles.append(shm)
+    shm, out = attachArray(outSpec)
+    handles.append(shm)
+    try:
+        kernel(start, stop, out=out, **arrays, **params)
+    finally:
+        del arrays, out
+        for shm in handles:
+            shm.close()
+
+
+def mapChunks(kernel, numItems, out, arrays, params, chunkSize, workers=None, checkpoint=None):
+    """
+    Evaluate `kernel(start, stop, out=out, **arrays, **params)` over
+    consecutive [start, stop) blocks of `numItems` items.
+
+    Each call writes only its own block of `out`, so the result is the same
+    and in the same order however the items are split. With `workers` of
+    None or 1 the blocks run in this process. Otherwise they are spread over
+    a process pool; the large `arrays` and `out` are placed in shared memory
+    instead of being pickled, while `params` (scalars, small arrays) are sent
+    with each task. `kernel` must be a module-level function.
+
+    With a `checkpoint` directory, every finished block `out[..., start:stop]`
+    (blocks run along the last axis of `out`) is saved to a checkpointStore
+    keyed by the kernel and all its inputs. A rerun of the same computation,
+    even with another chunkSize or number of workers, restores the saved
+    blocks and computes only the missing items. The store is removed once
+    every block is done.
+    """
+    store = None
+    done = []
+    if checkpoint is not None:
+        store = checkpointStore(checkpoint, inputHash(kernel, numItems, out.shape, out.dtype.str, arrays, params), name=kernel.__name__)
+        for piece in store.pieces():
+            out[..., piece['start']:piece['stop']] = store.load(piece)
+            done.append((piece['start'], piece['stop']))
+    bounds = _missingBlocks(numItems, chunkSize, done)
+    if workers is None or workers == 1:
+        for start, stop in bounds:
+            kernel(start, stop, out=out, **arrays, **params)
+            if store is not None:
+                store.save(out[..., start:stop], start=start, stop=stop)
+        if store is not None:
+            store.remove()
+        return out
+    handles = []
+    try:
+        specs = {}
+        for key, array in arrays.items():
+            shm, specs[key] = shareArray(array)
+            handles.append(shm)
+        shm, outSpec = shareArray(out)
+        handles.append(shm)
+        shared = np.ndarray(out.shape, dtype=out.dtype, buffer=shm.buf)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_runSharedChunk, kernel, specs, outSpec, params, start, stop): (start, stop) for start, stop in bounds}
+            for future in as_completed(futures):
+                future.result()
+                if store is not None:
+                    start, stop = futures[future]
+                    store.save(shared[..., start:stop], start=start, stop=stop)
+        out[...] = shared
+        del shared
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+    if store is not None:
+        store.remove()
+    return out
+
+
+def _missingBlocks(numItems, chunkSize, done):
+    # [start, stop) blocks of at most chunkSize items covering what the finished ranges in `done` do not
+    covered = np.zeros(numItems, dtype=bool)
+    for start, stop in done:
+        covered[start:stop] = True
+    padded = np.concatenate(([True], covered, [True]))
+    change = np.flatnonzero(padded[1:] != padded[:-1])
+    bounds = []
+    for first, last in zip(change[0::2], change[1::2]):
+        bounds += [(int(start), int(min(start + chunkSize, last))) for start in range(first, last, chunkSize)]
+    return bounds
+
+
+_local = threading.local()
+
+
+def scratchBuffers(numBuffers, numRows, numCols):
+    """
+    Return `numBuffers` float64 work arrays of shape (numRows, numCols).
+
+    The storage is kept per thread and handed out again on the next call
+    with the same `numBuffers` and `numCols`, so kernels that walk a mesh in
+    blocks allocate their scratch space once instead of once per block,
+    while kernels running on the threads of a taskGraph never share it.
+    Call `releaseScratch` when the sweep is done.
+    """
+    scratch = _scratch()
+    buffers = scratch.get((numBuffers, numCols))
+    if buffers is None or buffers.shape[1] < numRows:
+        buffers = np.empty((numBuffers, numRows, numCols))
+        scratch[(numBuffers, numCols)] = buffers
+    return buffers[:, :numRows]
+
+
+def releaseScratch():
+    _scratch().clear()
+
+
+def _scratch():
+    if not hasattr(_local, 'buffers'):
+        _local.buffers = {}
+    return _local.buffers
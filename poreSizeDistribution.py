@@ -0,0 +1,37 @@
+import numpy as np
+
+
+class poreSizeDistribution:
+    """
+    Discrete quadrature of a pore size distribution.
+
+    `radii` (m) are the quadrature nodes and `numberFraction` the fraction of
+    pores at each node; it is normalized to one. Pass an instance as `ro` to
+    `tau2D_cylinder` or `tau3D_spherical` to get the ensemble-averaged
+    lifetime of a polydisperse sample at the given total volume fraction.
+    """
+
+    def __init__(self, radii, numberFraction):
+        self.radii = np.asarray(radii, dtype=float)
+        self.numberFraction = np.asarray(numberFraction, dtype=float) / np.sum(numberFraction)
+
+    @classmethod
+    def lognormal(cls, median, sigma, numRadii=12):
+        # Gauss-Hermite quadrature in ln(r); exact for polynomials in ln(r) up to degree 2*numRadii-1
+        x, w = np.polynomial.hermite.hermgauss(numRadii)
+        return cls(median * np.exp(np.sqrt(2) * sigma * x), w / np.sqrt(np.pi))
+
+    @classmethod
+    def histogram(cls, binEdges, counts):
+        binEdges = np.asarray(binEdges, dtype=float)
+        return cls((binEdges[1:] + binEdges[:-1]) / 2, counts)
+
+    def volumeFraction(self, dimension):
+        # Share of the pore volume held by each radius: r^3 for spheres, r^2 (cross section) for cylinders
+        v = self.numberFraction * self.radii**dimension
+        return v / np.sum(v)
+
+    def ensembleRate(self, rate, dimension):
+        # Each row of `rate` is the rate when the whole volume fraction is in pores of one radius,
+        # so the ensemble rate is their volume-weighted sum
+        return np.tensordot(self.volumeFraction(dimension), rate, axes=1)[None]
@@ -0,0 +1,116 @@
+import numpy as np
+from scipy.optimize import minimize, minimize_scalar
+
+
+def maximize(objective, bounds, batchSize=16, maxEvaluations=400, tolerance=1e-4, seed=0, polish=True):
+    """
+    Bounded, gradient-free maximization of a batched objective.
+
+    `objective` maps an (nBatch, nDim) array of candidate points to nBatch
+    values (PF, ZT, ...), so every call is one vectorized evaluation.
+    `bounds` is a list of [lower, upper] per dimension. The search runs
+    in the unit box, and `tolerance` is measured there.
+
+    In 1-D the bracket around the best point of each batch of `batchSize`
+    evenly spaced points is zoomed, then bounded Brent polishes the final
+    bracket. In N-D each batch samples a Gaussian fitted to the elite
+    points so far (a CMA-style cross-entropy search), plus the maximizer of
+    a quadratic surrogate fitted around the incumbent. Bounded Nelder-Mead
+    then polishes the result. Non-finite objective values count as
+    infeasible.
+
+    Returns [x, value, trace, evaluations], where `trace` holds the best
+    value after each objective call and `evaluations` counts the points
+    evaluated.
+    """
+    bounds = np.atleast_2d(np.asarray(bounds, dtype=float))
+    lower, span = bounds[:, 0], bounds[:, 1] - bounds[:, 0]
+    numDims = len(bounds)
+    history = {'points': [], 'values': [], 'trace': [], 'evaluations': 0}
+
+    def evaluate(u):
+        u = np.clip(np.atleast_2d(u), 0, 1)
+        values = np.asarray(objective(lower + u * span), dtype=float).ravel()
+        values = np.where(np.isfinite(values), values, -np.inf)
+        history['points'].append(u)
+        history['values'].append(values)
+        history['evaluations'] += len(u)
+        history['trace'].append(max(np.max(values), history['trace'][-1] if history['trace'] else -np.inf))
+        return values
+
+    def budget():
+        return maxEvaluations - history['evaluations']
+
+    if numDims == 1:
+        lo, hi = 0., 1.
+        while hi - lo > tolerance and budget() >= batchSize:
+            u = np.linspace(lo, hi, batchSize)
+            best = np.argmax(evaluate(u[:, None]))
+            lo, hi = u[max(best - 1, 0)], u[min(best + 1, batchSize - 1)]
+        if polish and budget() > 0 and hi > lo:
+            minimize_scalar(lambda t: -evaluate([[t]])[0], bounds=(lo, hi), method='bounded', options={'xatol': tolerance, 'maxiter': budget()})
+    else:
+        rng = np.random.default_rng(seed)
+        numElite = max(2, batchSize // 4)
+        # Latin hypercube start
+        u = (np.argsort(rng.random((numDims, batchSize)), axis=1).T + rng.random((batchSize, numDims))) / batchSize
+        evaluate(u)
+        cov = np.eye(numDims) / 16
+        while budget() >= batchSize:
+            points = np.concatenate(history['points'])
+            values = np.concatenate(history['values'])
+            elite = points[np.argsort(values)[::-1][:numElite]]
+            mean = elite[0]
+            if np.max(np.ptp(elite, axis=0)) < tolerance:
+                break
+            cov = 0.5 * cov + 0.5 * (np.cov(elite.T) + 1e-12 * np.eye(numDims))
+            candidates = rng.multivariate_normal(mean, cov, batchSize - 1)
+            evaluate(np.vstack((candidates, _surrogateMaximum(points, values, mean))))
+        if polish and budget() > 0:
+            points = np.concatenate(history['points'])
+            start = points[np.argmax(np.concatenate(history['values']))]
+            minimize(lambda v: -evaluate(v)[0], start, method='Nelder-Mead', bounds=[(0, 1)] * numDims, options={'xatol': tolerance, 'fatol': 0, 'maxfev': budget()})
+    points = np.concatenate(history['points'])
+    values = np.concatenate(history['values'])
+    best = np.argmax(values)
+    return [lower + points[best] * span, values[best], np.array(history['trace']), history['evaluations']]
+
+
+def _surrogateMaximum(points, values, center):
+    # Least-squares quadratic through the points nearest the incumbent; its stationary point if it is a maximum
+    numDims = points.shape[1]
+    upper = np.triu_indices(numDims)
+    numFeatures = 1 + numDims + len(upper[0])
+    feasible = np.isfinite(values)
+    points, values = points[feasible], values[feasible]
+    if len(points) < 2 * numFeatures:
+        return center
+    nearest = np.argsort(np.sum((points - center)**2, axis=1))[:2 * numFeatures]
+    d = points[nearest] - center
+    features = np.hstack((np.ones((len(d), 1)), d, (d[:, :, None] * d[:, None, :])[:, upper[0], upper[1]]))
+    coefficients = np.linalg.lstsq(features, values[nearest], rcond=None)[0]
+    hessian = np.zeros((numDims, numDims))
+    hessian[upper] = coefficients[1 + numDims:]
+    hessian = hessian + hessian.T
+    if np.any(np.linalg.eigvalsh(hessian) >= 0):
+        return center
+    return np.clip(center - np.linalg.solve(hessian, coefficients[1:1 + numDims]), 0, 1)
+
+
+def filteringObjective(material, E, DoS, vg, Ef, dfdE, Temp, tau_b, ideal=False, carrierConcentration=None, quantity='PF'):
+    # Batched objective for maximize over the filtering parameters. Columns are U (eV), then log10(tauo) (s)
+    # unless ideal, then log10 of the carrier concentration if `carrierConcentration` lists the concentrations
+    # along the last (temperature) axis of Ef, dfdE, Temp and tau_b (as in Ideal_filtering_Si.py). Without it the
+    # objective is the mean over that axis, and over the samples when they are stacked
+    index = ['Sigma', 'S', 'PF'].index(quantity)
+
+    def objective(points):
+        if ideal:
+            value = material.filteringEffect(U=points[:, 0], E=E, DoS=DoS, vg=vg, Ef=Ef, dfdE=dfdE, Temp=Temp, tau_b=tau_b)[index]
+        else:
+            value = material.filteringEffect(U=points[:, 0], tauo=10**points[:, 1], E=E, DoS=DoS, vg=vg, Ef=Ef, dfdE=dfdE, Temp=Temp, tau_b=tau_b, paired=True)[index]
+        if carrierConcentration is None:
+            return np.mean(np.reshape(value, (len(points), -1)), axis=1)
+        logN = np.log10(np.ravel(carrierConcentration))
+        return np.array([np.interp(point[-1], logN, row) for point, row in zip(points, value)])
+    return objective
@@ -0,0 +1,76 @@
+import numpy as np
+from inputHash import inputHash
+from lruCache import lruCache
+
+
+class scatteringRegistry:
+    """
+    Named, lazily evaluated scattering mechanisms with memoized lifetimes.
+
+    Each mechanism is a `thermoelectricProperties` method name (or any
+    callable) plus its keyword inputs. Nothing runs until the lifetime is
+    requested. The result is then cached under a hash of the method, its
+    inputs and the material parameters, so a mechanism registered again
+    for another sample with identical inputs (the phonon lifetime, say)
+    is served from the cache. Total lifetimes come from `compose`, which
+    takes a Matthiessen expression such as
+    "6*tau_p_npb + 6*tau_ion + tau_np", where `+` adds scattering rates
+    and a numeric prefactor scales a lifetime. The cache keeps the
+    `maxEntries` most recently used lifetimes.
+    """
+
+    def __init__(self, material, maxEntries=64):
+        self.material = material
+        self._mechanisms = {}
+        self._cache = lruCache(maxEntries)
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name, method, output=None, **inputs):
+        # `output` picks one entry of methods that return several lifetimes, e.g. output=1 for the
+        # nonparabolic lifetime of tau_p
+        self._mechanisms[name] = (method, output, inputs)
+        return self
+
+    def key(self, name):
+        method, output, inputs = self._mechanisms[name]
+        return inputHash(method, output, inputs, self.material)
+
+    def _cached(self, key, evaluate):
+        value = self._cache.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return self._cache.put(key, evaluate())
+
+    def __getitem__(self, name):
+        method, output, inputs = self._mechanisms[name]
+        function = getattr(self.material, method) if isinstance(method, str) else method
+
+        def evaluate():
+            tau = function(**inputs)
+            return tau if output is None else tau[output]
+        return self._cached(self.key(name), evaluate)
+
+    @staticmethod
+    def terms(expression):
+        terms = []
+        for term in expression.split('+'):
+            factors = [_.strip() for _ in term.split('*')]
+            weight = np.prod([float(_) for _ in factors[:-1]]) if len(factors) > 1 else 1.
+            terms.append((weight, factors[-1]))
+        return terms
+
+    def compose(self, expression):
+        terms = self.terms(expression)
+        key = inputHash('matthiessen', [(weight, self.key(name)) for weight, name in terms])
+        return self._cached(key, lambda: self.material.matthiessen(*[self[name] for weight, name in terms], weights=[weight for weight, name in terms]))
+
+    def statistics(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache)}
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
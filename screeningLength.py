@@ -0,0 +1,63 @@
+import numpy as np
+from scipy.special import expit, gamma
+from inputHash import inputHash
+from lruCache import lruCache
+from thermoelectricProperties import thermoelectricProperties
+
+maxEntries = 32
+_effectiveDoS = lruCache(maxEntries)
+
+
+def fermiIntegral(j, eta, numNodes=96):
+    """
+    Normalized complete Fermi-Dirac integral
+    F_j(eta) = 1/Gamma(j+1) int_0^inf x^j / (1 + exp(x - eta)) dx, for j > -1.
+
+    The substitution x = t^2 makes the integrand smooth for j = -1/2, and
+    Gauss-Legendre panels on [0, sqrt(eta)] and [sqrt(eta), sqrt(eta + 60)]
+    resolve the Fermi edge. `eta` may have any shape.
+    """
+    eta = np.asarray(eta, dtype=float)[..., None]
+    node, weight = np.polynomial.legendre.leggauss(numNodes)
+    node = (node + 1) / 2
+    weight = weight / 2
+    t_edge = np.sqrt(np.maximum(eta, 0))
+    t_max = np.sqrt(np.maximum(eta, 0) + 60)
+    value = 0
+    for t_lo, t_hi in ((0, t_edge), (t_edge, t_max)):
+        t = t_lo + (t_hi - t_lo) * node
+        value = value + np.sum((t_hi - t_lo) * weight * 2 * t**(2 * j + 1) * expit(eta - t**2), axis=-1)
+    return value / gamma(j + 1)
+
+
+def effectiveDoS(bandMass, alpha, Temp):
+    # Nc(T) with the nonparabolic conduction band mass m_c(T) = m*(1+5 alpha kB T), cached for the maxEntries most
+    # recently used inputs
+    key = inputHash(bandMass, alpha, Temp)
+    Nc = _effectiveDoS.get(key)
+    if Nc is not None:
+        return Nc
+    m_CB = bandMass * (1 + 5 * alpha * thermoelectricProperties.kB * Temp)
+    Nc = 2 * (m_CB * thermoelectricProperties.kB * Temp / thermoelectricProperties.hBar**2 / 2 / np.pi / thermoelectricProperties.e2C)**(3 / 2)
+    return _effectiveDoS.put(key, Nc)
+
+
+def screeningLength(carrierConcentration, fermiLevel, Temp, alpha, bandMass, dielectric):
+    """
+    Nondegenerate (Debye) and degenerate screening lengths of many samples
+    in one evaluation.
+
+    Every input broadcasts against the others. Stack the samples on the
+    first axis, e.g. carrier concentrations (1/m^3) and Fermi levels (eV,
+    from the band edge) of shape (nSamples, nT), with `Temp` of shape (1, nT).
+    Returns [LD_nondegenerate, LD_degenerate], each usable as `LD` in the
+    Coulomb lifetime methods.
+    """
+    kB = thermoelectricProperties.kB
+    e0 = thermoelectricProperties.e0
+    e2C = thermoelectricProperties.e2C
+    LD_nondegenerate = np.sqrt(4 * np.pi * dielectric * e0 * kB / e2C * Temp / carrierConcentration)
+    eta = fermiLevel / kB / Temp
+    Nc = effectiveDoS(bandMass, alpha, Temp)
+    LD_degenerate = np.sqrt(1 / (Nc / dielectric / e0 / kB / Temp * e2C * (fermiIntegral(-1 / 2, eta) + 15 * alpha * kB * Temp / 4 * fermiIntegral(1 / 2, eta))))
+    return [LD_nondegenerate, LD_degenerate]
@@ -0,0 +1,76 @@
+import numpy as np
+from os.path import expanduser
+
+
+class structureFactor:
+    """
+    Orientation-averaged structure factor S(q) of pore centres in a periodic
+    box of side `boxLength` (m).
+
+    `positions` is an (N, 3) array of sphere centres, or (N, 2) for the
+    axes of cylinders along z. The centres are deposited on a `gridSize`^d
+    mesh with cloud-in-cell weights, in chunks of `chunkSize` pores. One FFT
+    of that density then gives S(k) = |rho(k)|^2 / N, corrected for the CIC
+    window and its aliased shot noise. S(k) is averaged over shells of width
+    2pi/boxLength. `factor(q)` interpolates the shells and returns 1 beyond
+    the mesh Nyquist limit, where the arrangement looks uncorrelated. Use a
+    box with the same pore number density as the vfrac and radius passed to
+    the lifetime methods.
+    """
+
+    def __init__(self, positions, boxLength, gridSize=128, chunkSize=2**18):
+        positions = np.asarray(positions, dtype=float)
+        self.dimension = positions.shape[1]
+        self.boxLength = boxLength
+        self.numPores = len(positions)
+        n = gridSize
+        density = np.zeros(n**self.dimension)
+        strides = n**np.arange(self.dimension)[::-1]
+        for start in range(0, self.numPores, chunkSize):
+            x = np.mod(positions[start:start + chunkSize], boxLength) / boxLength * n
+            cell = np.floor(x).astype(np.intp)
+            frac = x - cell
+            for corner in np.ndindex(*(2,) * self.dimension):
+                corner = np.array(corner)
+                weight = np.prod(np.where(corner, frac, 1 - frac), axis=1)
+                index = np.mod(cell + corner, n) @ strides
+                density += np.bincount(index, weights=weight, minlength=len(density))
+        rho = np.fft.rfftn(density.reshape((n,) * self.dimension))
+        k_axes = [2 * np.pi * np.fft.fftfreq(n, d=boxLength / n)] * (self.dimension - 1) + [2 * np.pi * np.fft.rfftfreq(n, d=boxLength / n)]
+        k = np.meshgrid(*k_axes, indexing='ij', sparse=True)
+        window = 1.
+        shot = 1.                                                  # aliased CIC shot noise (Jing 2005)
+        for _ in k:
+            window = window * np.sinc(_ * boxLength / n / 2 / np.pi)**2
+            shot = shot * (1 - 2 / 3 * np.sin(_ * boxLength / n / 2)**2)
+        S = (np.abs(rho)**2 / self.numPores - shot) / window**2 + 1
+        k_mag = np.sqrt(sum(_**2 for _ in k))
+        shell = np.rint(k_mag / (2 * np.pi / boxLength)).astype(np.intp).ravel()
+        nyquist = n // 2
+        keep = (shell > 0) & (shell <= nyquist)
+        counts = np.bincount(shell[keep], minlength=nyquist + 1)[1:]
+        S_shell = np.bincount(shell[keep], weights=S.ravel()[keep], minlength=nyquist + 1)[1:]
+        filled = counts > 0
+        self.q = 2 * np.pi / boxLength * np.arange(1, nyquist + 1)[filled]
+        self.S = S_shell[filled] / counts[filled]
+
+    @classmethod
+    def fromFile(cls, path2positions, boxLength, **kwargs):
+        return cls(np.loadtxt(expanduser(path2positions), ndmin=2), boxLength, **kwargs)
+
+    @classmethod
+    def random(cls, numPores, boxLength, dimension=3, seed=0, **kwargs):
+        return cls(np.random.default_rng(seed).uniform(0, boxLength, (numPores, dimension)), boxLength, **kwargs)
+
+    @classmethod
+    def jitteredLattice(cls, numPerSide, boxLength, jitter, dimension=3, seed=0, **kwargs):
+        # Simple cubic (square for cylinders) lattice with Gaussian displacements of rms `jitter` (m)
+        site = np.stack(np.meshgrid(*[np.arange(numPerSide)] * dimension, indexing='ij'), axis=-1).reshape(-1, dimension)
+        positions = (site + 0.5) * boxLength / numPerSide + np.random.default_rng(seed).normal(0, jitter, site.shape)
+        return cls(positions, boxLength, **kwargs)
+
+    def table(self):
+        return [self.q, self.S]
+
+    def factor(self, q):
+        return np.interp(q, self.q, self.S, left=self.S[0], right=1)
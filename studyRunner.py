@@ -0,0 +1,364 @@
+import json
+from os.path import expanduser
+import numpy as np
+from numpy.linalg import norm
+from thermoelectricProperties import thermoelectricProperties
+from scatteringRegistry import scatteringRegistry
+from screeningLength import screeningLength
+from taskGraph import taskGraph
+from inputHash import inputHash, fileHash
+
+
+class study:
+    """
+    Declarative pipeline for a material and a list of samples.
+
+    The description is a dict (or a TOML, YAML or JSON file read by
+    `fromFile`) with the keys
+
+        material             thermoelectricProperties arguments, with
+                             electronEffectiveMass in units of me
+        temperature          arguments of temp, e.g. {TempMin, TempMax, dT}
+        bandGap              {Eg_o, Ao, Bo}
+        nonparabolicity      alpha (1/eV)
+        bandMass             conduction band mass at T = 0 (units of me)
+        carrierConcentration {Ao, Bo} of carrierConcentration and fermiLevel
+        DoS                  an array, {analytical: nonparabolic|parabolic}
+                             or the electronDoS arguments plus an optional
+                             `scale` (e.g. 1 + porosity)
+        groupVelocity        an array or {path2eigenval, skipLines, band,
+                             window}, sliced as in Si.py; the EIGENVAL
+                             read is kept as the bandStructure stage
+        phonon               {Dv, DA, vs, rho} of tau_p
+        lifetime             default Matthiessen expression, e.g.
+                             "6*tau_p_npb + 6*tau_ion + tau_np"
+        samples              list of {label,
+                             path2extrinsicCarrierConcentration, lifetime}
+
+    The samples are stacked along a leading axis, so every stage (Fermi
+    level, distribution, screening length, lifetimes, transport
+    coefficients) runs once for the whole batch. The lifetime expressions
+    (parsed as in scatteringRegistry) may use tau_p_pb, tau_p_npb, tau_ion
+    (strongly screened), tau_Screened_Coulomb and tau_Unscreened_Coulomb,
+    plus the lifetimes passed in `mechanisms`: fixed arrays of the energy
+    (e.g. tau_np) or functions of (energyRange, Temp, alpha) such as
+    alloyMaterial.tau_alloy. Pass `material` to reuse an existing
+    thermoelectricProperties instance.
+
+    Each stage is a node of a taskGraph, so stages shared by all samples
+    run once, independent ones run concurrently, and a second `run` (or
+    another study sharing `graph`) reuses every unchanged stage. Stages
+    that read files are keyed by the file content. Give the graph a
+    diskCache store to keep the stages across processes.
+
+    Every stage is elementwise in temperature and in the sample, so `run`
+    only computes what a previous result lacks. A result is matched by
+    `signature()`, which covers everything but the temperature grid and
+    the samples (a sample counts by its file content and lifetime, not its
+    label). Temperatures missing from it are computed for the samples it
+    has, new samples over the whole grid, and the pieces are merged into
+    arrays for the requested grid. The previous result is the last one of
+    this study, the one passed as `previous`, or the one kept in the
+    graph's store, so extending the grid of a script costs only the new
+    points.
+    """
+
+    def __init__(self, description, material=None, mechanisms=None, graph=None):
+        _checkLifetimes(description)
+        self.description = description
+        if material is None:
+            parameters = dict(description['material'])
+            parameters['electronEffectiveMass'] = parameters['electronEffectiveMass'] * thermoelectricProperties.me
+            material = thermoelectricProperties(**parameters)
+        self.material = material
+        self.mechanisms = {} if mechanisms is None else mechanisms
+        self.labels = [sample['label'] for sample in description['samples']]
+        self.graph = taskGraph() if graph is None else graph
+        self._last = None
+
+    @classmethod
+    def fromFile(cls, path, material=None, mechanisms=None, graph=None):
+        if path.endswith('.toml'):
+            try:
+                import tomllib
+            except ImportError:
+                import tomli as tomllib
+            with open(path, 'rb') as descriptionFile:
+                description = tomllib.load(descriptionFile)
+        elif path.endswith(('.yaml', '.yml')):
+            import yaml
+            with open(path) as descriptionFile:
+                description = yaml.safe_load(descriptionFile)
+        else:
+            with open(path) as descriptionFile:
+                description = json.load(descriptionFile)
+        return cls(description, material=material, mechanisms=mechanisms, graph=graph)
+
+    def signature(self):
+        # Key of everything but the temperature grid and the sample list; results with the same signature can be merged
+        description = {key: value for key, value in self.description.items() if key not in ('temperature', 'samples')}
+        return inputHash('study', description, self.material, self.mechanisms, _fileDigest(description['DoS'], 'path2DoS'), _fileDigest(description['groupVelocity'], 'path2eigenval'))
+
+    def sampleId(self, sample):
+        return inputHash({key: value for key, value in sample.items() if key != 'label'}, _fileDigest(sample, 'path2extrinsicCarrierConcentration'))
+
+    def run(self, previous=None):
+        description = self.description
+        _checkLifetimes(description)
+        samples = description['samples']
+        self.labels = [sample['label'] for sample in samples]
+        Temp = self.material.temp(**description.get('temperature', {}))
+        signature = self.signature()
+        sampleIds = [self.sampleId(sample) for sample in samples]
+        if previous is None:
+            previous = self._previous(signature)
+        names = list(self._stages(Temp, samples))
+        allRows, allColumns = np.arange(len(samples)), np.arange(Temp.shape[1])
+
+        # Pieces are (arrays, rows and columns in this run, rows and columns in the arrays)
+        if previous is None or previous.signature != signature or not set(names) <= set(previous):
+            pieces = [(self._evaluate(Temp, samples), allRows, allColumns, allRows, allColumns)]
+            newRows, newColumns = allRows, allColumns
+        else:
+            oldRows = {sampleId: index for index, sampleId in enumerate(previous.sampleIds)}
+            oldColumns = {value: index for index, value in enumerate(previous['temperature'][0])}
+            known = np.array([sampleId in oldRows for sampleId in sampleIds], dtype=bool)
+            seen = np.array([value in oldColumns for value in Temp[0]], dtype=bool)
+            keptRows, newRows = allRows[known], allRows[~known]
+            keptColumns, newColumns = allColumns[seen], allColumns[~seen]
+            pieces = [(previous, keptRows, keptColumns, [oldRows[sampleIds[_]] for _ in keptRows], [oldColumns[Temp[0, _]] for _ in keptColumns])]
+            if len(keptRows) and len(newColumns):
+                # Known samples at the new temperatures only
+                pieces.append((self._evaluate(Temp[:, newColumns], [samples[_] for _ in keptRows]), keptRows, newColumns, np.arange(len(keptRows)), np.arange(len(newColumns))))
+            if len(newRows):
+                # New samples over the whole grid
+                pieces.append((self._evaluate(Temp, [samples[_] for _ in newRows]), newRows, allColumns, np.arange(len(newRows)), allColumns))
+
+        mechanisms = (['tau_p_pb', 'tau_p_npb'] if 'phonon' in description else []) + studyResult.sampleMechanisms + list(self.mechanisms)
+        result = studyResult(self.labels, mechanisms, signature=signature, sampleIds=sampleIds)
+        result.update(_merge(pieces, len(samples), Temp.shape[1], *self._layout()))
+        result.computed = {'temperature': Temp[0, newColumns], 'samples': [self.labels[_] for _ in newRows]}
+        self._last = result
+        if len(pieces) > 1 or pieces[0][0] is not previous:
+            self._save(result)
+        return result
+
+    def _evaluate(self, Temp, samples):
+        stages = self._stages(Temp, samples)
+        values = dict(zip(stages, self.graph.evaluate(*stages.values())))
+        for key in ['fermiDistribution', 'dfdE'] + studyResult.sampleMechanisms:
+            # These methods return one sample unstacked, as (nT, nE)
+            values[key] = np.reshape(values[key], (len(samples),) + np.shape(values[key])[-2:])
+        return values
+
+    def _stages(self, Temp, samples):
+        description = self.description
+        material = self.material
+        node = self.graph.node
+        bandMass = description['bandMass'] * thermoelectricProperties.me
+
+        T = node('temperature', _constant, Temp)
+        e = node('energy', material.energyRange)
+        Eg = node('bandGap', material.bandGap, Temp=T, **description['bandGap'])
+        alpha = node('nonparabolicity', _nonparabolicity, description.get('nonparabolicity', 0), T)
+        m_CB = node('conductionBandMass', _conductionBandMass, bandMass, alpha, T)
+        DoS = node('DoS', _DoS, material, description['DoS'], e, alpha, _fileDigest(description['DoS'], 'path2DoS'))
+        bands = node('bandStructure', _bandStructure, material, description['groupVelocity'], _fileDigest(description['groupVelocity'], 'path2eigenval'))
+        vg = node('groupVelocity', _groupVelocity, material, description['groupVelocity'], e, bands)
+
+        # Every stage below carries the samples on the leading axis
+        Ao, Bo = description['carrierConcentration']['Ao'], description['carrierConcentration']['Bo']
+        cc = node('carrierConcentration', np.vstack, [node('carrierConcentration[%s]' % sample['label'], _readFile, material.carrierConcentration, _fileDigest(sample, 'path2extrinsicCarrierConcentration'), path2extrinsicCarrierConcentration=sample['path2extrinsicCarrierConcentration'], bandGap=Eg, Ao=Ao, Bo=Bo, Temp=T) for sample in samples])
+        JD_f = node('fermiLevel', material.fermiLevel, carrierConcentration=cc, energyRange=e, DoS=DoS, Ao=Ao, Temp=T)[0]
+        selfConsistent = node('selfConsistentFermiLevel', material.selfConsistentFermiLevel, carrierConcentration=cc, Temp=T, energyRange=e, DoS=DoS, fermilevel=JD_f)
+        Ef, n = selfConsistent[0], selfConsistent[1]
+        distribution = node('fermiDistribution', material.fermiDistribution, energyRange=e, fermiLevel=Ef, Temp=T)
+        screening = node('screeningLength', screeningLength, carrierConcentration=n, fermiLevel=Ef, Temp=T, alpha=alpha, bandMass=bandMass, dielectric=material.dielectric)
+
+        mechanisms = {}
+        if 'phonon' in description:
+            tau_p = node('tau_p', material.tau_p, energyRange=e, alpha=alpha, T=T, D=DoS, **description['phonon'])
+            mechanisms.update(tau_p_pb=tau_p[0], tau_p_npb=tau_p[1])
+        mechanisms['tau_ion'] = node('tau_ion', material.tau_Strongly_Screened_Coulomb, D=DoS, LD=screening[1], N=n)
+        mechanisms['tau_Screened_Coulomb'] = node('tau_Screened_Coulomb', material.tau_Screened_Coulomb, energyRange=e, m_c=m_CB, LD=screening[1], N=n)
+        mechanisms['tau_Unscreened_Coulomb'] = node('tau_Unscreened_Coulomb', material.tau_Unscreened_Coulomb, energyRange=e, m_c=m_CB, N=n)
+        for name, tau in self.mechanisms.items():
+            mechanisms[name] = node(name, _lifetime, tau, e, T, alpha) if callable(tau) else node(name, _constant, tau)
+
+        # One Matthiessen sum for all samples: a mechanism a sample does not use gets an infinite weight (no rate)
+        weights = {}
+        for index, sample in enumerate(samples):
+            for weight, name in scatteringRegistry.terms(sample.get('lifetime', description.get('lifetime'))):
+                weights.setdefault(name, np.full(len(samples), np.inf))[index] = weight
+        tau = node('lifetime', material.matthiessen, *[mechanisms[name] for name in weights], weights=[weight[:, None, None] for weight in weights.values()])
+        coefficients = node('electricalProperties', material.electricalProperties, E=e, DoS=DoS, vg=vg, Ef=Ef, dfdE=distribution[1], Temp=T, tau=tau)
+
+        stages = {'temperature': T, 'energy': e, 'bandGap': Eg, 'nonparabolicity': alpha, 'conductionBandMass': m_CB, 'DoS': DoS, 'bandStructure': bands, 'groupVelocity': vg,
+                  'carrierConcentration': cc, 'JoyceDixonFermiLevel': JD_f, 'fermiLevel': Ef, 'selfConsistentCarrierConcentration': n,
+                  'fermiDistribution': distribution[0], 'dfdE': distribution[1], 'LD_nondegenerate': screening[0], 'LD': screening[1], 'lifetime': tau}
+        stages.update((name, coefficients[index]) for index, name in enumerate(studyResult.coefficientNames))
+        # Every mechanism is a stage too, so lifetime(name) reads merged arrays instead of rerunning the pipeline
+        stages.update(mechanisms)
+        return stages
+
+    def _layout(self):
+        # Axis of the temperature grid in each stage that has one, and the stages with the samples on their leading axis
+        axes = dict(studyResult.temperatureAxes)
+        if isinstance(self.description['DoS'], dict) and self.description['DoS'].get('analytical') == 'nonparabolic':
+            # The nonparabolic DoS follows alpha(T), one row per temperature
+            axes['DoS'] = 0
+        if 'phonon' in self.description:
+            axes.update(tau_p_pb=-2, tau_p_npb=-2)
+        axes.update((name, -2) for name, tau in self.mechanisms.items() if callable(tau))
+        return axes, studyResult.sampleKeys + studyResult.sampleMechanisms
+
+    def _storeKey(self, signature):
+        return inputHash('studyResult', signature)
+
+    def _previous(self, signature):
+        # The last result of this study, or the one kept in the graph's store by an earlier process
+        if self._last is not None and self._last.signature == signature:
+            return self._last
+        if self.graph.store is None:
+            return None
+        try:
+            stored = self.graph.store.load(self._storeKey(signature))
+        except KeyError:
+            return None
+        previous = studyResult([str(_) for _ in stored['labels']], {}, signature=signature, sampleIds=[str(_) for _ in stored['sampleIds']])
+        previous.update(stored['arrays'])
+        return previous
+
+    def _save(self, result):
+        if self.graph.store is None:
+            return
+        key = self._storeKey(result.signature)
+        self.graph.store.remove(key)
+        self.graph.store.save(key, {'labels': np.array(result.labels), 'sampleIds': np.array(result.sampleIds), 'arrays': dict(result)}, name='studyResult')
+
+
+class studyResult(dict):
+    """
+    Outputs of `study.run`, keyed by stage. Entries that depend on the
+    sample have the samples on their leading axis, in the order of
+    `labels`. `sample(label)` slices one sample back to the shapes of the
+    single-sample methods, `coefficients(label)` rebuilds the
+    electricalProperties list, and `lifetime(name)` gives the lifetime of
+    one mechanism (samples first for the Coulomb ones). `computed` lists
+    the temperatures and samples the run that produced it had to compute.
+    """
+
+    coefficientNames = ['Sigma', 'S', 'PF', 'ke', 'delta_1', 'delta_2', 'Lorenz']
+    sampleKeys = ['carrierConcentration', 'JoyceDixonFermiLevel', 'fermiLevel', 'selfConsistentCarrierConcentration', 'fermiDistribution', 'dfdE', 'LD_nondegenerate', 'LD', 'lifetime'] + coefficientNames
+    sampleMechanisms = ['tau_ion', 'tau_Screened_Coulomb', 'tau_Unscreened_Coulomb']
+    # Axis of the temperature grid in the entries that depend on it
+    temperatureAxes = dict.fromkeys(['temperature', 'bandGap', 'nonparabolicity', 'conductionBandMass'] + sampleKeys + sampleMechanisms, 1)
+
+    def __init__(self, labels, mechanisms, signature=None, sampleIds=None):
+        super().__init__()
+        self.labels = list(labels)
+        self.mechanisms = mechanisms
+        self.signature = signature
+        self.sampleIds = sampleIds
+        self.computed = None
+
+    def sample(self, label):
+        # (nSamples, nT) entries keep a (1, nT) row; (nSamples, nT, nE) entries become (nT, nE)
+        index = self.labels.index(label)
+        return {key: self[key][index:index + 1] if key not in self.coefficientNames and np.ndim(self[key]) == 2 else self[key][index] for key in self.sampleKeys}
+
+    def coefficients(self, label):
+        index = self.labels.index(label)
+        return [self[key][index] for key in self.coefficientNames]
+
+    def lifetime(self, name):
+        if name not in self.mechanisms:
+            raise KeyError(name)
+        return self[name]
+
+
+def _checkLifetimes(description):
+    for sample in description['samples']:
+        if sample.get('lifetime', description.get('lifetime')) is None:
+            raise ValueError("Sample '%s' has no lifetime and the study sets no default one" % sample['label'])
+
+
+def _nonparabolicity(alpha, Temp):
+    return alpha * np.ones_like(Temp, dtype=float)
+
+
+def _conductionBandMass(bandMass, alpha, Temp):
+    return bandMass * (1 + 5 * alpha * thermoelectricProperties.kB * Temp)
+
+
+def _fileDigest(recipe, key):
+    # Content hash of the input file a stage reads, so its node key changes with the file and not only with the path
+    return fileHash(expanduser(recipe[key])) if isinstance(recipe, dict) and key in recipe else None
+
+
+def _readFile(function, digest, **kwargs):
+    return function(**kwargs)
+
+
+def _DoS(material, recipe, energyRange, alpha, digest=None):
+    if not isinstance(recipe, dict):
+        return np.asarray(recipe, dtype=float)
+    if 'analytical' in recipe:
+        return material.analyticalDoS(energyRange=energyRange, alpha=alpha)[['nonparabolic', 'parabolic'].index(recipe['analytical'])]
+    parameters = {key: value for key, value in recipe.items() if key != 'scale'}
+    return recipe.get('scale', 1) * material.electronDoS(energyRange=energyRange, **parameters)
+
+
+def _bandStructure(material, recipe, digest=None):
+    # [kpoints, dispersion] read from EIGENVAL, or None when the group velocity is given as an array
+    if not isinstance(recipe, dict):
+        return None
+    return material.electronBandStructure(path2eigenval=recipe['path2eigenval'], skipLines=recipe['skipLines'])
+
+
+def _groupVelocity(material, recipe, energyRange, bandStructure):
+    if not isinstance(recipe, dict):
+        return np.asarray(recipe, dtype=float)
+    band, (start, stop) = recipe.get('band', 4), recipe.get('window', (400, 600))
+    kp, dispersion = bandStructure
+    # Reciprocal lattice rows as Si.py and SiGe.py build them
+    Lv = np.array([[1, 1, 0], [0, 1, 1], [1, 0, 1]]) * material.latticeParameter / 2
+    b_rp = np.cross(Lv[2], Lv[0]) / np.dot(Lv[1], np.cross(Lv[2], Lv[0]))
+    c_rp = np.cross(Lv[0], Lv[1]) / np.dot(Lv[2], np.cross(Lv[0], Lv[1]))
+    kp_mag = norm(2 * np.pi * np.matmul(kp, np.array([c_rp, b_rp, c_rp])), axis=1)
+    min_band = np.argmin(dispersion[start:stop, band], axis=0)
+    max_band = np.argmax(dispersion[start:stop, band], axis=0)
+    kp_vel = kp_mag[start + 1 + max_band:start + 1 + min_band]
+    energy_vel = dispersion[start + 1 + max_band:start + 1 + min_band, band] - dispersion[start + 1 + min_band, band]
+    enrg_sorted_idx = np.argsort(energy_vel, axis=0)
+    return material.electronGroupVelocity(kp=kp_vel[enrg_sorted_idx], energy_kp=energy_vel[enrg_sorted_idx], energyRange=energyRange)
+
+
+def _constant(value):
+    return value
+
+
+def _lifetime(function, energyRange, Temp, alpha):
+    # Lifetime of a mechanism given as a function of the grid, e.g. alloyMaterial.tau_alloy
+    return function(energyRange=energyRange, Temp=Temp, alpha=alpha)
+
+
+def _merge(pieces, numSamples, numTemps, temperatureAxes, sampleKeys):
+    # Places each piece's rows (samples) and columns (temperatures) into arrays for the whole run
+    merged = {}
+    for key, value in pieces[0][0].items():
+        if key not in temperatureAxes:
+            merged[key] = value
+            continue
+        axis = temperatureAxes[key]
+        shape = list(np.shape(value))
+        shape[axis] = numTemps
+        if key in sampleKeys:
+            shape[0] = numSamples
+        merged[key] = np.empty(shape, dtype=np.result_type(*[piece[0][key] for piece in pieces]))
+        for arrays, rows, columns, ownRows, ownColumns in pieces:
+            if key in sampleKeys:
+                merged[key][np.ix_(np.asarray(rows, dtype=int), np.asarray(columns, dtype=int))] = arrays[key][np.ix_(np.asarray(ownRows, dtype=int), np.asarray(ownColumns, dtype=int))]
+            else:
+                np.moveaxis(merged[key], axis, 0)[np.asarray(columns, dtype=int)] = np.moveaxis(np.asarray(arrays[key]), axis, 0)[np.asarray(ownColumns, dtype=int)]
+    return merged
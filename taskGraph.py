@@ -0,0 +1,164 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import getitem
+from inputHash import inputHash
+from lruCache import lruCache
+
+
+class taskNode:
+    """
+    One stage of a taskGraph: a function, its inputs and the key hashed
+    from them. Indexing a node (`node[1]`) gives a node for one entry of a
+    stage that returns several results, e.g. the nonparabolic lifetime of
+    tau_p.
+    """
+
+    def __init__(self, graph, name, function, args, kwargs, key):
+        self.graph = graph
+        self.name = name
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.dependencies = []
+        _substitute([args, kwargs], lambda node: self.dependencies.append(node) or node)
+
+    def __getitem__(self, index):
+        return self.graph.node('%s[%s]' % (self.name, index), getitem, self, index)
+
+    def value(self):
+        return self.graph.evaluate(self)[0]
+
+
+class taskGraph:
+    """
+    Memoizing task graph for the transport pipeline.
+
+    `node(name, function, *args, **kwargs)` adds a stage without running
+    it. Arguments may be other nodes, also inside lists, tuples and dicts,
+    which makes them dependencies. Each node is keyed by a hash of the
+    function (including the instance of a bound method, so a
+    thermoelectricProperties method is keyed by its material parameters
+    too) and of its inputs, where a dependency counts by its own key.
+    Adding a node whose key already exists returns the existing node, so
+    identical subexpressions (the same m_CB, DoS or phonon lifetime for
+    every sample) are merged and computed once.
+
+    `evaluate(*nodes)` runs what the requested nodes need in dependency
+    order. Nodes of the same depth are independent and run concurrently
+    on up to `maxWorkers` threads (numpy releases the GIL in its kernels).
+    Results are kept in an in-memory LRU cache of `maxEntries` values, so
+    a later evaluation reuses them. With a diskCache as `store`, nodes
+    missing from memory are looked up on disk by the same key, and nodes
+    that took at least `storeAfter` seconds are written there, so a rerun
+    in a new process skips every unchanged expensive stage. `explain()`
+    lists what the last evaluation computed, served from memory or disk,
+    or merged.
+    """
+
+    def __init__(self, maxEntries=128, maxWorkers=4, store=None, storeAfter=0.01):
+        self.maxWorkers = maxWorkers
+        self.store = store
+        self.storeAfter = storeAfter
+        self._nodes = {}
+        self._cache = lruCache(maxEntries)
+        self._merged = []
+        self._log = []
+
+    def node(self, name, function, *args, **kwargs):
+        key = inputHash(function, _substitute([args, kwargs], lambda node: ['node', node.key]))
+        if key in self._nodes:
+            if self._nodes[key].name != name:
+                self._merged.append((name, self._nodes[key].name))
+            return self._nodes[key]
+        self._nodes[key] = taskNode(self, name, function, args, kwargs, key)
+        return self._nodes[key]
+
+    def evaluate(self, *nodes):
+        values = {}
+        status = {}
+        pending = []
+        depth = {}
+
+        def visit(node):
+            if node.key in status:
+                return
+            if node.key in self._cache:
+                values[node.key] = self._cache.get(node.key)
+                status[node.key] = 'hit'
+                return
+            if self.store is not None:
+                try:
+                    values[node.key] = self.store.load(node.key)
+                except KeyError:
+                    pass
+                else:
+                    self._cache.put(node.key, values[node.key])
+                    status[node.key] = 'disk'
+                    return
+            for dependency in node.dependencies:
+                visit(dependency)
+            depth[node.key] = 1 + max([depth.get(_.key, -1) for _ in node.dependencies], default=-1)
+            status[node.key] = 'computed'
+            pending.append(node)
+        for node in nodes:
+            visit(node)
+
+        timing = {}
+
+        def run(node):
+            start = time.perf_counter()
+            args, kwargs = _substitute([node.args, node.kwargs], lambda dependency: values[dependency.key])
+            value = node.function(*args, **kwargs)
+            timing[node.key] = time.perf_counter() - start
+            return value
+        levels = sorted(set(depth.values()))
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) if self.maxWorkers > 1 else _serial() as executor:
+            for level in levels:
+                batch = [_ for _ in pending if depth[_.key] == level]
+                for node, value in zip(batch, executor.map(run, batch)):
+                    values[node.key] = value
+                    self._cache.put(node.key, value)
+                    if self.store is not None and timing[node.key] >= self.storeAfter:
+                        self.store.save(node.key, value, name=node.name)
+
+        self._log = [(self._nodes[key].name, key, state, timing.get(key, 0.)) for key, state in status.items()]
+        return [values[node.key] for node in nodes]
+
+    def explain(self):
+        lines = ['%-40s %-10s %-9s %9s' % ('node', 'key', 'status', 'seconds')]
+        lines += ['%-40s %-10s %-9s %9.4f' % (name, key[:10], state, seconds) for name, key, state, seconds in self._log]
+        lines += ['%-40s merged into %s' % merge for merge in self._merged]
+        return '\n'.join(lines)
+
+    def statistics(self):
+        states = [state for _, _, state, _ in self._log]
+        return {'computed': states.count('computed'), 'hits': states.count('hit'), 'disk': states.count('disk'), 'merged': len(self._merged), 'entries': len(self._cache)}
+
+    def clear(self):
+        self._cache.clear()
+        self._log = []
+
+
+def _substitute(value, replace):
+    # Applies `replace` to every node inside (nested) lists, tuples and dicts of arguments
+    if isinstance(value, taskNode):
+        return replace(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_substitute(_, replace) for _ in value)
+    if isinstance(value, dict):
+        return {key: _substitute(item, replace) for key, item in value.items()}
+    return value
+
+
+class _serial:
+    # Stand-in for an executor when maxWorkers is 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, function, items):
+        return map(function, items)
@@ -0,0 +1,56 @@
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from adaptiveSweep import adaptiveSweep
+
+
+def ridge(points):
+    return np.exp(-((points[:, 1] - 0.5 - 0.2 * points[:, 0]) / 0.05)**2)
+
+
+def test_points_are_evaluated_once():
+    seen = []
+
+    def function(points):
+        seen.extend(map(tuple, points))
+        return ridge(points)
+    points, values, interpolant = adaptiveSweep(function, [[0, 1], [0, 1]], initialGrid=5, maxLevel=4)
+    assert len(seen) == len(set(seen)) == len(points)
+    np.testing.assert_array_equal(values, ridge(points))
+
+
+def test_refinement_beats_uniform_grid_of_same_cost():
+    points, values, interpolant = adaptiveSweep(ridge, [[0, 1], [0, 1]], initialGrid=5, maxLevel=6, tolerance=0.05)
+    # Under a tenth of the uniform grid at the finest spacing
+    assert len(points) < (4 * 2**6 + 1)**2 / 10
+    probe = np.random.default_rng(0).random((4000, 2))
+    side = int(np.ceil(np.sqrt(len(points))))
+    grid = np.linspace(0, 1, side)
+    x, y = np.meshgrid(grid, grid, indexing='ij')
+    uniform = RegularGridInterpolator((grid, grid), ridge(np.column_stack((x.ravel(), y.ravel()))).reshape(side, side))
+    error = np.max(np.abs(interpolant(probe) - ridge(probe)))
+    assert error < 0.02
+    assert error < np.max(np.abs(uniform(probe) - ridge(probe))) / 3
+
+
+def test_maxEvaluations_is_a_hard_budget():
+    full = adaptiveSweep(ridge, [[0, 1], [0, 1]], initialGrid=5, maxLevel=6)[0]
+    for budget in (40, 100, 333):
+        seen = []
+
+        def function(points):
+            seen.extend(map(tuple, points))
+            return ridge(points)
+        points = adaptiveSweep(function, [[0, 1], [0, 1]], initialGrid=5, maxLevel=6, maxEvaluations=budget)[0]
+        assert len(seen) == len(points) <= budget < len(full)
+        assert len(points) > budget - 3**2
+    # The initial grid is evaluated even when it alone exceeds the budget
+    assert len(adaptiveSweep(ridge, [[0, 1], [0, 1]], initialGrid=5, maxLevel=6, maxEvaluations=10)[0]) == 25
+
+
+def test_one_dimension():
+    step = lambda points: np.tanh((points[:, 0] - 0.3) / 0.01)
+    points, values, interpolant = adaptiveSweep(step, [0, 1], initialGrid=5, maxLevel=6)
+    x = np.sort(points[:, 0])
+    assert np.min(np.diff(x)[np.abs(x[:-1] - 0.3) < 0.02]) < np.min(np.diff(x)[x[:-1] > 0.6]) / 8
+    np.testing.assert_allclose(interpolant([0.1, 0.9]), step(np.array([[0.1], [0.9]])), atol=1e-3)
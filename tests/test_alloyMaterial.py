@@ -0,0 +1,30 @@
+import numpy as np
+
+from alloyMaterial import alloyMaterial
+from thermoelectricProperties import thermoelectricProperties
+
+
+def baselineTauAlloy(x, e, Temp, alpha, U_alloy=0.7):
+    # Per-composition expression from the original SiGe.py script
+    latticeParameter = (0.027*x**2+0.2*x+5.431)*1e-10
+    m_CB = 0.26*thermoelectricProperties.me*(1+5*alpha*thermoelectricProperties.kB*Temp)
+    return 1/(x*(1-x)*(3*latticeParameter**3*np.pi**3*U_alloy**2/8/thermoelectricProperties.hBar)*m_CB.T**(3/2)*np.sqrt(e)/np.sqrt(2)/np.pi**2/thermoelectricProperties.hBar**3/0.75)*thermoelectricProperties.e2C**(3/2)
+
+
+def test_tau_alloy_sweep_matches_per_composition():
+    x = np.array([0.05, 0.2, 0.5, 0.8])
+    e = np.linspace(0.01, 1, 50)[None]
+    Temp = np.array([[300., 600., 900.]])
+    tau = alloyMaterial(x).tau_alloy(e, Temp, 0.5)
+    assert tau.shape == (4, 3, 50)
+    for idx, xi in enumerate(x):
+        np.testing.assert_allclose(tau[idx], baselineTauAlloy(xi, e, Temp, 0.5), rtol=1e-13)
+        np.testing.assert_array_equal(alloyMaterial([xi]).tau_alloy(e, Temp, 0.5)[0], tau[idx])
+
+
+def test_material_carries_composition():
+    alloy = alloyMaterial([0.1, 0.3])
+    model = alloy.material(1, dopantElectricCharge=1, numKpoints=10)
+    assert model.latticeParameter == alloy.latticeParameter[1]
+    assert model.electronEffectiveMass == alloy.electronEffectiveMass[1]
+    assert model.dielectric == 11.7 + 4.5 * 0.3
@@ -0,0 +1,22 @@
+import numpy as np
+from scipy.special import j1
+
+import besselKernel
+from besselKernel import j1OverXTable, j1OverX
+
+
+def test_table_within_tolerance():
+    for tolerance in (1e-6, 1e-10):
+        h, coefficients = j1OverXTable(200., tolerance)
+        x = np.concatenate(([0.], np.geomspace(1e-8, 199.9, 20000)))
+        exact = np.where(x == 0, 0.5, j1(x) / np.maximum(x, 1e-300))
+        assert np.max(np.abs(j1OverX(x, h, coefficients) - exact)) < tolerance
+
+
+def test_table_grows_and_cache_is_bounded():
+    h, small = j1OverXTable(10., 1e-7)
+    assert j1OverXTable(5., 1e-7)[1] is small
+    assert j1OverXTable(50., 1e-7)[1].shape[1] > small.shape[1]
+    for idx in range(2 * besselKernel.maxTables):
+        j1OverXTable(1., 10.**(-3 - idx / 4))
+    assert len(besselKernel._tables) == besselKernel.maxTables
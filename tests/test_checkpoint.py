@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+
+import checkpointStore
+from adaptiveSweep import adaptiveSweep
+from parallel import _missingBlocks
+from thermoelectricProperties import thermoelectricProperties
+
+
+class Interrupted(Exception):
+    pass
+
+
+save = checkpointStore.checkpointStore.save
+
+
+def interruptAfter(monkeypatch, numSaves, saved):
+    # Lets numSaves pieces reach the store, then fails the way a killed run would
+    def interrupted(self, array, **info):
+        if len(saved) >= numSaves:
+            raise Interrupted
+        saved.append(info)
+        return save(self, array, **info)
+    monkeypatch.setattr(checkpointStore.checkpointStore, 'save', interrupted)
+
+
+def recordSaves(monkeypatch, saved):
+    interruptAfter(monkeypatch, np.inf, saved)
+
+
+@pytest.fixture(scope='module')
+def Si():
+    return thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+
+
+kwargs = dict(nk=[12, 12, 12], Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([1e-9, 4e-9]), sampling='energy', numDirections=4)
+
+
+@pytest.mark.parametrize('method,options', [('tau2D_cylinder', {'n': 200}), ('tau3D_spherical', {'n': 16})])
+def test_resumed_lifetime_matches_uninterrupted(Si, tmp_path, monkeypatch, method, options):
+    e = Si.energyRange()
+    reference = getattr(Si, method)(e, chunkSize=50, **options, **kwargs)
+    first = []
+    interruptAfter(monkeypatch, 2, first)
+    with pytest.raises(Interrupted):
+        getattr(Si, method)(e, chunkSize=50, checkpoint=str(tmp_path), **options, **kwargs)
+    assert [(_['start'], _['stop']) for _ in first] == [(0, 50), (50, 100)]
+    second = []
+    recordSaves(monkeypatch, second)
+    # Resumed with another chunk size: only the items the interrupted run had not saved are computed
+    resumed = getattr(Si, method)(e, chunkSize=60, checkpoint=str(tmp_path), **options, **kwargs)
+    blocks = [(_['start'], _['stop']) for _ in second]
+    assert blocks == _missingBlocks(blocks[-1][1], 60, [(0, 100)])
+    np.testing.assert_array_equal(resumed, reference)
+    assert os.listdir(tmp_path) == []
+
+
+evaluated = []
+
+
+def ridge(points):
+    evaluated.extend(map(tuple, points))
+    return np.exp(-((points[:, 1] - 0.5 - 0.2 * points[:, 0]) / 0.05)**2)
+
+
+def test_resumed_adaptive_sweep_matches_uninterrupted(tmp_path, monkeypatch):
+    reference = adaptiveSweep(ridge, [[0, 1], [0, 1]], initialGrid=5, maxLevel=4)
+    interruptAfter(monkeypatch, 2, [])
+    with pytest.raises(Interrupted):
+        adaptiveSweep(ridge, [[0, 1], [0, 1]], initialGrid=5, maxLevel=4, checkpoint=str(tmp_path))
+    saved = []
+    recordSaves(monkeypatch, saved)
+    del evaluated[:]
+    points, values, interpolant = adaptiveSweep(ridge, [[0, 1], [0, 1]], initialGrid=5, maxLevel=4, checkpoint=str(tmp_path))
+    assert len(evaluated) == sum(_['size'] for _ in saved) < len(points)
+    np.testing.assert_array_equal(points, reference[0])
+    np.testing.assert_array_equal(values, reference[1])
+    assert os.listdir(tmp_path) == []
+
+
+def spike(points):
+    return np.sin(3 * points[:, 0]) + 20 * np.exp(-((points[:, 0] - 0.41)**2 + (points[:, 1] - 0.63)**2) / 2e-4)
+
+
+@pytest.mark.parametrize('numSaves', [1, 2, 3, 4, 5])
+def test_resumed_sweep_ignores_checkpointed_points_it_has_not_reached(tmp_path, monkeypatch, numSaves):
+    # The spike only shows up at the second level; loaded early, it must not widen the range the first level refines against
+    reference = adaptiveSweep(spike, [[0, 1], [0, 1]], initialGrid=5, maxLevel=5, tolerance=0.02)
+    interruptAfter(monkeypatch, numSaves, [])
+    with pytest.raises(Interrupted):
+        adaptiveSweep(spike, [[0, 1], [0, 1]], initialGrid=5, maxLevel=5, tolerance=0.02, checkpoint=str(tmp_path))
+    monkeypatch.setattr(checkpointStore.checkpointStore, 'save', save)
+    points, values, interpolant = adaptiveSweep(spike, [[0, 1], [0, 1]], initialGrid=5, maxLevel=5, tolerance=0.02, checkpoint=str(tmp_path))
+    np.testing.assert_array_equal(points, reference[0])
+    np.testing.assert_array_equal(values, reference[1])
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from inputHash import inputHash
+from thermoelectricProperties import thermoelectricProperties
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    material = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+    E = material.energyRange()
+    m_c = np.array([[0.26, 0.27, 0.28]]) * thermoelectricProperties.me
+    N = np.array([[1e24, 2e24, 3e24], [1e25, 2e25, 4e25], [1e26, 1e26, 2e26]])
+    LD = np.array([[5e-9, 6e-9, 7e-9], [2e-9, 2.5e-9, 3e-9], [1e-9, 1.2e-9, 1.4e-9]])
+    DoS = 1e28 * np.sqrt(E)
+    return material, E, m_c, N, LD, DoS
+
+
+def baselineScreened(material, E, m_c, LD, N):
+    # Single-sample expression from before the kernels were vectorized
+    g = 8*m_c.T*LD.T**2*E/thermoelectricProperties.hBar**2/thermoelectricProperties.e2C
+    var_tmp = np.log(1+g)-g/(1+g)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = 16*np.pi*np.sqrt(2*m_c.T)*(4*np.pi*material.dielectric*thermoelectricProperties.e0)**2/N.T/var_tmp*E**(3/2)/thermoelectricProperties.e2C**(5/2)
+    tau[np.isnan(tau)] = 0
+    return tau
+
+
+def baselineUnscreened(material, E, m_c, N):
+    g = 4*np.pi*(4*np.pi*material.dielectric*thermoelectricProperties.e0)*E/N.T**(1/3)/thermoelectricProperties.e2C
+    var_tmp = np.log(1+g**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = 16*np.pi*np.sqrt(2*m_c.T)*(4*np.pi*material.dielectric*thermoelectricProperties.e0)**2/N.T/var_tmp*E**(3/2)/thermoelectricProperties.e2C**(5/2)
+    tau[np.isnan(tau)] = 0
+    return tau
+
+
+def test_stacked_samples_match_per_sample(inputs):
+    material, E, m_c, N, LD, DoS = inputs
+    m_stack = np.repeat(m_c, len(N), axis=0)
+    screened = material.tau_Screened_Coulomb(E, m_stack, LD, N)
+    unscreened = material.tau_Unscreened_Coulomb(E, m_stack, N)
+    strong = material.tau_Strongly_Screened_Coulomb(DoS, LD, N)
+    assert screened.shape == unscreened.shape == strong.shape == (3, 3, E.shape[1])
+    for idx in range(len(N)):
+        sample = slice(idx, idx + 1)
+        np.testing.assert_allclose(screened[idx], material.tau_Screened_Coulomb(E, m_c, LD[sample], N[sample]), rtol=1e-13)
+        np.testing.assert_allclose(unscreened[idx], material.tau_Unscreened_Coulomb(E, m_c, N[sample]), rtol=1e-13)
+        np.testing.assert_allclose(strong[idx], material.tau_Strongly_Screened_Coulomb(DoS, LD[sample], N[sample]), rtol=1e-13)
+
+
+def test_single_sample_matches_baseline(inputs):
+    material, E, m_c, N, LD, DoS = inputs
+    for idx in range(len(N)):
+        sample = slice(idx, idx + 1)
+        screened = material.tau_Screened_Coulomb(E, m_c, LD[sample], N[sample])
+        expected = baselineScreened(material, E, m_c, LD[sample], N[sample])
+        # The baseline loses digits to cancellation in ln(1+g) - g/(1+g) at small g; compare where it is well conditioned
+        g = 8*m_c.T*LD[sample].T**2*E/thermoelectricProperties.hBar**2/thermoelectricProperties.e2C
+        stable = g > 1e-1
+        np.testing.assert_allclose(screened[stable], expected[stable], rtol=1e-10)
+        assert np.all(screened[:, 0] == 0) and np.all(np.isfinite(screened))
+        np.testing.assert_allclose(material.tau_Unscreened_Coulomb(E, m_c, N[sample])[:, 1:], baselineUnscreened(material, E, m_c, N[sample])[:, 1:], rtol=1e-10)
+
+
+def test_screened_small_energy_limit(inputs):
+    # tau ~ E^(-1/2) as E -> 0, so sqrt(E) tau tends to a constant instead of the NaN/noise of the direct formula
+    material, E, m_c, N, LD, DoS = inputs
+    e = np.geomspace(1e-12, 1e-8, 5)[None]
+    tau = material.tau_Screened_Coulomb(e, m_c, LD[:1], N[:1])
+    scaled = tau * np.sqrt(e)
+    np.testing.assert_allclose(scaled, np.broadcast_to(scaled[:, :1], scaled.shape), rtol=1e-3)
+
+
+def test_repeated_calls_do_not_share_results(inputs):
+    material, E, m_c, N, LD, DoS = inputs
+    first = material.tau_Screened_Coulomb(E, m_c, LD[:1], N[:1])
+    reference = first.copy()
+    first *= 2
+    np.testing.assert_array_equal(material.tau_Screened_Coulomb(E, m_c, LD[:1], N[:1]), reference)
+
+
+def test_kernel_cache_evicts_least_recently_used(inputs):
+    material, E, m_c, N, LD, DoS = inputs
+    material._kernelCache.clear()
+    material.tau_Unscreened_Coulomb(E, m_c, N[:1])
+    key = inputHash('unscreenedLogTerm', E, N[:1], material.dielectric)
+    for idx in range(40):
+        material.tau_Unscreened_Coulomb(E, m_c, N[:1] * (2 + idx))
+        assert key in material._kernelCache
+        material.tau_Unscreened_Coulomb(E, m_c, N[:1])
+    assert len(material._kernelCache) == material._kernelCache.maxEntries
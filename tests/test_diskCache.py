@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+from diskCache import diskCache
+from taskGraph import taskGraph
+from thermoelectricProperties import thermoelectricProperties
+
+calls = []
+
+
+def expensive(values, power=2, workers=1):
+    calls.append(workers)
+    return {'result': [np.asarray(values)**power, (power, None)], 'sum': float(np.sum(values))}
+
+
+def test_round_trip_keeps_structure(tmp_path):
+    cache = diskCache(str(tmp_path))
+    value = [np.arange(6.).reshape(2, 3), (np.float64(2.5), 3, None), {'a': np.ones(2, dtype=np.float32)}]
+    assert cache.save('ab' * 32, value, name='test')
+    loaded = cache.load('ab' * 32)
+    assert isinstance(loaded, list) and isinstance(loaded[1], tuple) and loaded[1][2] is None
+    np.testing.assert_array_equal(loaded[0], value[0])
+    assert loaded[1][:2] == (2.5, 3) and loaded[2]['a'].dtype == np.float32
+    assert not cache.save('ab' * 32, value)
+    assert not cache.save('cd' * 32, [object()])
+
+
+def test_memoize_hits_across_instances(tmp_path):
+    del calls[:]
+    first = diskCache(str(tmp_path)).memoize(expensive, ignore=('workers',))
+    value = first(np.arange(4.), power=3, workers=1)
+    second = diskCache(str(tmp_path)).memoize(expensive, ignore=('workers',))
+    again = second(np.arange(4.), power=3, workers=8)
+    assert calls == [1]
+    np.testing.assert_array_equal(again['result'][0], value['result'][0])
+    assert again['sum'] == value['sum'] and again['result'][1] == (3, None)
+    second(np.arange(4.), power=2)
+    second(np.arange(5.), power=3)
+    assert len(calls) == 3
+
+
+def test_bound_method_key_covers_material(tmp_path):
+    cache = diskCache(str(tmp_path))
+    materials = [thermoelectricProperties(latticeParameter=5.4e-10, dopantElectricCharge=1, electronEffectiveMass=m * thermoelectricProperties.me, dielectric=11.7, numKpoints=10) for m in (1.08, 1.2)]
+    DoS = [cache.memoize(material.analyticalDoS)(energyRange=np.linspace(0, 1, 5)[None], alpha=np.array([[0.5]])) for material in materials]
+    assert not np.array_equal(DoS[0][0], DoS[1][0])
+    assert len(cache.entries()) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = diskCache(str(tmp_path))
+    keys = ['%02d' % _ + 'f' * 62 for _ in range(4)]
+    cache.save(keys[0], np.zeros(1024))
+    cache.maxBytes = 3.5 * cache.size()
+    for index, key in enumerate(keys[:3]):
+        cache.save(key, np.zeros(1024))
+        os.utime(os.path.join(cache.path(key), 'meta.json'), (index, index))
+    cache.load(keys[0])
+    cache.save(keys[3], np.zeros(1024))
+    assert keys[1] not in cache and all(key in cache for key in (keys[0], keys[2], keys[3]))
+    assert cache.size() <= cache.maxBytes
+
+
+def test_task_graph_reloads_stages_in_a_new_process(tmp_path):
+    del calls[:]
+    graph = taskGraph(store=diskCache(str(tmp_path)), storeAfter=0)
+    value = graph.evaluate(graph.node('stage', expensive, np.arange(3.)))[0]
+    fresh = taskGraph(store=diskCache(str(tmp_path)))
+    again = fresh.evaluate(fresh.node('stage', expensive, np.arange(3.)))[0]
+    assert calls == [1] and fresh.statistics()['disk'] == 1
+    np.testing.assert_array_equal(again['result'][0], value['result'][0])
+
+
+def tupleKeys(values):
+    calls.append(len(values))
+    return {(1, 2): np.asarray(values), 3: 4.0, None: 1, (('a', 2.5), True): np.zeros(2)}
+
+
+def writable(values):
+    calls.append(len(values))
+    return {'a': np.asarray(values, dtype=float), 'b': [np.ones((2, 2))]}
+
+
+def test_dict_keys_round_trip(tmp_path):
+    del calls[:]
+    memoized = diskCache(str(tmp_path)).memoize(tupleKeys)
+    cold, warm = memoized([1., 2.]), memoized([1., 2.])
+    assert calls == [2] and set(warm) == set(cold)
+    np.testing.assert_array_equal(warm[(1, 2)], cold[(1, 2)])
+    assert warm[3] == 4.0 and warm[None] == 1
+    cache = diskCache(str(tmp_path))
+    assert not cache.save('ef' * 32, {frozenset([1]): 1.0}) and 'ef' * 32 not in cache
+
+
+def test_warm_results_are_writable_copies(tmp_path):
+    del calls[:]
+    memoized = diskCache(str(tmp_path)).memoize(writable)
+    cold, warm = memoized([1., 2.]), memoized([1., 2.])
+    assert calls == [2]
+    for result in (cold, warm):
+        assert type(result['a']) is np.ndarray and type(result['b'][0]) is np.ndarray
+        result['a'][0] = 5
+        result['b'][0][:] = 0
+    again = memoized([1., 2.])
+    np.testing.assert_array_equal(again['a'], [1., 2.])
+    np.testing.assert_array_equal(again['b'][0], np.ones((2, 2)))
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from thermoelectricProperties import thermoelectricProperties
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    material = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=300)
+    E = material.energyRange()
+    Temp = np.array([[300., 500., 700.]])
+    Ef = np.array([[-0.05, 0.0, 0.04], [0.02, 0.06, 0.1]])
+    DoS = 1e28 * np.sqrt(E)
+    vg = 2e5 * np.sqrt(E) + 1e3
+    dfdE = material.fermiDistribution(energyRange=E, fermiLevel=Ef, Temp=Temp)[1]
+    tau_b = 1e-14 * (E + 0.01)**-0.5 * np.array([1., 2.])[:, None, None] * (300 / Temp.T)
+    return material, dict(E=E, DoS=DoS, vg=vg, Ef=Ef, dfdE=dfdE, Temp=Temp, tau_b=tau_b)
+
+
+def _sample(kwargs, idx):
+    return dict(kwargs, Ef=kwargs['Ef'][idx:idx+1], dfdE=kwargs['dfdE'][idx], tau_b=kwargs['tau_b'][idx])
+
+
+U = np.linspace(0, 0.3, 7)
+tauo = np.array([1e-15, 1e-14, 1e-13])
+
+
+@pytest.mark.parametrize('method,finite', [('broadcast', True), ('broadcast', False), ('cumulative', True), ('cumulative', False)])
+def test_filteringEffect_stacked_matches_per_sample(inputs, method, finite):
+    material, kwargs = inputs
+    stacked = material.filteringEffect(U, tauo=tauo if finite else None, method=method, **kwargs)
+    for idx in range(len(kwargs['Ef'])):
+        single = material.filteringEffect(U, tauo=tauo if finite else None, method=method, **_sample(kwargs, idx))
+        for s, one in zip(stacked, single):
+            np.testing.assert_allclose(s[..., idx, :], one, rtol=1e-12)
+
+
+def test_phenomenological_stacked_matches_per_sample(inputs):
+    material, kwargs = inputs
+    Sigma, S = material.phenomenological(U, tauo, **kwargs)
+    assert Sigma.shape == (len(U), len(tauo), 2, 3)
+    for idx in range(len(kwargs['Ef'])):
+        one = material.phenomenological(U, tauo, **_sample(kwargs, idx))
+        np.testing.assert_allclose(Sigma[:, :, idx], one[0], rtol=1e-12)
+        np.testing.assert_allclose(S[:, :, idx], one[1], rtol=1e-12)
+
+
+def test_phenomenological_matches_broadcast(inputs):
+    material, kwargs = inputs
+    fast = material.filteringEffect(U, tauo=tauo, method='cumulative', **kwargs)
+    full = material.filteringEffect(U, tauo=tauo, method='broadcast', **kwargs)
+    for a, b in zip(fast, full):
+        np.testing.assert_allclose(a, b, rtol=1e-9)
+
+
+@pytest.mark.parametrize('method', ['cumulative', 'broadcast'])
+def test_paired_points_match_grid_diagonal(inputs, method):
+    material, kwargs = inputs
+    pairs = np.array([0.05, 0.1, 0.2]), np.array([1e-15, 1e-13, 1e-14])
+    grid = material.filteringEffect(pairs[0], tauo=pairs[1], method=method, **kwargs)
+    paired = material.filteringEffect(pairs[0], tauo=pairs[1], method=method, paired=True, **kwargs)
+    batch = np.arange(len(pairs[0]))
+    for g, p in zip(grid, paired):
+        assert p.shape == (3, 2, 3)
+        np.testing.assert_allclose(p, g[batch, batch], rtol=1e-12)
+
+
+def test_ideal_cumulative_matches_broadcast(inputs):
+    material, kwargs = inputs
+    E = np.ravel(kwargs['E'])
+    thresholds = np.concatenate(([-0.1, 0.0], E[[1, 57, 150]], E[[20, 200]] + 1e-4, [0.37]))
+    fast = material.filteringEffect(thresholds, **kwargs)
+    full = material.filteringEffect(thresholds, method='broadcast', **kwargs)
+    for a, b in zip(fast, full):
+        assert a.shape == (len(thresholds), 2, 3)
+        np.testing.assert_allclose(a, b, rtol=1e-10)
+
+
+def test_tailIntegral_matches_masked_trapezoid(inputs):
+    material, kwargs = inputs
+    E = np.ravel(kwargs['E'])
+    integrand = np.random.default_rng(0).random((2, 3, len(E)))
+    thresholds = np.array([-1., E[0], E[10] - 1e-5, E[10], 0.5, E[-1], E[-1] + 1])
+    tail = material.tailIntegral(E, integrand, thresholds)
+    for idx, threshold in enumerate(thresholds):
+        np.testing.assert_allclose(tail[idx], np.trapz(np.where(E < threshold, 0, integrand), E, axis=-1), rtol=1e-12, atol=1e-15)
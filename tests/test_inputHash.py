@@ -0,0 +1,68 @@
+import os
+import sys
+import types
+
+import numpy as np
+
+import inputHash as inputHashModule
+from inputHash import inputHash
+
+
+def _compile(source):
+    namespace = {}
+    exec(source, namespace)
+    return namespace['f']
+
+
+def test_function_body_changes_key():
+    before = _compile("def f(x):\n    return x + 1\n")
+    after = _compile("def f(x):\n    return x + 2\n")
+    assert before.__qualname__ == after.__qualname__
+    assert inputHash(before) != inputHash(after)
+    assert inputHash(before) == inputHash(_compile("def f(x):\n    return x + 1\n"))
+
+
+def test_called_function_and_defaults_change_key():
+    assert inputHash(_compile("def f(x):\n    return np.sin(x)\n")) != inputHash(_compile("def f(x):\n    return np.cos(x)\n"))
+    assert inputHash(_compile("def f(x, a=1):\n    return a*x\n")) != inputHash(_compile("def f(x, a=2):\n    return a*x\n"))
+    assert inputHash(_compile("def f(x, *, a=1):\n    return a*x\n")) != inputHash(_compile("def f(x, *, a=2):\n    return a*x\n"))
+
+
+def test_closure_and_arrays():
+    def scaled(factor):
+        return lambda x: factor * x
+    assert inputHash(scaled(2.0)) != inputHash(scaled(3.0))
+    assert inputHash(np.arange(3.)) != inputHash(np.arange(3))
+    assert inputHash(np.arange(3.), key=1) == inputHash(np.arange(3.), key=1)
+
+
+def _packageModule(source, name='_hashedKernels'):
+    # A module that counts as part of the package, as if `source` were a file next to inputHash.py
+    module = types.ModuleType(name)
+    module.__file__ = os.path.join(inputHashModule._packageDirectory, name + '.py')
+    sys.modules[name] = module
+    exec(source, module.__dict__)
+    return module
+
+
+def test_package_helpers_change_key():
+    kernel = "def helper(x):\n    return x + %d\n\ndef kernel(x):\n    return [helper(_) for _ in x]\n"
+    before, after, same = [_packageModule(kernel % _) for _ in (1, 2, 1)]
+    assert inputHash(before.kernel) != inputHash(after.kernel)
+    assert inputHash(before.kernel) == inputHash(same.kernel)
+
+
+def test_methods_of_hashed_instances_change_key():
+    material = "class material:\n    def __init__(self):\n        self.a = 1.\n    def _scale(self):\n        return %d\n    def tau(self):\n        return self.a * self._scale()\n"
+    before, after = [_packageModule(material % _) for _ in (1, 2)]
+    assert inputHash(before.material().tau) != inputHash(after.material().tau)
+    assert inputHash(before.material()) != inputHash(after.material())
+    assert inputHash(before.material().tau) == inputHash(before.material().tau)
+
+
+def test_object_arrays_hash_their_elements():
+    first, second = np.array([1.5, 'a', None], dtype=object), np.array([1.5, 'a', None], dtype=object)
+    first[1], second[1] = [0, 1], [0, 1]
+    assert inputHash(first) == inputHash(second)
+    second[1] = [0, 2]
+    assert inputHash(first) != inputHash(second)
@@ -0,0 +1,19 @@
+from lruCache import lruCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = lruCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache and cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_miss_returns_default():
+    cache = lruCache(1)
+    assert cache.get('a') is None and cache.get('a', 0) == 0
+    assert cache.put('a', 1) == 1
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,34 @@
+import numpy as np
+
+from matthiessenAccumulator import matthiessenAccumulator
+
+
+def test_matches_direct_matthiessen():
+    rng = np.random.default_rng(0)
+    a, b, c = rng.random((1, 40)), rng.random((5, 1)), rng.random((5, 40))
+    accumulator = matthiessenAccumulator(keepFractions=True).add(a).add(b, weight=6, name='b').add(c)
+    expected = 1 / (1 / a + 1 / (6 * b) + 1 / c)
+    np.testing.assert_allclose(accumulator.lifetime(), expected, rtol=1e-14)
+    np.testing.assert_allclose(sum(accumulator.fractions().values()), 1, rtol=1e-14)
+
+
+def test_special_lifetimes():
+    tau = np.array([[0., np.inf, np.nan, 2.]])
+    np.testing.assert_array_equal(matthiessenAccumulator().add(tau).add(np.full((1, 4), np.inf)).lifetime(), [[0., 0., 0., 2.]])
+
+
+def test_scratch_is_reused():
+    accumulator = matthiessenAccumulator().add(np.ones((3, 8)))
+    rate = accumulator.rate
+    accumulator.add(np.ones((3, 8)))
+    scratch = accumulator._scratch
+    accumulator.add(2 * np.ones((3, 8)))
+    assert accumulator._scratch is scratch and accumulator.rate is rate
+    np.testing.assert_allclose(accumulator.lifetime(), 0.4)
+
+
+def test_per_sample_weights_widen_the_rate():
+    # Weights of shape (nSamples, 1, 1), with an infinite weight for a sample that leaves the mechanism out
+    a, b = np.array([[0., 1., 2.]]), np.array([[[1., 1., 1.]], [[3., 3., 3.]]])
+    tau = matthiessenAccumulator().add(a, weight=np.array([6., np.inf])[:, None, None]).add(b).lifetime()
+    np.testing.assert_allclose(tau, [[[0., 6 / 7, 12 / 13]], [[3., 3., 3.]]], rtol=1e-14)
@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+import pytest
+
+from parallel import scratchBuffers, releaseScratch, _missingBlocks
+from thermoelectricProperties import thermoelectricProperties
+
+
+@pytest.fixture(scope='module')
+def Si():
+    return thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+
+
+def test_scratch_is_reused_within_a_thread_only():
+    first = scratchBuffers(3, 10, 7)
+    assert np.shares_memory(first, scratchBuffers(3, 5, 7))
+    other = []
+    thread = threading.Thread(target=lambda: other.append(scratchBuffers(3, 10, 7)))
+    thread.start()
+    thread.join()
+    assert not np.shares_memory(first, other[0])
+    releaseScratch()
+    assert not np.shares_memory(first, scratchBuffers(3, 10, 7))
+    releaseScratch()
+
+
+def test_missing_blocks():
+    assert _missingBlocks(10, 4, []) == [(0, 4), (4, 8), (8, 10)]
+    assert _missingBlocks(10, 4, [(2, 5), (8, 10)]) == [(0, 2), (5, 8)]
+
+
+kwargs = dict(nk=[12, 12, 12], Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([1e-9, 4e-9]), sampling='energy', numDirections=4)
+
+
+def test_tau2D_pool_matches_serial(Si):
+    e = Si.energyRange()
+    serial = Si.tau2D_cylinder(e, n=200, chunkSize=50, **kwargs)
+    pooled = Si.tau2D_cylinder(e, n=200, chunkSize=37, workers=2, **kwargs)
+    np.testing.assert_array_equal(serial, pooled)
+
+
+def test_tau3D_pool_matches_serial(Si):
+    e = Si.energyRange()
+    serial = Si.tau3D_spherical(e, n=16, chunkSize=50, **kwargs)
+    pooled = Si.tau3D_spherical(e, n=16, chunkSize=37, workers=2, **kwargs)
+    np.testing.assert_array_equal(serial, pooled)
+
+
+def test_threads_match_serial(Si):
+    e = Si.energyRange()
+    serial = Si.tau2D_cylinder(e, n=200, chunkSize=50, **kwargs)
+    results = [None] * 4
+
+    def run(idx):
+        results[idx] = Si.tau2D_cylinder(e, n=200, chunkSize=50, **kwargs)
+    threads = [threading.Thread(target=run, args=(idx,)) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for result in results:
+        np.testing.assert_array_equal(serial, result)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from thermoelectricProperties import thermoelectricProperties
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    material = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+    E = material.energyRange()
+    Temp = np.array([[300., 600., 900.]])
+    alpha = np.array([[0.5, 0.5, 0.5]])
+    D = 1e28 * np.sqrt(E) + 1e20
+    return material, E, Temp, alpha, D
+
+
+def baselineTau_p(E, alpha, Dv, DA, T, vs, D, rho):
+    # Scalar-parameter expression from before tau_p broadcast over parameter sets
+    nonparabolic_term = (1-((alpha.T*E)/(1+2*alpha.T*E)*(1-Dv/DA)))**2-8/3*(alpha.T*E)*(1+alpha.T*E)/(1+2*alpha.T*E)**2*(Dv/DA)
+    tau = rho*vs**2*thermoelectricProperties.hBar/np.pi/thermoelectricProperties.kB/T.T/DA/DA*1e9/thermoelectricProperties.e2C/D
+    return [tau, tau/nonparabolic_term]
+
+
+def test_scalar_parameters_match_baseline(inputs):
+    material, E, Temp, alpha, D = inputs
+    for new, old in zip(material.tau_p(E, alpha, 12.9, 9.5, Temp, 5.4e3, D, 2329), baselineTau_p(E, alpha, 12.9, 9.5, Temp, 5.4e3, D, 2329)):
+        assert new.shape == (3, E.shape[1])
+        np.testing.assert_allclose(new, old, rtol=1e-13)
+
+
+def test_parameter_sweep_matches_loop(inputs):
+    material, E, Temp, alpha, D = inputs
+    Dv = np.array([10., 12.9, 15.])
+    DA = np.array([8., 9.5, 11.])
+    vs = np.array([5e3, 5.4e3, 6e3])
+    rho = np.array([2300., 2329., 2400.])
+    sweep = material.tau_p(E, alpha, Dv, DA, Temp, vs, D, rho)
+    for result in sweep:
+        assert result.shape == (3, 3, E.shape[1])
+    for idx in range(3):
+        single = material.tau_p(E, alpha, Dv[idx], DA[idx], Temp, vs[idx], D, rho[idx])
+        for s, one in zip(sweep, single):
+            np.testing.assert_allclose(s[idx], one, rtol=1e-13)
+
+
+def test_alpha_sweep_matches_loop(inputs):
+    material, E, Temp, alpha, D = inputs
+    alphas = np.array([0., 0.3, 0.5])
+    sweep = material.tau_p(E, alphas, 12.9, 9.5, Temp, 5.4e3, D, 2329)
+    for idx, value in enumerate(alphas):
+        single = material.tau_p(E, np.full_like(alpha, value), 12.9, 9.5, Temp, 5.4e3, D, 2329)
+        np.testing.assert_allclose(sweep[1][idx], single[1], rtol=1e-13)
+    np.testing.assert_array_equal(sweep[1][0], np.broadcast_to(sweep[0], sweep[1].shape)[0])
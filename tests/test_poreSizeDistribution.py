@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from poreSizeDistribution import poreSizeDistribution
+from thermoelectricProperties import thermoelectricProperties
+
+kwargs = dict(nk=None, Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, sampling='energy', numDirections=3)
+
+
+@pytest.fixture(scope='module')
+def Si():
+    return thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=100)
+
+
+def test_lognormal_moments():
+    distribution = poreSizeDistribution.lognormal(5e-9, 0.3, numRadii=12)
+    np.testing.assert_allclose(np.sum(distribution.numberFraction * distribution.radii**3), 5e-9**3 * np.exp(9 * 0.3**2 / 2), rtol=1e-12)
+    histogram = poreSizeDistribution.histogram([1e-9, 3e-9, 5e-9], [1, 3])
+    np.testing.assert_allclose(histogram.volumeFraction(2), [4e-18, 3 * 16e-18] / np.float64(52e-18))
+
+
+def test_narrow_lognormal_matches_monodisperse(Si):
+    e = Si.energyRange()
+    inside = e[0] > 0
+    narrow = poreSizeDistribution.lognormal(3e-9, 1e-4, numRadii=6)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau2D = [Si.tau2D_cylinder(e, ro=ro, n=300, **kwargs) for ro in (np.array([3e-9]), narrow)]
+        rate3D = [Si.tau3D_spherical(e, ro=ro, n=12, quadrature='gauss', **kwargs) for ro in (np.array([3e-9]), narrow)]
+    np.testing.assert_allclose(tau2D[1][:, inside], tau2D[0][:, inside], rtol=1e-3)
+    np.testing.assert_allclose(rate3D[1][:, inside], rate3D[0][:, inside], rtol=1e-3)
+
+
+def test_ensemble_is_volume_weighted(Si):
+    e = Si.energyRange()
+    inside = e[0] > 0
+    radii = np.array([2e-9, 6e-9])
+    distribution = poreSizeDistribution(radii, [3, 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        each = Si.tau3D_spherical(e, ro=radii, n=12, quadrature='gauss', **kwargs)
+        ensemble = Si.tau3D_spherical(e, ro=distribution, n=12, quadrature='gauss', **kwargs)
+    volume = np.array([3 * 8., 216.]) / (3 * 8. + 216.)
+    np.testing.assert_allclose(ensemble[0, inside], volume @ each[:, inside], rtol=1e-12)
@@ -0,0 +1,39 @@
+import numpy as np
+
+from powerFactorOptimizer import maximize, filteringObjective
+from thermoelectricProperties import thermoelectricProperties
+
+
+def test_maximize_quadratic():
+    x, value, trace, evaluations = maximize(lambda p: -np.sum((p - [0.3, -0.2])**2, axis=1), [[-1, 1], [-1, 1]], maxEvaluations=300)
+    np.testing.assert_allclose(x, [0.3, -0.2], atol=1e-3)
+    assert evaluations <= 300 and np.all(np.diff(trace) >= 0)
+    x, value, trace, evaluations = maximize(lambda p: -(p[:, 0] - 0.7)**2, [[0, 1]])
+    assert abs(x[0] - 0.7) < 1e-3
+
+
+def test_filteringObjective_evaluates_each_point():
+    material = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=300)
+    E = material.energyRange()
+    Temp = np.array([[300., 300.]])
+    Ef = np.array([[0.0, 0.05]])
+    dfdE = material.fermiDistribution(energyRange=E, fermiLevel=Ef, Temp=Temp)[1]
+    kwargs = dict(E=E, DoS=1e28 * np.sqrt(E), vg=2e5 * np.sqrt(E) + 1e3, Ef=Ef, dfdE=dfdE, Temp=Temp, tau_b=1e-14 * (E + 0.01)**-0.5 * np.ones((2, 1)))
+    points = np.array([[0.05, -15.], [0.1, -13.], [0.2, -14.]])
+    batched = filteringObjective(material, **kwargs)(points)
+    single = [np.mean(material.filteringEffect(U=U, tauo=10**logTau, **kwargs)[2]) for U, logTau in points]
+    np.testing.assert_allclose(batched, single, rtol=1e-12)
+
+
+def test_filteringObjective_averages_stacked_samples():
+    material = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=300)
+    E = material.energyRange()
+    Temp = np.array([[300., 600.]])
+    Ef = np.array([[0.0, 0.05], [-0.05, 0.02]])
+    dfdE = material.fermiDistribution(energyRange=E, fermiLevel=Ef, Temp=Temp)[1]
+    kwargs = dict(E=E, DoS=1e28 * np.sqrt(E), vg=2e5 * np.sqrt(E) + 1e3, Ef=Ef, dfdE=dfdE, Temp=Temp, tau_b=1e-14 * (E + 0.01)**-0.5 * np.ones((2, 2, 1)))
+    points = np.array([[0.05, -15.], [0.1, -13.], [0.2, -14.]])
+    batched = filteringObjective(material, **kwargs)(points)
+    assert batched.shape == (3,)
+    single = [np.mean(material.filteringEffect(U=U, tauo=10**logTau, **kwargs)[2]) for U, logTau in points]
+    np.testing.assert_allclose(batched, single, rtol=1e-12)
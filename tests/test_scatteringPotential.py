@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from scatteringPotential import scatteringPotential
+from thermoelectricProperties import thermoelectricProperties
+
+
+@pytest.fixture(scope='module')
+def Si():
+    return thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+
+
+@pytest.mark.parametrize('dimension', [2, 3])
+def test_gaussian_matches_analytic_transform(dimension):
+    Uo, sigma = 0.3, 2e-9
+    potential = scatteringPotential.gaussian(Uo, sigma, dimension=dimension)
+    q = np.geomspace(1e3, 3e9, 400)
+    exact = Uo * (2 * np.pi * sigma**2)**(dimension / 2) * np.exp(-q**2 * sigma**2 / 2)
+    assert np.max(np.abs(potential.matrixElement(q) - exact)) < 1e-7 * exact[0]
+
+
+def test_square_well_low_q_limit():
+    Uo, ro = 0.3, 3e-9
+    potential = scatteringPotential.squareWell(Uo, ro, dimension=2)
+    assert potential.matrixElement(np.array([0.]))[0] == pytest.approx(np.pi * Uo * ro**2, rel=1e-5)
+
+
+@pytest.mark.parametrize('valley', [[0.85, 0, 0], [0, 0, 0]])
+@pytest.mark.parametrize('ro', [1e-9, 3e-9, 1e-8])
+def test_square_well_matches_tau2D(Si, valley, ro):
+    e = Si.energyRange()
+    kwargs = dict(nk=[20, 20, 20], Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=valley, dk_len=0.15, ro=np.array([ro]), n=400, sampling='energy', numDirections=6)
+    builtIn = Si.tau2D_cylinder(e, **kwargs)
+    tabulated = Si.tau2D_cylinder(e, potential=scatteringPotential.squareWell(0.3, ro, dimension=2), **kwargs)
+    inside = e[0] > 0
+    assert np.max(np.abs(tabulated[:, inside] / builtIn[:, inside] - 1)) < 1e-3
@@ -0,0 +1,39 @@
+import numpy as np
+
+from scatteringRegistry import scatteringRegistry
+from thermoelectricProperties import thermoelectricProperties
+
+calls = []
+
+
+def constant(value, numEnergies):
+    calls.append(value)
+    return np.full((2, numEnergies), value)
+
+
+def test_lazy_memoized_mechanisms_and_compose():
+    Si = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=100)
+    e = Si.energyRange()
+    T = np.array([[300., 600.]])
+    phonon = dict(energyRange=e, alpha=0.5, Dv=2.94, DA=9.5, T=T, vs=205., D=1e28 * np.sqrt(e + 1e-3), rho=2329)
+    registry = scatteringRegistry(Si).register('tau_p_npb', 'tau_p', output=1, **phonon).register('tau_p_again', 'tau_p', output=1, **phonon)
+    registry.register('tau_c', constant, value=1e-13, numEnergies=e.shape[1])
+    assert calls == [] and registry.statistics()['entries'] == 0
+    np.testing.assert_array_equal(registry['tau_p_npb'], Si.tau_p(**phonon)[1])
+    registry['tau_p_again']
+    assert registry.statistics() == {'hits': 1, 'misses': 1, 'entries': 1}
+    total = registry.compose('6*tau_p_npb + 2*tau_c')
+    np.testing.assert_allclose(total, 1 / (1 / (6 * Si.tau_p(**phonon)[1]) + 1 / 2e-13), rtol=1e-14)
+    assert registry.compose('6*tau_p_npb + 2*tau_c') is total and calls == [1e-13]
+
+
+def test_cache_is_bounded():
+    Si = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=100)
+    registry = scatteringRegistry(Si, maxEntries=4)
+    for idx in range(10):
+        registry.register('tau_%d' % idx, constant, value=idx * 1e-14, numEnergies=3)
+        registry['tau_%d' % idx]
+    assert registry.statistics() == {'hits': 0, 'misses': 10, 'entries': 4}
+    registry['tau_9']
+    registry['tau_0']
+    assert registry.statistics() == {'hits': 1, 'misses': 11, 'entries': 4}
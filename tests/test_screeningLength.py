@@ -0,0 +1,35 @@
+import numpy as np
+from scipy.integrate import quad
+from scipy.special import gamma
+
+import screeningLength
+from screeningLength import fermiIntegral, effectiveDoS, screeningLength as lengths
+from thermoelectricProperties import thermoelectricProperties
+
+
+def test_fermiIntegral_matches_quadrature():
+    for j in (-0.5, 0.5):
+        for eta in (-5., 0., 3., 20.):
+            exact = quad(lambda x: x**j / (1 + np.exp(x - eta)), 0, eta + 60, points=[max(eta, 0)])[0] / gamma(j + 1)
+            assert abs(fermiIntegral(j, eta) - exact) < 1e-8 * exact
+
+
+def test_effectiveDoS_cache_is_bounded():
+    Temp = np.array([[300., 600.]])
+    first = effectiveDoS(0.23 * thermoelectricProperties.me, 0.5, Temp)
+    assert effectiveDoS(0.23 * thermoelectricProperties.me, 0.5, Temp) is first
+    for idx in range(2 * screeningLength.maxEntries):
+        effectiveDoS(0.23 * thermoelectricProperties.me, 0.5, Temp + idx + 1)
+    assert len(screeningLength._effectiveDoS) == screeningLength.maxEntries
+    np.testing.assert_array_equal(effectiveDoS(0.23 * thermoelectricProperties.me, 0.5, Temp), first)
+
+
+def test_stacked_samples_match_per_sample():
+    Temp = np.array([[300., 600., 900.]])
+    cc = np.array([[1e25, 2e25, 3e25], [1e26, 1e26, 2e26]])
+    Ef = np.array([[-0.05, -0.08, -0.1], [0.02, 0.0, -0.03]])
+    stacked = lengths(cc, Ef, Temp, 0.5, 0.23 * thermoelectricProperties.me, 11.7)
+    for idx in range(2):
+        single = lengths(cc[idx:idx+1], Ef[idx:idx+1], Temp, 0.5, 0.23 * thermoelectricProperties.me, 11.7)
+        for s, one in zip(stacked, single):
+            np.testing.assert_allclose(s[idx:idx+1], one, rtol=1e-14)
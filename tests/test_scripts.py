@@ -0,0 +1,29 @@
+import ast
+import os
+import warnings
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Names the filtering scripts used without defining them before the study runner (they need Si.py's namespace)
+siNames = {'Coeff', 'Coeff_1pct', 'Coeff_direction_down', 'Coeff_direction_down_no_np', 'Coeff_no_inc', 'Coeff_no_np', 'Coeff_no_np_1pct',
+           'ExpData_SiCfra_0pct_direction_up', 'ExpData_SiCfrac_1pct_direction_up', 'ExpData_SiCfrac_5pct_direction_down', 'ExpData_SiCfrac_5pct_direction_up',
+           'cc_1pct', 'cc_direction_down', 'cc_no_inc', 'cc_sc', 'cc_sc_1pct', 'cc_sc_direction_down', 'cc_sc_no_inc',
+           'fermi', 'fermi_1pct', 'fermi_direction_down', 'fermi_no_inc', 'g', 'm_CB_inc', 'm_CB_inc_1pct', 'm_CB_inc_direction_down', 'm_CB_no_inc'}
+baseline = {'Si.py': set(), 'SiGe.py': set(), 'Ideal_filtering_Si.py': siNames, 'Phenomenological_Si.py': siNames - {'cc_sc', 'fermi'}}
+
+
+def undefinedNames(path):
+    checker = pytest.importorskip('pyflakes.checker')
+    from pyflakes.messages import UndefinedName
+    with open(path) as scriptFile, warnings.catch_warnings():
+        # The plot labels hold LaTeX escapes such as '\m'
+        warnings.simplefilter('ignore')
+        tree = ast.parse(scriptFile.read(), filename=path)
+    return {message.message_args[0] for message in checker.Checker(tree, filename=path).messages if isinstance(message, UndefinedName)}
+
+
+@pytest.mark.parametrize('script', sorted(baseline))
+def test_script_has_no_new_undefined_names(script):
+    assert undefinedNames(os.path.join(root, script)) <= baseline[script]
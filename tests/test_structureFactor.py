@@ -0,0 +1,32 @@
+import numpy as np
+
+from structureFactor import structureFactor
+from thermoelectricProperties import thermoelectricProperties
+
+
+def test_random_pores_are_uncorrelated():
+    # Shells hold few modes in 2D, so the shell average scatters more there
+    for dimension, tolerance in ((2, 0.15), (3, 0.02)):
+        S = structureFactor.random(20000, 1e-7, dimension=dimension, gridSize=64).S
+        assert abs(np.mean(S[len(S) // 2:]) - 1) < tolerance
+
+
+def test_lattice_suppresses_long_wavelengths():
+    lattice = structureFactor.jitteredLattice(16, 1e-7, 1e-10, gridSize=64)
+    assert np.all(lattice.S[lattice.q < 0.5 * 2 * np.pi * 16 / 1e-7] < 0.05)
+
+
+def test_chunking_does_not_change_S():
+    positions = np.random.default_rng(1).uniform(0, 1e-7, (5000, 3))
+    np.testing.assert_allclose(structureFactor(positions, 1e-7, gridSize=32, chunkSize=777).S, structureFactor(positions, 1e-7, gridSize=32).S, rtol=1e-10)
+
+
+def test_unit_structure_factor_leaves_lifetimes_unchanged():
+    Si = thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*thermoelectricProperties.me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=100)
+    e = Si.energyRange()
+    flat = structureFactor.random(100, 1e-7, gridSize=16)
+    flat.S = np.ones_like(flat.S)
+    kwargs = dict(nk=None, Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([3e-9]), sampling='energy', numDirections=3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.testing.assert_allclose(Si.tau2D_cylinder(e, n=200, structure=flat, **kwargs), Si.tau2D_cylinder(e, n=200, **kwargs), rtol=1e-12)
+        np.testing.assert_allclose(Si.tau3D_spherical(e, n=12, structure=flat, **kwargs), Si.tau3D_spherical(e, n=12, **kwargs), rtol=1e-12)
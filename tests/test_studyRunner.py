@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from diskCache import diskCache
+from studyRunner import study
+from taskGraph import taskGraph
+from thermoelectricProperties import thermoelectricProperties
+
+
+@pytest.fixture(scope='module')
+def description(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('carriers')
+    T = np.arange(250., 1400., 50.)
+    paths = []
+    for name, level in [('low', 2e19), ('high', 1e20), ('higher', 3e20)]:
+        path = directory / ('cc-%s.txt' % name)
+        np.savetxt(path, np.vstack((T, level * (1 + T / 2000))))
+        paths.append(str(path))
+    material = {'latticeParameter': 5.401803661945516e-10, 'dopantElectricCharge': 1, 'electronEffectiveMass': 1.08, 'energyMin': 0.0, 'energyMax': 1, 'dielectric': 11.7, 'numKpoints': 800, 'numEnergySampling': 300}
+    E = np.linspace(0, 1, 300)
+    return {
+        'material': material,
+        'temperature': {'TempMin': 300, 'TempMax': 901, 'dT': 200},
+        'bandGap': {'Eg_o': 1.17, 'Ao': 4.73e-4, 'Bo': 636},
+        'nonparabolicity': 0.5,
+        'bandMass': 0.23,
+        'carrierConcentration': {'Ao': 5.3e21, 'Bo': 3.5e21},
+        'DoS': {'analytical': 'nonparabolic'},
+        'groupVelocity': 2e5 * np.sqrt(E) + 1e3,
+        'phonon': {'Dv': 2.94, 'DA': 9.5, 'vs': 5.4e3, 'rho': 2329},
+        'lifetime': '6*tau_p_npb + 6*tau_ion',
+        'samples': [
+            {'label': 'low', 'path2extrinsicCarrierConcentration': paths[0]},
+            {'label': 'high', 'path2extrinsicCarrierConcentration': paths[1], 'lifetime': '6*tau_p_pb + 6*tau_ion + tau_np'},
+            {'label': 'higher', 'path2extrinsicCarrierConcentration': paths[2], 'lifetime': '6*tau_p_npb + tau_Screened_Coulomb + 2*tau_np'},
+        ]}
+
+
+mechanisms = {'tau_np': 1e-13 * (np.linspace(0, 1, 300) + 0.05)**-0.5}
+
+
+def test_stacked_samples_match_single_sample_studies(description):
+    result = study(description, mechanisms=mechanisms).run()
+    assert result['Sigma'].shape == (3, 4)
+    for sample in description['samples']:
+        single = study(dict(description, samples=[sample]), mechanisms=mechanisms).run()
+        for stacked, one in zip(result.coefficients(sample['label']), single.coefficients(sample['label'])):
+            np.testing.assert_allclose(stacked, one, rtol=1e-12)
+        for key, value in single.sample(sample['label']).items():
+            np.testing.assert_allclose(result.sample(sample['label'])[key], value, rtol=1e-12)
+
+
+def test_unused_mechanism_leaves_lifetime_unchanged(description):
+    result = study(description, mechanisms=mechanisms).run()
+    material = thermoelectricProperties(**dict(description['material'], electronEffectiveMass=1.08 * thermoelectricProperties.me))
+    expected = material.matthiessen(result['tau_p_npb'], result['tau_ion'][0], weights=[6, 6])
+    np.testing.assert_allclose(result['lifetime'][0], expected, rtol=1e-12)
+
+
+def test_rerun_reuses_every_stage(description):
+    runner = study(description, mechanisms=mechanisms)
+    first = runner.run()
+    second = runner.run()
+    assert len(second.computed['temperature']) == 0 and second.computed['samples'] == []
+    for key in first.coefficientNames:
+        np.testing.assert_array_equal(first[key], second[key])
+
+
+def _assertSameResult(result, full):
+    assert result.labels == full.labels
+    for key in full:
+        if key == 'bandStructure':
+            continue
+        np.testing.assert_allclose(result[key], full[key], rtol=1e-12, err_msg=key)
+
+
+def test_incremental_run_matches_full_run(description):
+    partial = dict(description, temperature={'TempMin': 300, 'TempMax': 701, 'dT': 200}, samples=description['samples'][:2])
+    runner = study(partial, mechanisms=mechanisms)
+    runner.run()
+    runner.description = description
+    result = runner.run()
+    assert list(result.computed['temperature']) == [900.] and result.computed['samples'] == ['higher']
+    _assertSameResult(result, study(description, mechanisms=mechanisms).run())
+
+
+def test_incremental_run_from_the_store(description, tmp_path):
+    partial = dict(description, temperature={'TempMin': 500, 'TempMax': 901, 'dT': 200}, samples=description['samples'][1:])
+    study(partial, mechanisms=mechanisms, graph=taskGraph(store=diskCache(str(tmp_path)))).run()
+    # A new process: the previous result comes from the store
+    result = study(description, mechanisms=mechanisms, graph=taskGraph(store=diskCache(str(tmp_path)))).run()
+    assert list(result.computed['temperature']) == [300.] and result.computed['samples'] == ['low']
+    _assertSameResult(result, study(description, mechanisms=mechanisms).run())
+
+
+def test_sample_without_lifetime_is_rejected(description):
+    samples = [dict(description['samples'][0]), dict(description['samples'][1])]
+    with pytest.raises(ValueError, match="'low'"):
+        study(dict({key: value for key, value in description.items() if key != 'lifetime'}, samples=samples))
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import numpy as np
+
+from taskGraph import taskGraph
+
+calls = []
+
+
+def scaled(value, factor):
+    calls.append((value, factor))
+    return np.asarray(value) * factor
+
+
+def pair(value):
+    calls.append(value)
+    return [value, -value]
+
+
+def total(*values):
+    return sum(values)
+
+
+def sleepy(seconds, index):
+    time.sleep(seconds)
+    return threading.get_ident()
+
+
+def test_identical_nodes_are_merged():
+    graph = taskGraph()
+    a = graph.node('m_CB_no_inc', scaled, 2., 3.)
+    b = graph.node('m_CB_inc', scaled, 2., 3.)
+    assert a is b
+    assert graph.statistics()['merged'] == 1 and 'm_CB_inc' in graph.explain()
+    assert graph.node('other', scaled, 2., 4.) is not a
+
+
+def test_results_are_memoized():
+    del calls[:]
+    graph = taskGraph()
+    base = graph.node('base', pair, 5.)
+    top = graph.node('top', total, base[0], graph.node('scaled', scaled, base[1], 2.))
+    assert graph.evaluate(top) == [-5.]
+    assert graph.statistics()['computed'] == 5
+    assert len(calls) == 2
+    assert graph.evaluate(top) == [-5.] and len(calls) == 2
+    assert graph.statistics()['computed'] == 0 and graph.statistics()['hits'] == 1
+    # A new node over the same base only computes itself
+    graph.evaluate(graph.node('again', scaled, base[0], 3.))
+    assert len(calls) == 3 and graph.statistics()['computed'] == 1
+
+
+def test_lru_evicts_the_oldest_entries():
+    del calls[:]
+    graph = taskGraph(maxEntries=2)
+    first, second, third = [graph.node('n%d' % _, scaled, float(_), 1.) for _ in range(3)]
+    graph.evaluate(first)
+    graph.evaluate(second)
+    graph.evaluate(first)
+    graph.evaluate(third)
+    assert len(calls) == 3 and graph.statistics()['entries'] == 2
+    graph.evaluate(first)
+    assert len(calls) == 3
+    graph.evaluate(second)
+    assert len(calls) == 4
+
+
+def test_independent_nodes_run_concurrently():
+    graph = taskGraph(maxWorkers=4)
+    nodes = [graph.node('sleep%d' % _, sleepy, 0.2, _) for _ in range(4)]
+    start = time.perf_counter()
+    threads = graph.evaluate(*nodes)
+    assert time.perf_counter() - start < 0.6
+    assert len(set(threads)) > 1
+    serial = taskGraph(maxWorkers=1)
+    assert set(serial.evaluate(*[serial.node('sleep%d' % _, sleepy, 0., _) for _ in range(4)])) == {threading.get_ident()}
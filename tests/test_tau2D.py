@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from numpy.linalg import norm
+from scipy.interpolate import PchipInterpolator
+from scipy.special import jv
+
+from accum import accum
+from thermoelectricProperties import thermoelectricProperties
+
+hBar, e2C, me = thermoelectricProperties.hBar, thermoelectricProperties.e2C, thermoelectricProperties.me
+kwargs = dict(nk=[6, 6, 6], Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([1e-9, 4e-9]))
+
+
+@pytest.fixture(scope='module')
+def Si():
+    return thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+
+
+def _fullArrays(Si, energyRange, nk, Uo, m, vfrac, valley, dk_len, ro, n):
+    # tau2D_cylinder as it was before chunking: every (k-point x angle) array at once
+    meff = np.array(m) * me
+    ko = 2 * np.pi / Si.latticeParameter * np.array(valley)
+    N = vfrac/np.pi/ro**2
+    kpoint, E = Si.kpointMesh(nk, m, valley, dk_len)
+    mag_kpoint = norm(kpoint, axis=0)
+    t = np.linspace(0, 2*np.pi, n)
+    a = np.sqrt(2 * meff[1] / hBar**2 * E / e2C)[None]
+    b = np.sqrt(2 * meff[2] / hBar**2 * E / e2C)[None]
+    ds = np.sqrt((a.T * np.sin(t))**2 + (b.T * np.cos(t))**2)
+    kz2 = kpoint[2][:, None]**2
+    cos_theta = ((a * kpoint[0]).T * np.cos(t) + (b * kpoint[1]).T * np.sin(t) + kz2) / np.sqrt(a.T**2 * np.cos(t)**2 + b.T**2 * np.sin(t)**2 + kz2) / mag_kpoint[:, None]
+    delE = hBar**2 * np.abs((a.T * np.cos(t) - ko[0]) / meff[0] + (b.T * np.sin(t) - ko[1]) / meff[1] + (kz2 - ko[2] / meff[2]))
+    qr = np.sqrt((kpoint[0][:, None] - a.T * np.cos(t))**2 + (kpoint[1][:, None] - b.T * np.sin(t))**2)
+    Ec, indices, return_indices = np.unique(E, return_index=True, return_inverse=True)
+    tau = np.empty((len(ro), len(energyRange[0])))
+    for r_idx in range(len(ro)):
+        SR = 2 * np.pi / hBar * Uo**2 * (2 * np.pi)**3 * (ro[r_idx] * jv(1, ro[r_idx] * qr) / qr)**2
+        tau_k = 1 / (N[r_idx] / (2 * np.pi)**3 * np.trapz(SR * (1 - cos_theta) / delE * ds, t, axis=1)) * e2C
+        tau_c = accum(return_indices, tau_k, func=np.mean, dtype=float)
+        tau[r_idx] = PchipInterpolator(Ec[30:], tau_c[30:])(energyRange)
+    return tau
+
+
+def test_chunked_matches_full_arrays(Si):
+    e = Si.energyRange()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reference = _fullArrays(Si, e, n=300, **kwargs)
+        exact = Si.tau2D_cylinder(e, n=300, chunkSize=17, besselTolerance=None, **kwargs)
+        tabulated = Si.tau2D_cylinder(e, n=300, **kwargs)
+    np.testing.assert_allclose(exact, reference, rtol=1e-10)
+    np.testing.assert_allclose(tabulated, reference, rtol=1e-6)
+
+
+def test_result_does_not_depend_on_blocks(Si):
+    e = Si.energyRange()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = [Si.tau2D_cylinder(e, n=300, chunkSize=size, **kwargs) for size in (1, 13, 216)]
+        results.append(Si.tau2D_cylinder(e, n=300, memoryBudget=2**16, **kwargs))
+    for result in results[1:]:
+        np.testing.assert_array_equal(result, results[0])
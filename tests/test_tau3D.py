@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+from numpy.linalg import norm
+
+from thermoelectricProperties import thermoelectricProperties
+
+hBar, e2C, me = thermoelectricProperties.hBar, thermoelectricProperties.e2C, thermoelectricProperties.me
+
+
+@pytest.fixture(scope='module')
+def Si():
+    return thermoelectricProperties(latticeParameter=5.401803661945516e-10, dopantElectricCharge=1, electronEffectiveMass=1.08*me, energyMin=0.0, energyMax=1, dielectric=11.7, numKpoints=800, numEnergySampling=200)
+
+
+def _loopRate(Si, nk, Uo, m, vfrac, valley, dk_len, ro, n, jacobian='componentSum'):
+    # The per-k-point triangle loop of the original tau3D_spherical. jacobian='componentSum' is its |grad E| term as
+    # written there, 'norm' the corrected one
+    meff = np.array(m) * me
+    ko = 2 * np.pi / Si.latticeParameter * np.array(valley)
+    N = 3*vfrac/4/np.pi/ro**3
+    kpoint, E = Si.kpointMesh(nk, m, valley, dk_len)
+    nu = np.linspace(0, np.pi, n)
+    z_ = -1 * np.cos(nu)
+    r = np.sqrt(1.0 - z_**2)[:, None]
+    theta = np.linspace(0, 2 * np.pi, n)[None, :]
+    rate = np.zeros((len(ro), len(E)))
+    for u in range(len(E)):
+        axis = np.sqrt(2 / (hBar**2 * e2C) * meff * E[u])
+        x = -1 * axis[0] * r * np.cos(theta) + ko[0]
+        y = -1 * axis[1] * r * np.sin(theta) + ko[1]
+        z = np.tile((axis[2] * z_ + ko[2])[:, None], (1, n))
+        corners = [((i, j), (i-1, j), (i-1, j-1)) for j in range(1, n-1) for i in range(2, n)]
+        corners += [((i, j-1), (i, j), (i-1, j-1)) for j in range(1, n-1) for i in range(1, n-1)]
+        corners += [((i, 0), (i-1, 0), (i-1, -2)) for i in range(2, n)]
+        corners += [((i, -2), (i, 0), (i-1, -2)) for i in range(1, n-1)]
+        Q, A = [], []
+        for triangle in corners:
+            p = [np.array([x[c], y[c], z[c]]) for c in triangle]
+            a, b, c = norm(p[0] - p[1]), norm(p[1] - p[2]), norm(p[2] - p[0])
+            s = (a + b + c) / 2
+            Q.append(sum(p) / 3)
+            A.append(np.sqrt(s*(s-a)*(s-b)*(s-c)))
+        Q, A = np.array(Q), np.array(A)
+        q = norm(kpoint[:, u] - Q, axis=1)
+        cosTheta = Q @ kpoint[:, u] / norm(kpoint[:, u]) / norm(Q, axis=1)
+        if jacobian == 'norm':
+            delE = hBar**2 * norm((Q - ko) / meff, axis=1)
+        else:
+            delE = np.abs(hBar**2*((Q[:, 0]-ko[0])/meff[0]+(Q[:, 1]-ko[1])/meff[1]+(Q[:, 2]-ko[2])/meff[2]))
+        for ro_idx in range(len(ro)):
+            M = 4*np.pi*Uo*(1/q*np.sin(ro[ro_idx]*q)-ro[ro_idx]*np.cos(ro[ro_idx]*q))/(q**2)
+            rate[ro_idx, u] = N[ro_idx]/(2*np.pi)**3*np.sum(2*np.pi/hBar*M**2/delE*(1-cosTheta)*A)
+    return rate
+
+
+@pytest.mark.parametrize('jacobian', ['componentSum', 'norm'])
+def test_vectorized_matches_loop(Si, jacobian):
+    kwargs = dict(nk=[4, 4, 4], Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([1e-9, 5e-9]), n=12)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reference = _loopRate(Si, jacobian=jacobian, **kwargs)
+        rate = Si.tau3D_spherical(Si.energyRange(), chunkSize=7, jacobian=jacobian, **kwargs)
+    finite = np.isfinite(reference)
+    np.testing.assert_array_equal(finite, np.isfinite(rate))
+    np.testing.assert_allclose(rate[finite], reference[finite], rtol=1e-10)
+
+
+def test_default_matches_baseline_loop_with_gradient_norm(Si):
+    kwargs = dict(nk=[4, 4, 4], Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([1e-9, 5e-9]), n=12)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reference = _loopRate(Si, jacobian='norm', **kwargs)
+        rate = Si.tau3D_spherical(Si.energyRange(), **kwargs)
+    finite = np.isfinite(reference)
+    np.testing.assert_allclose(rate[finite], reference[finite], rtol=1e-10)
+
+
+def test_isoenergy_kpoints_lie_on_their_surface(Si):
+    m, valley = [0.98, 0.19, 0.19], [0.85, 0, 0]
+    kpoint, E, weight = Si.isoenergyKpoints(np.array([0.05, 0.2]), m, valley, numDirections=5)
+    ko = 2 * np.pi / Si.latticeParameter * np.array(valley)
+    energy = hBar**2 / 2 * np.sum((kpoint - ko[:, None])**2 / (np.array(m)[:, None] * me), axis=0) * e2C
+    np.testing.assert_allclose(energy, E, rtol=1e-12)
+    assert len(E) == 2 * len(weight) and abs(np.sum(weight) - 1) < 1e-14
+
+
+def test_energy_sampling_matches_kpoint_mesh(Si):
+    # An isotropic valley at the zone center has direction-independent rates, so the energy-grid rates are the
+    # k-point rates at the same energy and do not depend on the direction quadrature
+    e = Si.energyRange()
+    kwargs = dict(Uo=0.3, m=[0.3, 0.3, 0.3], vfrac=0.05, valley=[0, 0, 0], dk_len=0.15, ro=np.array([3e-9]), n=24, quadrature='gauss')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kpoint, E = Si.kpointMesh([12, 12, 12], kwargs['m'], kwargs['valley'], kwargs['dk_len'])
+        mesh = Si.tau3D_spherical(e, nk=[12, 12, 12], **kwargs)[0]
+        rate = Si.tau3D_spherical(e, nk=None, sampling='energy', numDirections=2, **kwargs)[0]
+        finer = Si.tau3D_spherical(e, nk=None, sampling='energy', numDirections=5, **kwargs)[0]
+    np.testing.assert_allclose(finer, rate, rtol=1e-10)
+    order = np.argsort(E)
+    inside = (e[0] > 0.02) & (e[0] < E.max())
+    np.testing.assert_allclose(rate[inside], np.interp(e[0][inside], E[order], mesh[order]), rtol=1e-2)
+    assert np.all(rate[e[0] == 0] == 0)
+
+
+def test_ellipsoid_quadrature_is_exact_for_areas_and_moments(Si):
+    node, weight = Si.ellipsoidQuadrature(24, np.array([2., 2., 2.]))
+    np.testing.assert_allclose(np.sum(weight), 4 * np.pi * 4, rtol=1e-13)
+    np.testing.assert_allclose(np.sum(weight * node[:, 0]**2), 4 * np.pi / 3 * 2**4, rtol=1e-13)
+    a, c = 1., 3.                                                   # prolate spheroid, closed-form area
+    eccentricity = np.sqrt(1 - a**2 / c**2)
+    node, weight = Si.ellipsoidQuadrature(48, np.array([a, a, c]))
+    np.testing.assert_allclose(np.sum(weight), 2 * np.pi * a**2 * (1 + c / a / eccentricity * np.arcsin(eccentricity)), rtol=1e-10)
+
+
+def test_gauss_quadrature_converges_with_an_honest_error_estimate(Si):
+    e = Si.energyRange()
+    kwargs = dict(nk=None, Uo=0.3, m=[0.98, 0.19, 0.19], vfrac=0.05, valley=[0.85, 0, 0], dk_len=0.15, ro=np.array([3e-9]), sampling='energy', numDirections=3)
+    inside = e[0] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reference = Si.tau3D_spherical(e, n=64, quadrature='gauss', **kwargs)[:, inside]
+        rate, error = Si.tau3D_spherical(e, n=16, quadrature='gauss', returnError=True, **kwargs)
+        triangles = Si.tau3D_spherical(e, n=32, **kwargs)[:, inside]
+    actual = np.abs(rate[:, inside] / reference - 1)
+    assert np.max(actual) < 1e-3 and np.all(actual <= error[:, inside] + 1e-12)
+    assert np.max(np.abs(triangles / reference - 1)) < 1e-2
+    adaptive = Si.tau3D_spherical(e, n=4, quadrature='gauss', tolerance=1e-3, **kwargs)[:, inside]
+    assert np.max(np.abs(adaptive / reference - 1)) < 1e-3
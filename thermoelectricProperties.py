@@ -4,6 +4,7 @@ from os.path import expanduser
 from scipy.interpolate import InterpolatedUnivariateSpline
 from scipy.interpolate import PchipInterpolator
 from scipy.special import jv
+from scipy.integrate import cumulative_trapezoid
 import matplotlib as mpl
 from matplotlib import cm
 from numpy.matlib import repmat
@@ -16,6 +17,13 @@ from mpl_toolkits import mplot3d
 from matplotlib.colors import LightSource
 import seaborn as sns
 from accum import accum
+from parallel import mapChunks, scratchBuffers, releaseScratch
+from besselKernel import j1OverXTable, j1OverX
+from scatteringPotential import matrixElementTable
+from poreSizeDistribution import poreSizeDistribution
+from matthiessenAccumulator import matthiessenAccumulator
+from inputHash import inputHash
+from lruCache import lruCache
 from numpy.linalg import norm
 
 
@@ -41,6 +49,7 @@ class thermoelectricProperties:
         self.numBands = numBands
         self.electronDispersian = electronDispersian
         self.numQpoints = numQpoints
+        self._kernelCache = lruCache(16)
 
     def energyRange(self):                                  # Create an array of energy space sampling
         energyRange = np.linspace(self.energyMin, self.energyMax, self.numEnergySampling)
@@ -100,8 +109,8 @@ class thermoelectricProperties:
         JD_CC = np.log(np.divide(carrierConcentration, Nc)) + 1 / np.sqrt(8) * np.divide(carrierConcentration, Nc) - (3. / 16 - np.sqrt(3) / 9) * np.power(np.divide(carrierConcentration, Nc), 2)
         fermiLevelEnergy = thermoelectricProperties.kB * np.multiply(T, JD_CC)
         f, _ = self.fermiDistribution(energyRange=energyRange, fermiLevel=fermiLevelEnergy, Temp=T)
-        n = np.trapz(np.multiply(DoS, f), energyRange, axis=1)
-        return [fermiLevelEnergy,np.expand_dims(n,axis=0)]
+        n = np.trapz(np.multiply(DoS, f), energyRange, axis=-1)
+        return [fermiLevelEnergy,np.reshape(n, np.shape(fermiLevelEnergy))]
 
     def fermiDistribution(self, energyRange, fermiLevel, Temp=None):
         if Temp is None:
@@ -109,12 +118,30 @@ class thermoelectricProperties:
         else:
             T = Temp
 
-        xi = np.exp((energyRange-fermiLevel.T)/T.T/thermoelectricProperties.kB)
+        xi = np.exp((energyRange-self._sampleAxis(fermiLevel))/self._sampleAxis(T)/thermoelectricProperties.kB)
         fermiDirac = 1/(xi+1)
-        dfdE = -1*xi/(1+xi)**2/T.T/thermoelectricProperties.kB
+        dfdE = -1*xi/(1+xi)**2/self._sampleAxis(T)/thermoelectricProperties.kB
         fermi = np.array([fermiDirac, dfdE])
         return fermi
 
+    def selfConsistentFermiLevel(self, carrierConcentration, Temp, energyRange, DoS, fermilevel, window=0.2, tolerance=1e-9):
+        # Vectorized fermiLevelSelfConsistent: bisection for the Fermi level (eV) within fermilevel +- window whose
+        # carrier concentration integrates to carrierConcentration, for (1, nT) or stacked (nSamples, nT) inputs
+        lower = fermilevel - window
+        upper = fermilevel + window
+
+        def density(Ef):
+            f, _ = self.fermiDistribution(energyRange=energyRange, fermiLevel=Ef, Temp=Temp)
+            return np.reshape(np.trapz(np.multiply(DoS, f), energyRange, axis=-1), np.shape(Ef))
+        # A fixed number of halvings, so each column converges exactly as it would on its own (see study.run)
+        for _ in range(int(np.ceil(np.log2(2 * window / tolerance)))):
+            middle = (lower + upper) / 2
+            below = density(middle) < carrierConcentration
+            lower = np.where(below, middle, lower)
+            upper = np.where(below, upper, middle)
+        Ef = (lower + upper) / 2
+        return [Ef, density(Ef)]
+
     def electronBandStructure(self, path2eigenval, skipLines):
         with open(expanduser(path2eigenval)) as eigenvalFile:
             for _ in range(skipLines):
@@ -207,46 +234,82 @@ class thermoelectricProperties:
             del velFunctionEnergy, ESpline, vel_g, Ec, indices, return_indices
         return np.asarray(vg)
 
-    def matthiessen(self, *args):
-        tau = 1. / sum([1. / arg for arg in args])
-        tau[np.isinf(tau)] = 0
-        return tau
+    def matthiessen(self, *args, weights=None):
+        accumulator = matthiessenAccumulator()
+        for idx, arg in enumerate(args):
+            accumulator.add(arg, weight=1. if weights is None else weights[idx])
+        return accumulator.lifetime()
 
     def tau_p(self, energyRange, alpha, Dv, DA, T, vs, D, rho):
-
-        nonparabolic_term = (1-((alpha.T*energyRange)/(1+2*alpha.T*energyRange)*(1-Dv/DA)))**2-8/3*(alpha.T*energyRange)*(1+alpha.T*energyRange)/(1+2*alpha.T*energyRange)**2*(Dv/DA)
-        tau = rho*vs**2*thermoelectricProperties.hBar/np.pi/thermoelectricProperties.kB/T.T/DA/DA*1e9/thermoelectricProperties.e2C/D
+        # Dv, DA, vs, rho and alpha may be 1-D arrays over a parameter set; the lifetimes are then (nParam, nT, nE)
+        alpha, Dv, DA, vs, rho = [self._parameterAxis(_) for _ in (alpha, Dv, DA, vs, rho)]
+        alphaE = alpha*energyRange
+        denominator = 1+2*alphaE
+        ratio = Dv/DA
+        nonparabolic_term = (1-alphaE/denominator*(1-ratio))**2-8/3*alphaE*(1+alphaE)/denominator**2*ratio
+        tau = rho*vs**2*thermoelectricProperties.hBar/np.pi/thermoelectricProperties.kB/self._sampleAxis(T)/DA/DA*1e9/thermoelectricProperties.e2C/D
         tau_p = tau/nonparabolic_term
         return [tau,tau_p]
 
+    def _sampleAxis(self, parameter):
+        # One sample given as (1, nT) becomes (nT, 1) as before; samples stacked as (nSamples, nT) become (nSamples, nT, 1)
+        parameter = np.asarray(parameter, dtype=float)
+        if parameter.ndim == 2 and parameter.shape[0] == 1:
+            return parameter.T
+        return parameter[..., None]
+
+    def _parameterAxis(self, parameter, trailingAxes=2):
+        # Scalars pass through, 1-D arrays span a leading parameter axis in front of `trailingAxes` axes ((nT, nE) by
+        # default, one more for stacked samples or an inner parameter axis) and 2-D arrays follow _sampleAxis
+        parameter = np.asarray(parameter, dtype=float)
+        if parameter.ndim == 0:
+            return parameter
+        if parameter.ndim == 1:
+            return np.reshape(parameter, (-1,) + (1,) * trailingAxes)
+        return self._sampleAxis(parameter)
+
+    def _memo(self, tag, evaluate, *inputs):
+        key = inputHash(tag, *inputs)
+        value = self._kernelCache.get(key)
+        if value is None:
+            value = self._kernelCache.put(key, evaluate())
+        return value
+
+    def _coulombPrefactor(self, energyRange, m_c, N):
+        # 16 pi sqrt(2 m_c) (4 pi eps eps0)^2 E^(3/2) / N, shared by the screened and unscreened lifetimes
+        def evaluate():
+            return 16*np.pi*np.sqrt(2*self._sampleAxis(m_c))*(4*np.pi*self.dielectric*thermoelectricProperties.e0)**2/self._sampleAxis(N)*energyRange**(3/2)/thermoelectricProperties.e2C**(5/2)
+        return self._memo('coulombPrefactor', evaluate, energyRange, m_c, N, self.dielectric)
+
     def tau_Screened_Coulomb(self,energyRange, m_c, LD, N):
 
-        g = 8*m_c.T*LD.T**2*energyRange/thermoelectricProperties.hBar**2/thermoelectricProperties.e2C
-        var_tmp = np.log(1+g)-g/(1+g)
-        tau = 16*np.pi*np.sqrt(2*m_c.T)*(4*np.pi*self.dielectric*thermoelectricProperties.e0)**2/N.T/var_tmp*energyRange**(3/2)/thermoelectricProperties.e2C**(5/2)
-        where_are_NaNs = np.isnan(tau)
-        tau[where_are_NaNs] = 0
-        return tau
+        def evaluate():
+            g = 8*self._sampleAxis(m_c)*self._sampleAxis(LD)**2*energyRange/thermoelectricProperties.hBar**2/thermoelectricProperties.e2C
+            # ln(1+g) - g/(1+g) cancels for small g, so use its series g^2/2 - 2g^3/3 + 3g^4/4 - 4g^5/5 there
+            return np.where(g < 1e-3, g**2*(1/2-g*(2/3-g*(3/4-g*4/5))), np.log1p(g)-g/(1+g))
+        var_tmp = self._memo('screenedLogTerm', evaluate, energyRange, m_c, LD)
+        prefactor = self._coulombPrefactor(energyRange, m_c, N)
+        # tau ~ E^(-1/2) as E -> 0; the E = 0 point itself is set to 0 like the other zero-energy lifetimes
+        return np.divide(prefactor, var_tmp, out=np.zeros(np.broadcast_shapes(prefactor.shape, var_tmp.shape)), where=var_tmp > 0)
 
     def tau_Unscreened_Coulomb(self,energyRange, m_c, N):
 
-        g = 4*np.pi*(4*np.pi*self.dielectric*thermoelectricProperties.e0)*energyRange/N.T**(1/3)/thermoelectricProperties.e2C
-        var_tmp = np.log(1+g**2)
-        tau = 16*np.pi*np.sqrt(2*m_c.T)*(4*np.pi*self.dielectric*thermoelectricProperties.e0)**2/N.T/var_tmp*energyRange**(3/2)/thermoelectricProperties.e2C**(5/2)
-        where_are_NaNs = np.isnan(tau)
-        tau[where_are_NaNs] = 0
-        return tau
+        def evaluate():
+            g = 4*np.pi*(4*np.pi*self.dielectric*thermoelectricProperties.e0)*energyRange/self._sampleAxis(N)**(1/3)/thermoelectricProperties.e2C
+            return np.log1p(g**2)
+        var_tmp = self._memo('unscreenedLogTerm', evaluate, energyRange, N, self.dielectric)
+        prefactor = self._coulombPrefactor(energyRange, m_c, N)
+        return np.divide(prefactor, var_tmp, out=np.zeros(np.broadcast_shapes(prefactor.shape, var_tmp.shape)), where=var_tmp > 0)
 
     def tau_Strongly_Screened_Coulomb(self, D, LD, N):
-        tau = thermoelectricProperties.hBar/N.T/np.pi/D/(LD.T**2/(4*np.pi*self.dielectric*thermoelectricProperties.e0))**2*1/thermoelectricProperties.e2C**2
+        with np.errstate(divide='ignore'):
+            tau = thermoelectricProperties.hBar/self._sampleAxis(N)/np.pi/D/(self._sampleAxis(LD)**2/(4*np.pi*self.dielectric*thermoelectricProperties.e0))**2*1/thermoelectricProperties.e2C**2
         return tau
 
-    def tau2D_cylinder(self,energyRange, nk, Uo, m, vfrac, valley, dk_len, ro, n=2000):
-
+    def kpointMesh(self, nk, m, valley, dk_len):
         meff = np.array(m) * thermoelectricProperties.me
         ko = 2 * np.pi / self.latticeParameter * np.array(valley)
         del_k = 2*np.pi/self.latticeParameter * dk_len * np.array([1, 1, 1])
-        N = vfrac/np.pi/ro**2
         kx = np.linspace(ko[0], ko[0] + del_k[0], nk[0], endpoint=True)  # kpoints mesh
         ky = np.linspace(ko[1], ko[1] + del_k[1], nk[1], endpoint=True)  # kpoints mesh
         kz = np.linspace(ko[2], ko[2] + del_k[2], nk[2], endpoint=True)  # kpoints mesh
@@ -255,158 +318,275 @@ class thermoelectricProperties:
         yk_ = np.reshape(yk, -1)
         zk_ = np.reshape(zk, -1)
         kpoint = np.array([xk_, yk_, zk_])
-        mag_kpoint = norm(kpoint, axis=0)
         E = thermoelectricProperties.hBar**2 / 2 * ((kpoint[0, :] - ko[0])**2 / meff[0] + (kpoint[1, :] - ko[1])**2 / meff[1] + (kpoint[2, :] - ko[2]) ** 2 / meff[2]) * thermoelectricProperties.e2C
-        t = np.linspace(0, 2*np.pi, n)
-        a = np.expand_dims(np.sqrt(2 * meff[1] / thermoelectricProperties.hBar**2 * E / thermoelectricProperties.e2C), axis=0)
-        b = np.expand_dims(np.sqrt(2 * meff[2] / thermoelectricProperties.hBar**2 * E / thermoelectricProperties.e2C), axis=0)
-        ds = np.sqrt((a.T * np.sin(t))**2 + (b.T * np.cos(t))**2)
-        cos_theta = ((a * kpoint[0]).T * np.cos(t) + (b * kpoint[1]).T * np.sin(t) + np.expand_dims(kpoint[2]**2, axis=1)) / np.sqrt(a.T**2 * np.cos(t)**2 + b.T**2 * np.sin(t)**2 + np.expand_dims(kpoint[2]**2, axis=1)) / np.expand_dims(mag_kpoint, axis=1)
-        delE = thermoelectricProperties.hBar**2 * np.abs((a.T * np.cos(t) - ko[0]) / meff[0] + (b.T * np.sin(t) - ko[1]) / meff[1] + (np.expand_dims(kpoint[2]**2, axis=1) - ko[2] / meff[2]))
-        qx = np.expand_dims(kpoint[0], axis=1) - a.T * np.cos(t)
-        qy = np.expand_dims(kpoint[1], axis=1) - b.T * np.sin(t)
-        qr = np.sqrt(qx**2 + qy**2)
-        tau = np.empty((len(ro), len(E)))
-        for r_idx in np.arange(len(ro)):
-            J = jv(1, ro[r_idx] * qr)
-            SR = 2 * np.pi / thermoelectricProperties.hBar * Uo**2 * (2 * np.pi)**3 * (ro[r_idx] * J / qr)**2
-            f = SR * (1 - cos_theta) / delE * ds
-            int_ = np.trapz(f, t, axis=1)
-            tau[r_idx] = 1 / (N[r_idx] / (2 * np.pi)**3 * int_) * thermoelectricProperties.e2C
-        Ec, indices, return_indices = np.unique(E, return_index=True, return_inverse=True)
-        tau_c = np.empty((len(ro), len(indices)))
-        tauFunctionEnergy = np.empty((len(ro), len(energyRange[0])))
-        for r_idx in np.arange(len(ro)):
-            tau_c[r_idx] = accum(return_indices, tau[r_idx], func=np.mean, dtype=float)
-        for tau_idx in np.arange(len(tau_c)):
-            ESpline = PchipInterpolator(Ec[30:], tau_c[tau_idx,30:])
-            tauFunctionEnergy[tau_idx] = ESpline(energyRange)
-        return tauFunctionEnergy
+        return [kpoint, E]
 
-    def tau3D_spherical(self,energyRange, nk, Uo, m, vfrac, valley, dk_len, ro, n=32):
+    def isoenergyKpoints(self, energies, m, valley, numDirections=4):
+        # Initial states on each isoenergy ellipsoid along a Gauss-Legendre product quadrature of directions over
+        # the same octant the k-point mesh covers; the weights integrate to one over that octant
         meff = np.array(m) * thermoelectricProperties.me
         ko = 2 * np.pi / self.latticeParameter * np.array(valley)
-        del_k = 2*np.pi/self.latticeParameter * dk_len * np.array([1, 1, 1])
-        N = 3*vfrac/4/np.pi/ro**3
-        kx = np.linspace(ko[0], ko[0] + del_k[0], nk[0], endpoint=True)  # kpoints mesh
-        ky = np.linspace(ko[1], ko[1] + del_k[1], nk[1], endpoint=True)  # kpoints mesh
-        kz = np.linspace(ko[2], ko[2] + del_k[2], nk[2], endpoint=True)  # kpoints mesh
-        [xk, yk, zk] = np.meshgrid(kx, ky, kz)
-        xk_ = np.reshape(xk, -1)
-        yk_ = np.reshape(yk, -1)
-        zk_ = np.reshape(zk, -1)
-        kpoint = np.array([xk_, yk_, zk_])
+        mu, w_mu = np.polynomial.legendre.leggauss(numDirections)
+        phi, w_phi = np.polynomial.legendre.leggauss(numDirections)
+        mu, w_mu = (mu + 1) / 2, w_mu / 2
+        phi, w_phi = (phi + 1) * np.pi / 4, w_phi * np.pi / 4
+        mu, phi = [_.ravel() for _ in np.meshgrid(mu, phi, indexing='ij')]
+        direction = np.array([mu, np.sqrt(1 - mu**2) * np.cos(phi), np.sqrt(1 - mu**2) * np.sin(phi)])
+        weight = np.outer(w_mu, w_phi).ravel() / (np.pi / 2)
+        axis = np.sqrt(2 / (thermoelectricProperties.hBar**2 * thermoelectricProperties.e2C) * meff)
+        kpoint = ko[:, None, None] + axis[:, None, None] * np.sqrt(energies)[None, :, None] * direction[:, None, :]
+        E = np.repeat(energies, len(weight))
+        return [np.reshape(kpoint, (3, -1)), E, weight]
+
+    def tau2D_cylinder(self,energyRange, nk, Uo, m, vfrac, valley, dk_len, ro, n=2000, chunkSize=None, workers=None, memoryBudget=2**28, sampling='kpoints', numDirections=4, besselTolerance=1e-10, potential=None, structure=None, checkpoint=None):
+
+        distribution = ro if isinstance(ro, poreSizeDistribution) else None
+        if distribution is not None:                               # polydisperse pores: one kernel pass per quadrature radius
+            ro = distribution.radii
+        meff = np.array(m) * thermoelectricProperties.me
+        ko = 2 * np.pi / self.latticeParameter * np.array(valley)
+        N = vfrac/np.pi/ro**2
+        if sampling == 'energy':
+            energies = energyRange[0][energyRange[0] > 0]
+            kpoint, E, weight = self.isoenergyKpoints(energies, m, valley, numDirections)
+        else:
+            kpoint, E = self.kpointMesh(nk, m, valley, dk_len)
         mag_kpoint = norm(kpoint, axis=0)
-        E = thermoelectricProperties.hBar**2 / 2 * ((kpoint[0, :] - ko[0])**2 / meff[0] + (kpoint[1, :] - ko[1])**2 / meff[1] + (kpoint[2, :] - ko[2]) ** 2 / meff[2]) * thermoelectricProperties.e2C
-        scattering_rate = np.zeros((len(ro), len(E)))
+        t = np.linspace(0, 2*np.pi, n)
+        if chunkSize is None:
+            chunkSize = max(1, memoryBudget // (8 * n * 8))     # six float64 scratch buffers of (chunkSize x n) per process plus two temporaries
+        tau = np.empty((len(ro), len(E)))
+        arrays = {'kpoint': kpoint, 'mag_kpoint': mag_kpoint, 'E': E}
+        params = {'t': t, 'ko': ko, 'meff': meff, 'Uo': Uo, 'ro': np.asarray(ro), 'N': N}
+        if structure is not None:                                # inter-pore correlation, S(q) multiplies |M(q)|^2
+            arrays['structureQ'], arrays['structureS'] = structure.table()
+        if potential is not None:                                # M(q) of arbitrary radial potentials, one table per radius
+            arrays['potentialLogq'], arrays['potentialM'] = matrixElementTable(potential, len(ro), dimension=2)
+        elif besselTolerance is not None:                        # |q| is bounded by |k| plus the largest ellipse axis
+            a_max = np.sqrt(2 * np.max(meff[1:]) / thermoelectricProperties.hBar**2 * np.max(E) / thermoelectricProperties.e2C)
+            params['besselStep'], arrays['besselTable'] = j1OverXTable(np.max(ro) * (np.max(mag_kpoint) + a_max), besselTolerance)
+        mapChunks(_tau2D_cylinder_chunk, len(E), tau, arrays=arrays, params=params, chunkSize=chunkSize, workers=workers, checkpoint=checkpoint)
+        releaseScratch()
+        if sampling == 'energy':                                   # direction-averaged lifetime on the energy grid
+            tauFunctionEnergy = np.full((len(ro), len(energyRange[0])), np.inf)
+            tauFunctionEnergy[:, energyRange[0] > 0] = np.matmul(tau.reshape(len(ro), -1, len(weight)), weight)
+        else:
+            Ec, indices, return_indices = np.unique(E, return_index=True, return_inverse=True)
+            tau_c = np.empty((len(ro), len(indices)))
+            tauFunctionEnergy = np.empty((len(ro), len(energyRange[0])))
+            for r_idx in np.arange(len(ro)):
+                tau_c[r_idx] = accum(return_indices, tau[r_idx], func=np.mean, dtype=float)
+            for tau_idx in np.arange(len(tau_c)):
+                ESpline = PchipInterpolator(Ec[30:], tau_c[tau_idx,30:])
+                tauFunctionEnergy[tau_idx] = ESpline(energyRange)
+        if distribution is not None:
+            with np.errstate(divide='ignore'):
+                tauFunctionEnergy = 1 / distribution.ensembleRate(1 / tauFunctionEnergy, dimension=2)
+        return tauFunctionEnergy
+
+    def unitSphereTriangulation(self, n=32):
         nu = np.linspace(0, np.pi, n)
         z_ = -1 * np.cos(nu)
         r = np.sqrt(1.0 - z_**2)[:, None]
         theta = np.linspace(0, 2 * np.pi, n)[None, :]
-        x_ = r * np.cos(theta)
-        y_ = r * np.sin(theta)
-        for u in np.arange(len(E)):
-
-            Q = np.zeros((2 * (n-2) * (n - 1), 3))
-            A = np.zeros((2 * (n-2) * (n - 1), 1))
-            k = 0
-            a_axis = np.sqrt(2 / (thermoelectricProperties.hBar**2 * thermoelectricProperties.e2C) * meff[0] * E[u])
-            b_axis = np.sqrt(2 / (thermoelectricProperties.hBar**2 * thermoelectricProperties.e2C) * meff[1] * E[u])
-            c_axis = np.sqrt(2 / (thermoelectricProperties.hBar**2 * thermoelectricProperties.e2C) * meff[2] * E[u])
-
-            y = -1 * b_axis * y_ + ko[1]
-            x = -1 * a_axis * x_ + ko[0]
-            Z_ = c_axis * z_ + ko[2]
-            z = np.tile(Z_[:, None], (1,n))
-            for j in np.arange(1,n-1):
-                for i in np.arange(2,n):
-                    S = np.array(np.array([x[i,j],y[i,j],z[i,j]])+np.array([x[i-1,j],y[i-1,j],z[i-1,j]])+np.array([x[i-1,j-1],y[i-1,j-1],z[i-1,j-1]]))
-                    Q[k] = S/3
-                    a = norm(np.array([x[i,j],y[i,j],z[i,j]])-np.array([x[i-1,j],y[i-1,j],z[i-1,j]]))
-                    b = norm(np.array([x[i-1,j],y[i-1,j],z[i-1,j]])-np.array([x[i-1,j-1],y[i-1,j-1],z[i-1,j-1]]))
-                    c = norm(np.array([x[i-1,j-1],y[i-1,j-1],z[i-1,j-1]])-np.array([x[i,j],y[i,j],z[i,j]]))
-                    s = a+b+c
-                    s = s/2
-                    A[k] = np.sqrt(s*(s-a)*(s-b)*(s-c))
-                    k += 1
-            for j in np.arange(1,n-1):
-                for i in np.arange(1,n-1):
-                    S = np.array([x[i,j-1],y[i,j-1],z[i,j-1]])+np.array([x[i,j],y[i,j],z[i,j]])+np.array([x[i-1,j-1],y[i-1,j-1],z[i-1,j-1]])
-                    Q[k] = S/3
-                    a = norm(np.array([x[i,j-1],y[i,j-1],z[i,j-1]])-np.array([x[i,j],y[i,j],z[i,j]]))
-                    b = norm(np.array([x[i,j],y[i,j],z[i,j]])-np.array([x[i-1,j-1],y[i-1,j-1],z[i-1,j-1]]))
-                    c = norm(np.array([x[i-1,j-1],y[i-1,j-1],z[i-1,j-1]])-np.array([x[i,j-1],y[i,j-1],z[i,j-1]]))
-                    s = a+b+c
-                    s = s/2
-                    A[k] = np.sqrt(s*(s-a)*(s-b)*(s-c))
-                    k += 1
-            for i in np.arange(2,n):
-                S = np.array([x[i,0],y[i,0],z[i,0]])+np.array([x[i-1,0],y[i-1,0],z[i-1,0]])+np.array([x[i-1,-2],y[i-1,-2],z[i-1,-2]])
-                Q[k] = S/3
-                a = norm(np.array([x[i,0],y[i,0],z[i,0]])-np.array([x[i-1,0],y[i-1,0],z[i-1,0]]))
-                b = norm(np.array([x[i-1,0],y[i-1,0],z[i-1,0]])-np.array([x[i-1,-2],y[i-1,-2],z[i-1,-2]]))
-                c = norm(np.array([x[i-1,-2],y[i-1,-2],z[i-1,-2]])-np.array([x[i,0],y[i,0],z[i,0]]))
-                s = a+b+c
-                s = s/2
-                A[k] = np.sqrt(s*(s-a)*(s-b)*(s-c))
-                k += 1
-            for i in np.arange(1,n-1):
-                S = np.array([x[i,-2],y[i,-2],z[i,-2]])+np.array([x[i,0],y[i,0],z[i,0]])+np.array([x[i-1,-2],y[i-1,-2],z[i-1,-2]])
-                Q[k] = S/3
-                a = norm(np.array([x[i,-2],y[i,-2],z[i,-2]])-np.array([x[i,0],y[i,0],z[i,0]]))
-                b = norm(np.array([x[i,0],y[i,0],z[i,0]])-np.array([x[i-1,-2],y[i-1,-2],z[i-1,-2]]))
-                c = norm(np.array([x[i-1,-2],y[i-1,-2],z[i-1,-2]])-np.array([x[i,-2],y[i,-2],z[i,-2]]))
-                s = a+b+c
-                s = s/2
-                A[k] = np.sqrt(s*(s-a)*(s-b)*(s-c))
-                k += 1
-            qx = kpoint[0,u] - Q[:,0]
-            qy = kpoint[1,u] - Q[:,1]
-            qz = kpoint[2,u] - Q[:,2]
-            q  = np.sqrt(qx**2+qy**2+qz**2)
-            cosTheta = np.matmul(kpoint[:,u][None,:],Q.T)/norm(kpoint[:,u])/np.sqrt(np.sum(Q**2,axis=1))
-            delE = np.abs(thermoelectricProperties.hBar**2*((Q[:,0]-ko[0])/meff[0]+(Q[:,1]-ko[1])/meff[1]+(Q[:,2]-ko[2])/meff[2]))
-            for ro_idx in  np.arange(len(ro)):
-              M = 4*np.pi*Uo*(1/q*np.sin(ro[ro_idx]*q)-ro[ro_idx]*np.cos(ro[ro_idx]*q))/(q**2)
-              SR = 2*np.pi/thermoelectricProperties.hBar*M*np.conj(M)
-              f = SR/delE*(1-cosTheta);
-              scattering_rate[ro_idx,u] = N[ro_idx]/(2*np.pi)**3*np.sum(f*A.T)
+        x = -1 * r * np.cos(theta)
+        y = -1 * r * np.sin(theta)
+        z = np.tile(z_[:, None], (1, n))
+        vertex = np.stack([x, y, z], axis=-1)                     # (n, n, 3) grid of unit sphere points
+        j, i = np.meshgrid(np.arange(1, n-1), np.arange(2, n), indexing='ij')
+        j, i = j.ravel(), i.ravel()
+        jj, ii = np.meshgrid(np.arange(1, n-1), np.arange(1, n-1), indexing='ij')
+        jj, ii = jj.ravel(), ii.ravel()
+        i_seam = np.arange(2, n)
+        ii_seam = np.arange(1, n-1)
+        triangles = np.concatenate([
+            np.stack([vertex[i, j], vertex[i-1, j], vertex[i-1, j-1]], axis=1),
+            np.stack([vertex[ii, jj-1], vertex[ii, jj], vertex[ii-1, jj-1]], axis=1),
+            np.stack([vertex[i_seam, 0], vertex[i_seam-1, 0], vertex[i_seam-1, -2]], axis=1),
+            np.stack([vertex[ii_seam, -2], vertex[ii_seam, 0], vertex[ii_seam-1, -2]], axis=1)])
+        return triangles                                           # (2(n-2)(n-1), 3 vertices, 3 coordinates)
+
+    def ellipsoidQuadrature(self, n, axis):
+        # Gauss-Legendre in cos(polar angle) x trapezoid in azimuth (2n points, spectrally accurate for a
+        # periodic integrand) on the ellipsoid with semi-axes `axis`; the weights carry the exact surface Jacobian
+        mu, w_mu = np.polynomial.legendre.leggauss(n)
+        phi = np.linspace(0, 2 * np.pi, 2 * n, endpoint=False)
+        w = np.outer(w_mu, np.full(2 * n, np.pi / n)).ravel()
+        mu, phi = [_.ravel() for _ in np.meshgrid(mu, phi, indexing='ij')]
+        s = np.sqrt(1 - mu**2)
+        node = np.array([s * np.cos(phi), s * np.sin(phi), mu]).T * axis
+        jacobian = np.sqrt((axis[1] * axis[2] * s * np.cos(phi))**2 + (axis[0] * axis[2] * s * np.sin(phi))**2 + (axis[0] * axis[1] * mu)**2)
+        return [node, jacobian * w]
+
+    def tau3D_spherical(self,energyRange, nk, Uo, m, vfrac, valley, dk_len, ro, n=32, chunkSize=None, workers=None, sampling='kpoints', numDirections=4, quadrature='triangles', tolerance=None, maxOrder=256, returnError=False, potential=None, structure=None, checkpoint=None, jacobian='norm'):
+        # The surface integral divides by |grad E(k')| = hBar^2 |(k'-ko)/m|. jacobian='componentSum' instead uses
+        # hBar^2 |sum((k'-ko)/m)| as the original triangle loop did; that sum vanishes on a curve of the ellipsoid, so
+        # it diverges logarithmically and does not converge with n
+        distribution = ro if isinstance(ro, poreSizeDistribution) else None
+        if distribution is not None:                               # polydisperse pores: one kernel pass per quadrature radius
+            ro = distribution.radii
+        meff = np.array(m) * thermoelectricProperties.me
+        ko = 2 * np.pi / self.latticeParameter * np.array(valley)
+        N = 3*vfrac/4/np.pi/ro**3
+        if sampling == 'energy':
+            energies = energyRange[0][energyRange[0] > 0]
+            kpoint, E, weight = self.isoenergyKpoints(energies, m, valley, numDirections)
+        else:
+            kpoint, E = self.kpointMesh(nk, m, valley, dk_len)
+        mag_kpoint = norm(kpoint, axis=0)
+        # The isoenergy ellipsoid at E is the E = 1 eV ellipsoid scaled by sqrt(E), so the surface
+        # nodes scale by sqrt(E) and the surface elements by E
+        axis = np.sqrt(2 / (thermoelectricProperties.hBar**2 * thermoelectricProperties.e2C) * meff)
+
+        potentialTable = {}
+        if potential is not None:                                  # M(q) of arbitrary radial potentials, one table per radius
+            potentialTable['potentialLogq'], potentialTable['potentialM'] = matrixElementTable(potential, len(ro), dimension=3)
+        if structure is not None:                                  # inter-pore correlation, S(q) multiplies |M(q)|^2
+            potentialTable['structureQ'], potentialTable['structureS'] = structure.table()
+
+        def surfaceRate(node, dS, select=slice(None)):
+            rate = np.zeros((len(ro), len(E[select])))
+            size = chunkSize if chunkSize is not None else max(1, 2**22 // (len(ro) * len(dS)))
+            mapChunks(_tau3D_spherical_chunk, len(E[select]), rate, arrays={'kpoint': kpoint[:, select], 'mag_kpoint': mag_kpoint[select], 'E': E[select], 'node': node, 'dS': dS, **potentialTable},
+                      params={'ko': ko, 'meff': meff, 'Uo': Uo, 'ro': np.asarray(ro), 'N': N, 'gradientNorm': jacobian == 'norm'}, chunkSize=size, workers=workers, checkpoint=checkpoint)
+            return rate
+
+        def relativeError(rate, rate_low):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.abs(rate - rate_low) / np.abs(rate)
+
+        if quadrature == 'gauss':
+            if tolerance is not None:                               # double the order until the embedded estimate meets the tolerance
+                probe = np.unique(np.linspace(0, len(E) - 1, min(len(E), 64)).astype(int))
+                probe = probe[E[probe] > 0]
+                rate_low = surfaceRate(*self.ellipsoidQuadrature(max(1, n // 2), axis), select=probe)
+                while True:
+                    rate_probe = surfaceRate(*self.ellipsoidQuadrature(n, axis), select=probe)
+                    if np.nanmax(relativeError(rate_probe, rate_low)) <= tolerance or 2 * n > maxOrder:
+                        break
+                    n, rate_low = 2 * n, rate_probe
+            scattering_rate = surfaceRate(*self.ellipsoidQuadrature(n, axis))
+            if returnError:                                         # conservative estimate: the difference to the order n/2 rule
+                scattering_rate_low = surfaceRate(*self.ellipsoidQuadrature(max(1, n // 2), axis))
+        else:
+            triangles = self.unitSphereTriangulation(n) * axis
+            centroid = np.mean(triangles, axis=1)
+            area = norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1) / 2
+            scattering_rate = surfaceRate(centroid, area)
+            if returnError:
+                triangles = self.unitSphereTriangulation(max(3, n // 2)) * axis
+                scattering_rate_low = surfaceRate(np.mean(triangles, axis=1), norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1) / 2)
+        if sampling == 'energy':                                   # rate from the direction-averaged lifetime on the energy grid
+            def directionAverage(rate):
+                rate_E = np.zeros((len(ro), len(energyRange[0])))
+                rate_E[:, energyRange[0] > 0] = 1 / np.matmul(1 / rate.reshape(len(ro), -1, len(weight)), weight)
+                return rate_E
+            scattering_rate = directionAverage(scattering_rate)
+            if returnError:
+                scattering_rate_low = directionAverage(scattering_rate_low)
+        if distribution is not None:
+            scattering_rate = distribution.ensembleRate(scattering_rate, dimension=3)
+            if returnError:
+                scattering_rate_low = distribution.ensembleRate(scattering_rate_low, dimension=3)
+        if returnError:
+            return [scattering_rate, relativeError(scattering_rate, scattering_rate_low)]
         return scattering_rate
 
 
     def electricalProperties(self, E, DoS, vg, Ef, dfdE, Temp, tau):
+        # Samples stacked as (nSamples, nT) keep their leading axis in every coefficient
         X = DoS * vg**2 * dfdE
-        Y = (E - np.transpose(Ef)) * X
-        Z = (E - np.transpose(Ef)) * Y
-        Sigma = -1 * np.trapz(X * tau, E, axis=1) / 3 * thermoelectricProperties.e2C
-        S = -1*np.trapz(Y * tau, E, axis=1)/np.trapz(X * tau, E, axis=1)/Temp
+        Y = (E - self._sampleAxis(Ef)) * X
+        Z = (E - self._sampleAxis(Ef)) * Y
+        Sigma = -1 * np.trapz(X * tau, E, axis=-1) / 3 * thermoelectricProperties.e2C
+        S = -1*np.trapz(Y * tau, E, axis=-1)/np.trapz(X * tau, E, axis=-1)/Temp
         PF = Sigma*S**2
-        ke = -1*(np.trapz(Z * tau, E, axis=1) - np.trapz(Y * tau, E, axis=1)**2/np.trapz(X * tau, E, axis=1))/Temp/3 * thermoelectricProperties.e2C
-        delta_0 = np.trapz(X * tau* E, E, axis=1)
-        delta_1 = np.trapz(X * tau* E, E, axis=1)/ np.trapz(X * tau, E, axis=1)
-        delta_2 = np.trapz(X * tau* E**2, E, axis=1)/ np.trapz(X * tau, E, axis=1)
+        ke = -1*(np.trapz(Z * tau, E, axis=-1) - np.trapz(Y * tau, E, axis=-1)**2/np.trapz(X * tau, E, axis=-1))/Temp/3 * thermoelectricProperties.e2C
+        delta_0 = np.trapz(X * tau* E, E, axis=-1)
+        delta_1 = np.trapz(X * tau* E, E, axis=-1)/ np.trapz(X * tau, E, axis=-1)
+        delta_2 = np.trapz(X * tau* E**2, E, axis=-1)/ np.trapz(X * tau, E, axis=-1)
         Lorenz = (delta_2-delta_1**2)/Temp/Temp
-        coefficients = [Sigma, S[0], PF[0], ke[0], delta_1, delta_2, Lorenz[0]]
+        if np.ndim(Sigma) == 1:
+            return [Sigma, S[0], PF[0], ke[0], delta_1, delta_2, Lorenz[0]]
+        coefficients = [Sigma, S, PF, ke, delta_1, delta_2, Lorenz]
         return coefficients
 
-    def filteringEffect(self, U0, tau0, tauOff, energyRange, electronBandStructure, temp, electronDoS, electronGroupVelocity, bandGap, carrierConcentration, fermiLevel, fermiDistribution, factor, q, uIncrement=0.05, tauIncrement=1e-15, tempIndex=0):
-        n = 0
-        m = 0
-        sMatrix = np.array([])
-        # rMatrix = np.array([])
-        # pfMatrix = np.array([])
-
-        for _ in np.arange(0.1, U0, uIncrement):
-            m += 1
-            for __ in np.arange(tauIncrement, tau0, tauIncrement):
-                tauInc = np.ones(len(Erange))
-                tauInc[np.where(Erange < _)] = __
-                tau_on = self.matthiessen(energyRange, tauOff, tauInc)
-                s, r, c, pf, X, Y = self.electricalProperties(energyRange, electronBandStructure, temp, electronDoS, electronGroupVelocity, tau_on, bandGap, carrierConcentration, fermiLevel, fermiDistribution, factor, q)
-                sMatrix = np.append(sMatrix, s[tempIndex])
-                n += 1
-        sMatrix = np.reshape(sMatrix, (n, m))
-        return sMatrix
+    def tailIntegral(self, E, integrand, U):
+        # Trapezoid integral of integrand (..., nE) with the integrand zeroed at grid points E < U, for every threshold
+        # in U at once. One reverse cumulative trapezoid gives the tail from each grid point; the half panel ramping up
+        # to the first point at or above U is added back. Returns shape (nU, ...)
+        e = np.ravel(E)
+        tail = -cumulative_trapezoid(integrand[..., ::-1], e[::-1], axis=-1, initial=0)[..., ::-1]
+        tail = np.concatenate((tail, np.zeros(tail.shape[:-1] + (1,))), axis=-1)
+        k = np.searchsorted(e, np.atleast_1d(U))
+        first = np.minimum(k, len(e) - 1)
+        ramp = 0.5 * np.diff(e, prepend=e[0])[first] * (k < len(e))
+        return np.moveaxis(tail[..., k] + ramp * integrand[..., first], -1, 0)
+
+    def phenomenological(self, U, tauo, E, DoS, vg, Ef, dfdE, Temp, tau_b, paired=False):
+        # Phenomenological filtering: lifetime tauo (s) below U (eV) combined with tau_b by Matthiessen's rule.
+        # The moments are the unfiltered ones plus a step-mask matrix (nU, nE) times the trapezoid-weighted change
+        # below U for each tauo, so the whole grid is one matmul. Returns [Sigma, S] of shape (nU, nTau, nT), or
+        # (nU, nTau, nSamples, nT) for stacked samples. paired=True takes U and tauo as nPoints (U, tauo) pairs
+        # instead of a grid and drops the nTau axis
+        U = np.atleast_1d(U)
+        tauo = np.atleast_1d(tauo)
+        if paired and len(U) != len(tauo):
+            raise Exception("Paired U and tauo need the same length")
+        e = np.ravel(E)
+        weight = np.zeros_like(e)
+        weight[1:] += np.diff(e) / 2
+        weight[:-1] += np.diff(e) / 2
+        X = DoS * vg**2 * dfdE
+        Y = (E - self._sampleAxis(Ef)) * X
+        tau = self.matthiessen(tau_b)
+        transport = np.stack(np.broadcast_arrays(X, Y)) * weight             # (2, [nSamples,] nT, nE)
+        base = np.sum(transport * tau, axis=-1)
+        delta = self.matthiessen(tau, self._parameterAxis(tauo, np.broadcast(X, tau).ndim)) - tau    # (nTau, [nSamples,] nT, nE)
+        change = transport[:, None] * delta                                      # (2, nTau, [nSamples,] nT, nE)
+        if paired:
+            step = (e < self._parameterAxis(U, delta.ndim - 1)).astype(float)     # (nPoints, 1, ..., nE)
+            moments = np.expand_dims(base, 1) + np.sum(change * step, axis=-1)
+        else:
+            step = (e < U[:, None]).astype(float)                                # (nU, nE)
+            moments = np.expand_dims(base, (1, 2)) + np.moveaxis(np.tensordot(step, change, axes=(-1, -1)), 0, 1)
+        Sigma = -1 * moments[0] / 3 * thermoelectricProperties.e2C
+        S = -1 * moments[1] / moments[0] / Temp
+        return [Sigma, S]
+
+    def filteringEffect(self, U, E, DoS, vg, Ef, dfdE, Temp, tau_b, tauo=None, method='cumulative', paired=False):
+        # Filtering lifetime tauo (s) below the threshold U (eV) combined with the bulk tau_b by Matthiessen's rule.
+        # tauo=None is ideal filtering (tau = 0 below U). Returns [Sigma, S, PF] of shape (nU, nTau, nT), or
+        # (nU, nT) for ideal filtering, with an nSamples axis in front of nT for stacked samples. By default ideal
+        # filtering takes the O(nE) tailIntegral path and finite tauo the phenomenological matmul; method='broadcast'
+        # evaluates the full masked lifetime instead. paired=True evaluates nPoints (U, tauo) pairs, shape (nPoints, nT)
+        U = np.atleast_1d(U)
+        ideal = tauo is None
+        tauo = np.zeros(1) if ideal else np.atleast_1d(tauo)
+        if paired and not ideal and len(U) != len(tauo):
+            raise Exception("Paired U and tauo need the same length")
+        if not ideal and method == 'cumulative':
+            Sigma, S = self.phenomenological(U, tauo, E, DoS, vg, Ef, dfdE, Temp, tau_b, paired=paired)
+            return [Sigma, S, Sigma * S**2]
+        X = DoS * vg**2 * dfdE
+        Y = (E - self._sampleAxis(Ef)) * X
+        if ideal and method == 'cumulative':
+            tau = self.matthiessen(tau_b)
+            moments = self.tailIntegral(E, np.stack(np.broadcast_arrays(X * tau, Y * tau)), U)
+            Sigma = -1 * moments[:, 0] / 3 * thermoelectricProperties.e2C
+            S = -1 * moments[:, 1] / moments[:, 0] / Temp
+            return [Sigma, S, Sigma * S**2]
+        trailingAxes = np.broadcast(X, tau_b).ndim
+        below = E < self._parameterAxis(U, trailingAxes if paired and not ideal else trailingAxes + 1)
+        tau_f = np.where(below, self._parameterAxis(tauo, trailingAxes), np.inf)
+        tau = self.matthiessen(tau_b, tau_f)
+        Sigma = -1 * np.trapz(X * tau, E, axis=-1) / 3 * thermoelectricProperties.e2C
+        S = -1 * np.trapz(Y * tau, E, axis=-1) / np.trapz(X * tau, E, axis=-1) / Temp
+        PF = Sigma * S**2
+        coefficients = [Sigma, S, PF]
+        if ideal:
+            coefficients = [_[:, 0] for _ in coefficients]
+        return coefficients
 
     # def qpoints(self):
     #     qpoints = np.array([np.zeros(self.numQpoints), np.zeros(self.numQpoints), np.linspace(-math.pi / self.latticeParameter, math.pi / self.latticeParameter, num=self.numQpoints)])
@@ -487,6 +667,102 @@ class thermoelectricProperties:
     # def __repr(self):
 
 
+def _tau2D_cylinder_chunk(start, stop, out, kpoint, mag_kpoint, E, t, ko, meff, Uo, ro, N, besselStep=None, besselTable=None, potentialLogq=None, potentialM=None, structureQ=None, structureS=None):
+    # Every (k-point x angle) intermediate lives in one of six scratch buffers that are reused
+    # between blocks, so peak memory is set by the block size rather than the mesh size
+    A, B, w, s1, s2, s3 = scratchBuffers(6, stop - start, len(t))
+    kx = kpoint[0, start:stop, None]
+    ky = kpoint[1, start:stop, None]
+    kz2 = kpoint[2, start:stop, None]**2
+    a = np.sqrt(2 * meff[1] / thermoelectricProperties.hBar**2 * E[start:stop, None] / thermoelectricProperties.e2C)
+    b = np.sqrt(2 * meff[2] / thermoelectricProperties.hBar**2 * E[start:stop, None] / thermoelectricProperties.e2C)
+    cos_t = np.cos(t)
+    sin_t = np.sin(t)
+    np.multiply(a, cos_t, out=A)
+    np.multiply(b, sin_t, out=B)
+    np.multiply(a, sin_t, out=w)                                    # ds
+    np.square(w, out=w)
+    np.multiply(b, cos_t, out=s1)
+    np.square(s1, out=s1)
+    np.add(w, s1, out=w)
+    np.sqrt(w, out=w)
+    np.square(A, out=s1)                                            # cos_theta
+    np.square(B, out=s2)
+    np.add(s1, s2, out=s1)
+    np.add(s1, kz2, out=s1)
+    np.sqrt(s1, out=s1)
+    np.multiply(s1, mag_kpoint[start:stop, None], out=s1)
+    np.multiply(A, kx, out=s2)
+    np.multiply(B, ky, out=s3)
+    np.add(s2, s3, out=s2)
+    np.add(s2, kz2, out=s2)
+    np.divide(s2, s1, out=s2)
+    np.subtract(1, s2, out=s2)
+    np.multiply(w, s2, out=w)
+    np.subtract(A, ko[0], out=s1)                                   # delE
+    np.divide(s1, meff[0], out=s1)
+    np.subtract(B, ko[1], out=s3)
+    np.divide(s3, meff[1], out=s3)
+    np.add(s1, s3, out=s1)
+    np.add(s1, kz2 - ko[2] / meff[2], out=s1)
+    np.abs(s1, out=s1)
+    np.multiply(s1, thermoelectricProperties.hBar**2, out=s1)
+    np.divide(w, s1, out=w)                                         # w = (1 - cos_theta) / delE * ds
+    np.subtract(kx, A, out=s1)                                      # qr
+    np.square(s1, out=s1)
+    np.subtract(ky, B, out=s2)
+    np.square(s2, out=s2)
+    np.add(s1, s2, out=s1)
+    np.sqrt(s1, out=s1)
+    if structureS is not None:
+        s2[...] = np.interp(s1, structureQ, structureS, left=structureS[0], right=1)
+        np.multiply(w, s2, out=w)
+    dt = np.diff(t)
+    trapz_weight = np.concatenate([dt, [0]]) / 2 + np.concatenate([[0], dt]) / 2
+    for r_idx in np.arange(len(ro)):
+        np.multiply(s1, ro[r_idx], out=s2)
+        if potentialM is not None:                                  # SR = 2pi/hBar (2pi)^3 (M/2pi)^2 matches the hard wall when M = 2pi Uo ro J1(ro qr)/qr
+            with np.errstate(divide='ignore'):                  # q = 0 maps below the table, where M is flat
+                np.log(s1, out=s3)
+            s3[...] = np.interp(s3, potentialLogq, potentialM[r_idx], left=potentialM[r_idx, 0], right=0)
+            np.divide(s3, 2 * np.pi, out=s3)
+        elif besselTable is None:
+            jv(1, s2, out=s3)
+            np.multiply(s3, ro[r_idx], out=s3)
+            np.divide(s3, s1, out=s3)
+        else:                                                       # ro * J1(ro qr) / qr = ro^2 * K(ro qr)
+            j1OverX(s2, besselStep, besselTable, out=s3, work=A)
+            np.multiply(s3, ro[r_idx]**2, out=s3)
+        np.square(s3, out=s3)
+        np.multiply(s3, w, out=s3)
+        np.multiply(s3, trapz_weight, out=s3)
+        int_ = 2 * np.pi / thermoelectricProperties.hBar * (Uo**2 if potentialM is None else 1) * (2 * np.pi)**3 * np.sum(s3, axis=1)
+        out[r_idx, start:stop] = 1 / (N[r_idx] / (2 * np.pi)**3 * int_) * thermoelectricProperties.e2C
+
+
+def _tau3D_spherical_chunk(start, stop, out, kpoint, mag_kpoint, E, node, dS, ko, meff, Uo, ro, N, gradientNorm=False, potentialLogq=None, potentialM=None, structureQ=None, structureS=None):
+    ro = ro[:, None, None]
+    k = kpoint[:, start:stop].T[:, None, :]
+    Q = np.sqrt(E[start:stop])[:, None, None] * node + ko
+    q = norm(k - Q, axis=2)
+    cosTheta = np.sum(k * Q, axis=2) / mag_kpoint[start:stop][:, None] / norm(Q, axis=2)
+    if gradientNorm:
+        delE = thermoelectricProperties.hBar**2 * norm((Q - ko) / meff, axis=2)       # |grad E(k')|
+    else:
+        delE = np.abs(thermoelectricProperties.hBar**2 * np.sum((Q - ko) / meff, axis=2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = (1 - cosTheta) / delE * E[start:stop][:, None] * dS
+        if potentialM is None:
+            M = 4*np.pi*Uo*(1/q*np.sin(ro*q)-ro*np.cos(ro*q))/(q**2)
+        else:
+            logq = np.log(q)
+            M = np.array([np.interp(logq, potentialLogq, M_r, left=M_r[0], right=0) for M_r in potentialM])
+        SR = 2*np.pi/thermoelectricProperties.hBar*M**2
+        if structureS is not None:
+            SR = SR * np.interp(q, structureQ, structureS, left=structureS[0], right=1)
+        out[:, start:stop] = N[:, None]/(2*np.pi)**3*np.sum(SR*weight, axis=2)
+
+
 # Qpoint = np.array([np.zeros(silicon.numQpoints), np.zeros(silicon.numQpoints), np.linspace(-math.pi / silicon.latticeParameter, math.pi / silicon.latticeParameter, num=silicon.numQpoints)])
 # print len(Qpoint[1])
 # dynamicalMatrix = thermoelectricProperties.dynamicalMatrix(silicon, '~/Desktop/Notes/Box_120a_Lambda_10a/Si-hessian-mass-weighted-hessian.d', '~/Desktop/Notes/Box_120a_Lambda_10a/data.Si-3x3x3', 15, 216, 14, 8, Qpoint)